@@ -0,0 +1,83 @@
+-- Groq quota ledger + quota-aware job scheduling
+--
+-- groq_usage_ledger holds the audio seconds Groq billed per UTC day, so the
+-- worker's daily budget survives restarts and is shared by every worker.
+-- processing_queue.not_before lets the worker push a job past the quota
+-- reset instead of burning an attempt on a 429.
+
+CREATE TABLE IF NOT EXISTS public.groq_usage_ledger (
+  day date PRIMARY KEY,
+  audio_seconds numeric NOT NULL DEFAULT 0,
+  cost_usd numeric NOT NULL DEFAULT 0,
+  requests integer NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Worker-only table: no policies, only the service role can read/write it
+ALTER TABLE public.groq_usage_ledger ENABLE ROW LEVEL SECURITY;
+
+-- Atomic increment (concurrent workers never lose an update)
+CREATE OR REPLACE FUNCTION public.record_groq_usage(
+  p_day date,
+  p_seconds numeric,
+  p_cost numeric
+)
+RETURNS SETOF public.groq_usage_ledger
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  INSERT INTO groq_usage_ledger AS l (day, audio_seconds, cost_usd, requests, updated_at)
+  VALUES (p_day, p_seconds, p_cost, 1, now())
+  ON CONFLICT (day) DO UPDATE SET
+    audio_seconds = l.audio_seconds + EXCLUDED.audio_seconds,
+    cost_usd = l.cost_usd + EXCLUDED.cost_usd,
+    requests = l.requests + 1,
+    updated_at = now()
+  RETURNING *;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.record_groq_usage(date, numeric, numeric) FROM PUBLIC, anon, authenticated;
+
+ALTER TABLE public.processing_queue
+  ADD COLUMN IF NOT EXISTS not_before timestamptz;
+
+CREATE INDEX IF NOT EXISTS processing_queue_pick_idx
+  ON public.processing_queue (priority DESC, created_at)
+  WHERE status = 'queued';
+
+-- Highest priority first, then oldest; deferred jobs wait for not_before
+--
+-- pick_next_processing_job predates the migrations in this repo, so its
+-- deployed definition isn't here. It is dropped and recreated rather than
+-- replaced in place: CREATE OR REPLACE fails if the deployed return type
+-- differs. The new body keeps what the worker relies on (db.pick_next_job):
+-- one queued job per call, claimed with FOR UPDATE SKIP LOCKED, returned as
+-- a processing_queue row, SECURITY DEFINER with a fixed search_path. Compare
+-- with pg_get_functiondef('public.pick_next_processing_job'::regproc) before
+-- applying if the deployed one was changed by hand.
+DROP FUNCTION IF EXISTS public.pick_next_processing_job();
+
+CREATE FUNCTION public.pick_next_processing_job()
+RETURNS SETOF public.processing_queue
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  RETURN QUERY
+  UPDATE processing_queue q
+  SET status = 'processing', started_at = now()
+  WHERE q.id = (
+    SELECT id FROM processing_queue
+    WHERE status = 'queued'
+      AND (not_before IS NULL OR not_before <= now())
+    ORDER BY priority DESC NULLS LAST, created_at
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING q.*;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.pick_next_processing_job() FROM PUBLIC, anon, authenticated;
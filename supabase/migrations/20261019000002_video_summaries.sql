@@ -0,0 +1,19 @@
+-- Per-language summary variants
+--
+-- One row per (video, language): the worker summarizes a video once per
+-- language its subscribers need (from profiles.preferred_language) and each
+-- delivery picks the variant matching the recipient. processed_videos.summary
+-- and audio_url keep the primary variant for the dashboard and older rows.
+
+CREATE TABLE IF NOT EXISTS public.video_summaries (
+  video_id text NOT NULL REFERENCES public.processed_videos (video_id) ON DELETE CASCADE,
+  language text NOT NULL,
+  summary text NOT NULL,
+  audio_url text,
+  tts_voice text,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (video_id, language)
+);
+
+-- Worker-only table: no policies, only the service role can read/write it
+ALTER TABLE public.video_summaries ENABLE ROW LEVEL SECURITY;
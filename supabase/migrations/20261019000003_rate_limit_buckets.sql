@@ -0,0 +1,65 @@
+-- Shared token buckets for the worker's rate limiter
+--
+-- With RATE_LIMIT_BACKEND=postgres, every worker process takes from the same
+-- buckets (Gemini requests/tokens, Groq requests/audio seconds, YouTube,
+-- Telegram) instead of each one assuming it has the whole budget.
+
+CREATE TABLE IF NOT EXISTS public.rate_limit_buckets (
+  name text PRIMARY KEY,
+  tokens double precision NOT NULL,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Worker-only table: no policies, only the service role can read/write it
+ALTER TABLE public.rate_limit_buckets ENABLE ROW LEVEL SECURITY;
+
+-- Refill the bucket for the time elapsed, then take p_amount if the bucket
+-- covers it (a request larger than the bucket goes through once it is full,
+-- leaving it in debt). Returns 0 when taken, otherwise the seconds to wait
+-- before trying again. The row lock serializes concurrent workers.
+CREATE OR REPLACE FUNCTION public.take_rate_limit_tokens(
+  p_name text,
+  p_amount double precision,
+  p_capacity double precision,
+  p_rate double precision
+)
+RETURNS double precision
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_now timestamptz := clock_timestamp();
+  v_need double precision := LEAST(p_amount, p_capacity);
+  v_tokens double precision;
+  v_updated timestamptz;
+BEGIN
+  INSERT INTO rate_limit_buckets (name, tokens, updated_at)
+  VALUES (p_name, p_capacity, v_now)
+  ON CONFLICT (name) DO NOTHING;
+
+  SELECT tokens, updated_at INTO v_tokens, v_updated
+  FROM rate_limit_buckets
+  WHERE name = p_name
+  FOR UPDATE;
+
+  v_tokens := LEAST(
+    p_capacity,
+    v_tokens + GREATEST(0, EXTRACT(EPOCH FROM (v_now - v_updated))) * p_rate
+  );
+
+  IF v_tokens >= v_need THEN
+    UPDATE rate_limit_buckets
+    SET tokens = v_tokens - p_amount, updated_at = v_now
+    WHERE name = p_name;
+    RETURN 0;
+  END IF;
+
+  UPDATE rate_limit_buckets
+  SET tokens = v_tokens, updated_at = v_now
+  WHERE name = p_name;
+  RETURN (v_need - v_tokens) / p_rate;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.take_rate_limit_tokens(text, double precision, double precision, double precision) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,20 @@
+-- Audio artifact cache
+--
+-- One row per synthesized audio file: (video, summary language, TTS voice,
+-- format). Each combination is synthesized once and reused by every
+-- recipient with that voice instead of being regenerated per delivery.
+
+CREATE TABLE IF NOT EXISTS public.audio_artifacts (
+  video_id text NOT NULL REFERENCES public.processed_videos (video_id) ON DELETE CASCADE,
+  language text NOT NULL,
+  voice text NOT NULL,
+  format text NOT NULL,
+  storage_path text NOT NULL,
+  audio_url text NOT NULL,
+  size_bytes bigint,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (video_id, language, voice, format)
+);
+
+-- Worker-only table: no policies, only the service role can read/write it
+ALTER TABLE public.audio_artifacts ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,9 @@
+-- Telegram file_id reuse
+--
+-- Once an artifact has been sent to one chat, Telegram keeps the uploaded
+-- file: every other recipient is sent the same voice note (and the same
+-- thumbnail photo) by file_id instead of uploading the bytes again.
+
+ALTER TABLE public.audio_artifacts
+  ADD COLUMN IF NOT EXISTS telegram_file_id text,
+  ADD COLUMN IF NOT EXISTS photo_file_id text;
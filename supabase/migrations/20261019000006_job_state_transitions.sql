@@ -0,0 +1,106 @@
+-- Job / video state transitions in one round trip
+--
+-- The worker used to read processing_queue.attempts or
+-- processed_videos.failure_count, compute the next value and write it back:
+-- two round trips per counter, a lost increment when two workers raced, and
+-- up to six calls for a failed video (job, cascade to the video, video).
+-- Each transition is now one function call that increments in the UPDATE
+-- itself and returns the resulting state.
+
+-- Count a failed attempt of a video: back to pending, or failed at the third
+CREATE OR REPLACE FUNCTION public.fail_video(p_video_id text)
+RETURNS TABLE (status text, failure_count integer)
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  UPDATE processed_videos v
+  SET failure_count = COALESCE(v.failure_count, 0) + 1,
+      status = CASE WHEN COALESCE(v.failure_count, 0) + 1 >= 3 THEN 'failed' ELSE 'pending' END
+  WHERE v.video_id = p_video_id
+  RETURNING v.status, v.failure_count;
+$$;
+
+-- Count a failed attempt of a job: requeued, or failed at the third. The
+-- video is failed with it when p_fail_video is set or the job is done for.
+-- No row when the job is gone.
+CREATE OR REPLACE FUNCTION public.fail_processing_job(
+  p_job_id public.processing_queue.id%TYPE,
+  p_fail_video boolean DEFAULT false
+)
+RETURNS TABLE (job_status text, attempts integer, video_status text, failure_count integer)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_video_id text;
+BEGIN
+  UPDATE processing_queue q
+  SET attempts = COALESCE(q.attempts, 0) + 1,
+      status = CASE WHEN COALESCE(q.attempts, 0) + 1 >= 3 THEN 'failed' ELSE 'queued' END
+  WHERE q.id = p_job_id
+  RETURNING q.status, q.attempts, q.video_id INTO job_status, attempts, v_video_id;
+
+  IF NOT FOUND THEN
+    RETURN;
+  END IF;
+
+  IF p_fail_video OR job_status = 'failed' THEN
+    SELECT f.status, f.failure_count INTO video_status, failure_count
+    FROM fail_video(v_video_id) f;
+  END IF;
+  RETURN NEXT;
+END;
+$$;
+
+-- A processed video: summary variants, the video row and its job, together
+-- (deliveries never see a completed video without its variants).
+-- p_variants: [{"language", "summary", "audio_url", "tts_voice"}, ...]
+CREATE OR REPLACE FUNCTION public.complete_video_job(
+  p_job_id public.processing_queue.id%TYPE,
+  p_video_id text,
+  p_summary text,
+  p_audio_url text,
+  p_metadata jsonb DEFAULT NULL,
+  p_variants jsonb DEFAULT '[]'::jsonb
+)
+RETURNS TABLE (video_status text, job_status text, variants integer)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  INSERT INTO video_summaries AS s (video_id, language, summary, audio_url, tts_voice)
+  SELECT p_video_id, x.language, x.summary, x.audio_url, x.tts_voice
+  FROM jsonb_to_recordset(p_variants) AS x(language text, summary text, audio_url text, tts_voice text)
+  ON CONFLICT (video_id, language) DO UPDATE SET
+    summary = EXCLUDED.summary,
+    audio_url = EXCLUDED.audio_url,
+    tts_voice = EXCLUDED.tts_voice;
+  GET DIAGNOSTICS variants = ROW_COUNT;
+
+  UPDATE processed_videos v
+  SET summary = p_summary,
+      audio_url = p_audio_url,
+      status = 'completed',
+      processed_at = now(),
+      metadata = COALESCE(p_metadata, v.metadata)
+  WHERE v.video_id = p_video_id
+  RETURNING v.status INTO video_status;
+
+  UPDATE processing_queue q
+  SET status = 'completed'
+  WHERE q.id = p_job_id
+  RETURNING q.status INTO job_status;
+
+  RETURN NEXT;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.fail_video(text) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.fail_processing_job(public.processing_queue.id%TYPE, boolean)
+  FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.complete_video_job(
+  public.processing_queue.id%TYPE, text, text, text, jsonb, jsonb
+) FROM PUBLIC, anon, authenticated;
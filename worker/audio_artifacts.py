@@ -0,0 +1,319 @@
+"""
+Audio artifact cache — one synthesized file per (video, language, voice, format).
+
+A summary variant is synthesized once per voice that needs it and stored in
+Supabase Storage (audio/{video_id}_{language}_{voice}{ext}), with a row in
+the audio_artifacts table. Lookups go, cheapest first:
+1. local disk (AUDIO_DIR, size-bounded LRU — local_audio_cache.py)
+2. the artifact row → download from Storage (streamed to a temp file and
+   renamed into place once its size and container header check out)
+3. synthesize from the summary text → upload → record the row
+
+The processor creates the variants its recipients need ahead of time; the
+delivery loop asks for the recipient's exact voice and gets it on demand if
+it wasn't produced yet. Concurrent requests for the same key share one
+synthesis or download (single-flight).
+"""
+
+import asyncio
+import logging
+import os
+import re
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import aiohttp
+
+import db_async
+from config import AUDIO_DIR, DEFAULT_TTS_VOICE, TTS_AUDIO_FORMAT
+from local_audio_cache import LocalAudioCache
+from storage_uploader import storage_uploader
+from text_cleaner import clean_for_tts
+from tts_processor import AUDIO_CONTENT_TYPES, AUDIO_FORMATS, audio_suffix, text_to_audio
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9_-]+")
+
+# Download chunk size: memory per download stays at one chunk
+_CHUNK = 256 * 1024
+_DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=30)
+
+# How long a delivery waits for a concurrent first upload of the same audio
+# (e.g. held back by a RetryAfter) before uploading the file itself
+_FIRST_UPLOAD_WAIT = 10
+
+
+class ArtifactKey(NamedTuple):
+    video_id: str
+    language: str
+    voice: str
+    audio_format: str
+
+    @classmethod
+    def of(cls, video_id: str, language: Optional[str], voice: Optional[str]) -> "ArtifactKey":
+        """Key for the configured format; a missing voice means the default
+        voice, a missing language the video's primary summary."""
+        return cls(video_id, language or "default", voice or DEFAULT_TTS_VOICE, TTS_AUDIO_FORMAT)
+
+    @property
+    def stem(self) -> str:
+        """File name without extension (local disk and Storage)."""
+        return _UNSAFE_RE.sub("_", f"video_{self.video_id}_{self.language}_{self.voice}")
+
+    @property
+    def suffix(self) -> str:
+        return AUDIO_FORMATS.get(self.audio_format, ".mp3")
+
+
+class AudioArtifactCache:
+    """Local disk + Storage cache of synthesized audio, with hit statistics."""
+
+    def __init__(self, directory: Path = AUDIO_DIR):
+        self.directory = directory
+        self.local = LocalAudioCache(directory)
+        self._inflight: dict[ArtifactKey, asyncio.Task] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Telegram file_ids: voice per artifact, thumbnail photo per video
+        self._voice_ids: dict[ArtifactKey, str] = {}
+        self._photo_ids: dict[str, str] = {}
+        self._uploading: dict[ArtifactKey, asyncio.Event] = {}
+        self.local_hits = 0
+        self.remote_hits = 0
+        self.synthesized = 0
+        self.shared = 0  # requests that joined another request's synthesis/download
+
+    def _local_path(self, key: ArtifactKey) -> Optional[Path]:
+        # The configured suffix first; .mp3 when the Opus transcode fell back
+        return self.local.lookup(key.stem, dict.fromkeys([key.suffix, *AUDIO_CONTENT_TYPES]))
+
+    def pin(self, keys: list[ArtifactKey]) -> None:
+        """Keep these artifacts on disk (pending deliveries) until the next call."""
+        self.local.pin(key.stem for key in keys)
+
+    async def _single_flight(self, key: ArtifactKey, coro) -> Path:
+        task = self._inflight.get(key)
+        if task is not None:
+            coro.close()
+            self.shared += 1
+            return await asyncio.shield(task)
+        task = asyncio.ensure_future(coro)
+        self._inflight[key] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._inflight.pop(key, None)
+            else:
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+    async def get(self, key: ArtifactKey, summary: str, known_url: Optional[str] = None) -> Path:
+        """Local file for `key`, downloading or synthesizing it if needed.
+
+        `known_url` is an audio URL recorded before artifacts existed (e.g.
+        video_summaries.audio_url) known to be in this key's voice; it is
+        used when no artifact row exists.
+        """
+        path = self._local_path(key)
+        if path:
+            self.local_hits += 1
+            return path
+        return await self._single_flight(key, self._fetch_or_create(key, summary, known_url))
+
+    async def ensure(self, key: ArtifactKey, summary: str, audio_path: Optional[Path] = None) -> str:
+        """Make sure `key` exists in Storage (ahead of delivery) and return its
+        URL. `audio_path` adopts audio synthesized elsewhere (streaming TTS).
+        Falls back to the local path if the upload fails."""
+        row = await db_async.get_audio_artifact(*key)
+        if row and row.get("audio_url"):
+            self.remote_hits += 1
+            return row["audio_url"]
+        if audio_path is None:
+            audio_path = self._local_path(key) or await self._single_flight(
+                key, self._synthesize(key, summary)
+            )
+        else:
+            self.local.add(audio_path)
+        return await self._publish(key, audio_path)
+
+    async def _fetch_or_create(self, key: ArtifactKey, summary: str, known_url: Optional[str]) -> Path:
+        row = await db_async.get_audio_artifact(*key)
+        url = (row or {}).get("audio_url") or known_url
+        if url and url.startswith("http"):
+            path = self.directory / f"{key.stem}{audio_suffix(url)}"
+            # The recorded size applies to the artifact's own URL only
+            expected = (row or {}).get("size_bytes") if url == (row or {}).get("audio_url") else None
+            if await self._download(url, path, expected):
+                self.remote_hits += 1
+                self.local.add(path)
+                return path
+        path = await self._synthesize(key, summary)
+        await self._publish(key, path)
+        return path
+
+    async def _synthesize(self, key: ArtifactKey, summary: str) -> Path:
+        logger.info(f"[{key.video_id}] Generating audio ({key.language}, {key.voice})...")
+        path = await text_to_audio(clean_for_tts(summary), voice=key.voice, output_filename=key.stem)
+        self.synthesized += 1
+        self.local.add(path)
+        return path
+
+    def _http(self) -> aiohttp.ClientSession:
+        """Session shared by every download (one connection pool)."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=_DOWNLOAD_TIMEOUT)
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+    async def _download(self, url: str, path: Path, expected_size: Optional[int] = None) -> bool:
+        """Stream `url` into `path`.
+
+        Chunks are written off the event loop to a hidden temp file next to
+        `path` (ignored by the local cache index), which replaces `path`
+        atomically only if the size matches (`expected_size`, else
+        Content-Length) and the data starts like an audio file — a reader
+        never sees a partial or error-page file.
+        """
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.part")
+        f = None
+        try:
+            async with self._http().get(url) as resp:
+                if resp.status != 200:
+                    logger.warning(f"Audio download failed ({resp.status}): {url}")
+                    return False
+                if resp.content_type.startswith(("text/", "application/json")):
+                    logger.warning(f"Audio download failed ({resp.content_type} response): {url}")
+                    return False
+                if expected_size is None and not resp.headers.get("Content-Encoding"):
+                    expected_size = resp.content_length
+                f = await asyncio.to_thread(open, tmp, "wb")
+                size, head = 0, b""
+                async for chunk in resp.content.iter_chunked(_CHUNK):
+                    if len(head) < 4:
+                        head += chunk[:4]
+                    size += len(chunk)
+                    await asyncio.to_thread(f.write, chunk)
+            await asyncio.to_thread(f.close)
+            problem = _integrity_problem(head, size, expected_size, path.suffix)
+            if problem:
+                logger.warning(f"Audio download rejected ({problem}): {url}")
+                return False
+            await asyncio.to_thread(os.replace, tmp, path)
+            return True
+        except Exception as e:
+            logger.warning(f"Audio download failed: {e}")
+            return False
+        finally:
+            if f is not None and not f.closed:
+                await asyncio.to_thread(f.close)
+            await asyncio.to_thread(tmp.unlink, missing_ok=True)
+
+    async def _publish(self, key: ArtifactKey, path: Path) -> str:
+        """Upload to Storage and record the artifact. Returns its public URL,
+        or the local path if the upload failed."""
+        storage_path = f"audio/{key.stem.removeprefix('video_')}{path.suffix}"
+        try:
+            url = await storage_uploader.upload(
+                "audio", storage_path, path, AUDIO_CONTENT_TYPES.get(path.suffix, "application/octet-stream")
+            )
+            await db_async.upsert_audio_artifact(*key, storage_path, url, path.stat().st_size)
+            return url
+        except Exception as e:
+            logger.warning(f"[{key.video_id}] Storage upload failed for {path.name} (using local): {e}")
+            return str(path)
+
+    async def telegram_ids(self, key: ArtifactKey) -> tuple[Optional[str], Optional[str]]:
+        """(voice_file_id, photo_file_id) of an earlier delivery of this
+        artifact, from memory or the artifact row. Never raises."""
+        if key not in self._voice_ids:
+            try:
+                row = await db_async.get_audio_artifact(*key)
+            except Exception as e:
+                logger.warning(f"Artifact lookup failed: {e}")
+                row = None
+            if row and row.get("telegram_file_id"):
+                self._voice_ids[key] = row["telegram_file_id"]
+            if row and row.get("photo_file_id"):
+                self._photo_ids.setdefault(key.video_id, row["photo_file_id"])
+        return self._voice_ids.get(key), self._photo_ids.get(key.video_id)
+
+    async def remember_telegram_ids(
+        self, key: ArtifactKey, voice_file_id: Optional[str], photo_file_id: Optional[str]
+    ) -> None:
+        """Keep the file_ids of a delivery that uploaded the audio/thumbnail,
+        so every other chat is sent the same files by id."""
+        if (voice_file_id, photo_file_id) == (self._voice_ids.get(key), self._photo_ids.get(key.video_id)):
+            return
+        if voice_file_id:
+            self._voice_ids[key] = voice_file_id
+        if photo_file_id:
+            self._photo_ids[key.video_id] = photo_file_id
+        try:
+            await db_async.set_audio_artifact_telegram_ids(*key, voice_file_id, photo_file_id)
+        except Exception as e:
+            logger.warning(f"Could not store Telegram file_ids (kept in memory): {e}")
+
+    @asynccontextmanager
+    async def first_upload(self, key: ArtifactKey):
+        """Wrap a delivery of `key`. While no file_id is known, the first
+        delivery uploads and the concurrent ones wait for it (up to
+        _FIRST_UPLOAD_WAIT seconds), then send by its file_id."""
+        uploading = self._uploading.get(key)
+        if uploading is not None:
+            try:
+                await asyncio.wait_for(uploading.wait(), _FIRST_UPLOAD_WAIT)
+            except asyncio.TimeoutError:
+                pass
+            yield
+            return
+        if key in self._voice_ids:
+            yield
+            return
+        # Registered before the artifact row lookup, so concurrent deliveries
+        # wait for this one
+        uploading = self._uploading[key] = asyncio.Event()
+        try:
+            yield
+        finally:
+            uploading.set()
+            self._uploading.pop(key, None)
+
+    def forget_telegram_ids(self, key: ArtifactKey, voice: bool = True, photo: bool = True) -> None:
+        """Telegram refused a stored file_id — upload that file again next time."""
+        if voice:
+            self._voice_ids.pop(key, None)
+        if photo:
+            self._photo_ids.pop(key.video_id, None)
+
+    def snapshot(self) -> dict:
+        lookups = self.local_hits + self.remote_hits + self.synthesized
+        return {
+            "local_hits": self.local_hits,
+            "remote_hits": self.remote_hits,
+            "synthesized": self.synthesized,
+            "shared": self.shared,
+            "hit_rate": round((self.local_hits + self.remote_hits) / lookups * 100, 1) if lookups else 0.0,
+        }
+
+
+def _integrity_problem(head: bytes, size: int, expected_size: Optional[int], suffix: str) -> Optional[str]:
+    """Why a downloaded file can't be used, or None."""
+    if size == 0:
+        return "empty"
+    if expected_size and size != expected_size:
+        return f"{size} bytes, expected {expected_size}"
+    if suffix == ".ogg":
+        ok = head.startswith(b"OggS")
+    else:
+        # ID3 tag or an MPEG frame sync (11 set bits)
+        ok = head.startswith(b"ID3") or (len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0)
+    return None if ok else "not an audio file"
+
+
+# Global instance shared by the processor and the delivery loop
+audio_artifacts = AudioArtifactCache()
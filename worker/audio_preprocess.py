@@ -0,0 +1,225 @@
+"""
+Audio preprocessing for Whisper — cuts billed Groq minutes.
+
+Groq bills per audio second, so silence and slow speech are paid for nothing.
+Before a chunk is sent, this module can:
+- drop long silences (intros, music beds, pauses), keeping a short pad so
+  words are never clipped
+- speed the remaining audio up (atempo, pitch-preserving)
+
+Both steps run in ONE ffmpeg pass. Silences come from the caller's earlier
+loudness analysis when available, else from a silencedetect pass here. The
+returned TimeMap converts timestamps of the processed audio back to the
+original chunk timeline, so Whisper segment times stay meaningful.
+"""
+
+import bisect
+import logging
+import re
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# silencedetect thresholds: anything quieter than -35 dB for 0.8 s is a pause
+SILENCE_NOISE_DB = -35
+SILENCE_MIN_SECONDS = 0.8
+# Keep this much of each silence on both sides so word edges survive
+SILENCE_PAD_SECONDS = 0.2
+
+# atempo is pitch-preserving; above 2x Whisper accuracy drops sharply
+MAX_TEMPO = 2.0
+
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*(-?[\d.]+)")
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+_TIME_RE = re.compile(r"time=(\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+
+
+def _hms(match: re.Match) -> float:
+    h, m, s = match.groups()
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+def parse_silencedetect(stderr: str) -> tuple[list[tuple[float, float]], Optional[float]]:
+    """Parse ffmpeg silencedetect output.
+
+    Returns (silences, duration): silences as (start, end) pairs in seconds,
+    duration from the input header — or from the last progress line when the
+    container doesn't advertise one (piped/segmented Ogg). A trailing silence
+    that runs to the end of the input is closed at the duration.
+    """
+    duration = None
+    m = _DURATION_RE.search(stderr)
+    if m:
+        duration = _hms(m)
+    else:
+        times = list(_TIME_RE.finditer(stderr))
+        if times:
+            duration = _hms(times[-1])
+
+    silences: list[tuple[float, float]] = []
+    start = None
+    for line in stderr.splitlines():
+        m = _SILENCE_START_RE.search(line)
+        if m:
+            start = max(0.0, float(m.group(1)))
+            continue
+        m = _SILENCE_END_RE.search(line)
+        if m and start is not None:
+            silences.append((start, float(m.group(1))))
+            start = None
+    if start is not None and duration is not None and duration > start:
+        silences.append((start, duration))
+    return silences, duration
+
+
+def detect_silences(
+    audio_path: Path,
+    noise_db: int = SILENCE_NOISE_DB,
+    min_seconds: float = SILENCE_MIN_SECONDS,
+) -> tuple[list[tuple[float, float]], Optional[float]]:
+    """Run one silencedetect pass over a file. Returns (silences, duration)."""
+    proc = subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-i", str(audio_path),
+            "-af", f"silencedetect=noise={noise_db}dB:d={min_seconds}",
+            "-f", "null", "-",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_silencedetect(proc.stderr)
+
+
+class TimeMap:
+    """Maps timestamps of preprocessed audio back to the original timeline.
+
+    The processed audio is the concatenation of the kept (start, end) spans,
+    played back `tempo` times faster.
+    """
+
+    def __init__(self, spans: list[tuple[float, float]], tempo: float = 1.0):
+        self.spans = spans
+        self.tempo = tempo
+        # Cumulative kept seconds (at 1x) at the start of each span
+        self._offsets: list[float] = []
+        total = 0.0
+        for start, end in spans:
+            self._offsets.append(total)
+            total += end - start
+        self.kept_seconds = total
+
+    @classmethod
+    def identity(cls, duration: float) -> "TimeMap":
+        return cls([(0.0, duration)])
+
+    @property
+    def processed_seconds(self) -> float:
+        return self.kept_seconds / self.tempo
+
+    def to_original(self, t: float) -> float:
+        """Convert a processed-audio timestamp to original chunk time."""
+        if not self.spans:
+            return t
+        kept = max(0.0, t) * self.tempo
+        i = max(0, bisect.bisect_right(self._offsets, kept) - 1)
+        start, end = self.spans[i]
+        return min(end, start + (kept - self._offsets[i]))
+
+
+def speech_spans(
+    silences: list[tuple[float, float]],
+    duration: float,
+    pad: float = SILENCE_PAD_SECONDS,
+) -> list[tuple[float, float]]:
+    """Complement of the silences (each shrunk by `pad` on both sides)."""
+    spans: list[tuple[float, float]] = []
+    cursor = 0.0
+    for start, end in silences:
+        cut_start, cut_end = start + pad, end - pad
+        if cut_end <= cut_start:
+            continue  # too short to remove once padded
+        if cut_start > cursor:
+            spans.append((cursor, cut_start))
+        cursor = max(cursor, cut_end)
+    if cursor < duration:
+        spans.append((cursor, duration))
+    return spans
+
+
+def preprocess_for_whisper(
+    audio_path: Path,
+    output_path: Path,
+    encode_args: list[str],
+    tempo: float = 1.0,
+    trim_silence: bool = True,
+    silences: Optional[list[tuple[float, float]]] = None,
+    duration: Optional[float] = None,
+) -> tuple[Path, TimeMap]:
+    """Trim silences and/or speed up audio before it's sent to Whisper.
+
+    Args:
+        audio_path: Input chunk
+        output_path: Where to write the processed chunk
+        encode_args: ffmpeg output codec arguments (same format as the input chunk)
+        tempo: Playback speed factor, clamped to [1.0, MAX_TEMPO]
+        trim_silence: Remove silences longer than SILENCE_MIN_SECONDS
+        silences, duration: Result of an earlier silencedetect pass over this
+            exact audio — skips the analysis pass when given
+
+    Returns:
+        (path, time_map). When there is nothing to gain the original path is
+        returned with an identity map, so callers never pay for a no-op encode.
+    """
+    tempo = min(max(tempo, 1.0), MAX_TEMPO)
+    if silences is None or duration is None:
+        silences, duration = detect_silences(audio_path)
+    if duration is None:
+        logger.warning(f"Could not read duration of {audio_path.name} — skipping preprocessing")
+        return audio_path, TimeMap([])
+
+    spans = speech_spans(silences, duration) if trim_silence else [(0.0, duration)]
+    time_map = TimeMap(spans, tempo)
+    if tempo == 1.0 and time_map.kept_seconds >= duration - 1.0:
+        return audio_path, TimeMap.identity(duration)
+    if not spans:
+        # Pure silence: keep one second so Whisper returns an empty transcript
+        spans = [(0.0, min(1.0, duration))]
+        time_map = TimeMap(spans, tempo)
+
+    select = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in spans)
+    filters = f"aselect='{select}',asetpts=N/SR/TB"
+    if tempo != 1.0:
+        filters += f",atempo={tempo:.3f}"
+
+    # Long videos produce thousands of spans — pass the graph via a script
+    # file instead of argv so it never hits the command-line length limit.
+    with tempfile.NamedTemporaryFile("w", suffix=".ffgraph", delete=False) as script:
+        script.write(filters)
+        script_path = Path(script.name)
+    try:
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+                "-i", str(audio_path),
+                "-filter_script:a", str(script_path),
+                *encode_args,
+                str(output_path),
+            ],
+            capture_output=True,
+            check=True,
+        )
+    finally:
+        script_path.unlink(missing_ok=True)
+
+    logger.info(
+        f"Preprocessed {audio_path.name}: {duration:.0f}s → "
+        f"{time_map.processed_seconds:.0f}s "
+        f"(-{(1 - time_map.processed_seconds / duration) * 100:.0f}%, "
+        f"{len(spans)} speech spans, tempo {tempo:g}x)"
+    )
+    return output_path, time_map
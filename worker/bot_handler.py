@@ -19,7 +19,15 @@ from telegram.ext import (
 
 from config import TELEGRAM_BOT_TOKEN, ADMIN_TELEGRAM_CHAT_ID, APP_URL
 import db
-from monitoring import stats, get_system_info, get_log_tail, format_log, _md_to_html
+import db_async
+from gemini_api import gemini_health
+from monitoring import stats, get_system_info, get_log_tail, format_log, loop_lag, _md_to_html
+from rate_limiter import rate_limiter
+from audio_artifacts import audio_artifacts
+from delivery_scheduler import delivery_scheduler
+from status_buffer import status_buffer
+from storage_uploader import storage_uploader
+from telegram_deliverer import flood_control
 
 logger = logging.getLogger(__name__)
 
@@ -131,17 +139,17 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         token = context.args[0]
 
         # Look up the token in profiles and link the chat_id
-        sb = db.get_client()
+        sb = await db_async.get_client()
 
         # Step 1: Unlink any other profile already connected to this chat_id
         # (a Telegram account can only be linked to ONE BriefTube account at a time)
-        sb.table("profiles").update({
+        await sb.table("profiles").update({
             "telegram_chat_id": None,
             "telegram_connected": False,
         }).eq("telegram_chat_id", chat_id).neq("telegram_connect_token", token).execute()
 
         # Step 2: Link this profile
-        res = (
+        res = await (
             sb.table("profiles")
             .update({
                 "telegram_chat_id": chat_id,
@@ -197,9 +205,9 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /status command."""
     chat_id = str(update.effective_chat.id)
-    sb = db.get_client()
+    sb = await db_async.get_client()
 
-    res = (
+    res = await (
         sb.table("profiles")
         .select("email, subscription_status")
         .eq("telegram_chat_id", chat_id)
@@ -289,6 +297,27 @@ async def monitor_stats_command(update: Update, context: ContextTypes.DEFAULT_TY
         f"• Failed: {summary['videos_failed']}\n"
         f"• Success rate: {_calc_success_rate(summary)}%\n"
         f"• Avg time: {summary['avg_processing_time']}s\n\n"
+        f"<b>Summary Cache</b>\n"
+        f"• Hits: {summary['summary_cache_hits']} / "
+        f"{summary['summary_cache_hits'] + summary['summary_cache_misses']} "
+        f"({summary['summary_cache_hit_rate']}%)\n"
+        f"• Tokens saved: {summary['summary_tokens_saved']}\n\n"
+        f"<b>Audio Cache</b>\n"
+        f"{_format_audio_cache(audio_artifacts.snapshot(), audio_artifacts.local.snapshot())}\n\n"
+        f"<b>Storage Uploads</b>\n"
+        f"{_format_storage_uploads(storage_uploader.snapshot())}\n\n"
+        f"<b>Event Loop Lag</b>\n"
+        f"{_format_loop_lag(loop_lag.snapshot())}\n\n"
+        f"<b>Supabase Connections</b>\n"
+        f"{_format_db_pool('loop', db_async.pool_stats.snapshot())}\n"
+        f"{_format_db_pool('threads', db.pool_stats.snapshot())}\n\n"
+        f"<b>Gemini Models</b>\n"
+        f"{_format_model_health(gemini_health.snapshot())}\n\n"
+        f"<b>Delivery</b>\n"
+        f"{_format_delivery(delivery_scheduler.snapshot(), flood_control.snapshot())}\n"
+        f"{_format_status_writes(status_buffer.snapshot())}\n\n"
+        f"<b>Rate Limit Waits</b>\n"
+        f"{_format_rate_limit_waits(rate_limiter.waited_seconds())}\n\n"
         f"<b>Error Breakdown</b>\n"
         f"{error_breakdown}\n\n"
         f"<b>Recent Errors</b>\n"
@@ -325,6 +354,93 @@ async def monitor_logs_command(update: Update, context: ContextTypes.DEFAULT_TYP
     )
 
 
+def _format_model_health(models: dict) -> str:
+    """One line per Gemini model: circuit state, success rate, latency, errors."""
+    icons = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}
+    lines = []
+    for name, h in models.items():
+        line = f"{icons.get(h['state'], '⚪')} {name}"
+        if h["success_rate"] is not None:
+            line += f" — {h['success_rate']}% ok"
+        if h["latency_s"] is not None:
+            line += f", {h['latency_s']}s"
+        if h["errors"]:
+            line += ", " + ", ".join(f"{k}: {v}" for k, v in h["errors"].items())
+        if h["state"] == "open":
+            line += f" (retry in {h['retry_in_s']}s)"
+        elif h["demoted"]:
+            line += " (demoted)"
+        lines.append(line)
+    return "\n".join(lines) or "No calls yet"
+
+
+def _format_audio_cache(snapshot: dict, local: dict) -> str:
+    """Audio artifact lookups (local / Storage hits vs syntheses) and the
+    local disk cache."""
+    return (
+        f"• Hit rate: {snapshot['hit_rate']}% "
+        f"(local {snapshot['local_hits']}, storage {snapshot['remote_hits']})\n"
+        f"• Synthesized: {snapshot['synthesized']} (shared: {snapshot['shared']})\n"
+        f"• Disk: {local['mb']} / {local['max_mb']} MB, {local['files']} files, "
+        f"{local['pinned']} pinned, {local['evictions']} evicted "
+        f"(hit rate {local['hit_rate']}%)"
+    )
+
+
+def _format_storage_uploads(snapshot: dict) -> str:
+    """Storage upload stage: volume, throughput, retries."""
+    return (
+        f"• Uploaded: {snapshot['uploads']} ({snapshot['mb']} MB, {snapshot['mb_per_s']} MB/s)\n"
+        f"• Failed: {snapshot['failed']}, retried: {snapshot['retried']}, "
+        f"resumed: {snapshot['resumed']}, waiting: {snapshot['waiting']}"
+    )
+
+
+def _format_loop_lag(snapshot: dict) -> str:
+    """How late the event loop runs tasks (blocking calls on the loop)."""
+    return (
+        f"• p50 {snapshot['p50_ms']} ms, p99 {snapshot['p99_ms']} ms, "
+        f"max {snapshot['max_ms']} ms (5 min)\n"
+        f"• Max since start: {snapshot['max_ever_ms']} ms"
+    )
+
+
+def _format_db_pool(name: str, snapshot: dict) -> str:
+    """One Supabase client's pool: connections now, churn, stale resends."""
+    return (
+        f"• {name}: {snapshot['in_use']} in use, {snapshot['idle']} idle / {snapshot['size']}; "
+        f"{snapshot['opened']} opened ({snapshot['opened_per_min']}/min) for {snapshot['requests']} requests; "
+        f"resent {snapshot['retried']}, failed {snapshot['failed']}, resets {snapshot['resets']}"
+    )
+
+
+def _format_delivery(scheduler: dict, flood: dict) -> str:
+    """Delivery scheduler queue and Telegram flood-control pauses."""
+    paused = "all chats" if flood["global_paused"] else f"{flood['paused_chats']} chats"
+    return (
+        f"• Queued: {scheduler['queued']} in {scheduler['chats']} chats "
+        f"({scheduler['sending']} sending)\n"
+        f"• Done: {scheduler['completed']} ({scheduler['per_minute']}/min avg)\n"
+        f"• RetryAfter: {flood['chat_pauses']} chat, {flood['global_pauses']} global, "
+        f"{flood['paused_seconds']}s waited (paused now: {paused})"
+    )
+
+
+def _format_status_writes(snapshot: dict) -> str:
+    """Write-behind delivery outcomes: buffered now, batching achieved."""
+    return (
+        f"• Outcomes buffered: {snapshot['buffered']}, written: {snapshot['written']} "
+        f"in {snapshot['flushes']} flushes ({snapshot['per_flush']}/flush), "
+        f"failed flushes: {snapshot['failed_flushes']}, replayed: {snapshot['replayed']}"
+    )
+
+
+def _format_rate_limit_waits(waited: dict) -> str:
+    """Seconds spent waiting on each rate limit bucket since startup."""
+    lines = [f"• {name}: {seconds}s" for name, seconds in sorted(waited.items()) if seconds]
+    return "\n".join(lines) or "None"
+
+
 def _calc_success_rate(summary: dict) -> int:
     """Calculate success rate percentage."""
     total = summary['videos_processed'] + summary['videos_failed']
@@ -335,10 +451,10 @@ def _calc_success_rate(summary: dict) -> int:
 
 # ── Helper: get profile from chat_id ──────────────────────────
 
-def _get_profile_by_chat_id(chat_id: str) -> dict | None:
+async def _get_profile_by_chat_id(chat_id: str) -> dict | None:
     """Look up a connected profile by telegram chat_id."""
-    sb = db.get_client()
-    res = (
+    sb = await db_async.get_client()
+    res = await (
         sb.table("profiles")
         .select("id, email, subscription_status, max_channels")
         .eq("telegram_chat_id", chat_id)
@@ -443,7 +559,7 @@ async def handle_video_request(update: Update, profile: dict, video_id: str) ->
 
     # Check monthly limit for free users
     if not is_pro:
-        used = db.count_on_demand_this_month(user_id)
+        used = await db_async.count_on_demand_this_month(user_id)
         if used >= ON_DEMAND_MONTHLY_LIMIT:
             await update.message.reply_text(
                 f"You've reached your monthly limit of {ON_DEMAND_MONTHLY_LIMIT} on-demand summaries.\n\n"
@@ -451,17 +567,17 @@ async def handle_video_request(update: Update, profile: dict, video_id: str) ->
             )
             return
 
-    sb = db.get_client()
+    sb = await db_async.get_client()
     video_url = f"https://www.youtube.com/watch?v={video_id}"
 
     # Check if video already exists
-    existing = sb.table("processed_videos").select("status, channel_id").eq("video_id", video_id).execute()
+    existing = await sb.table("processed_videos").select("status, channel_id").eq("video_id", video_id).execute()
 
     if existing.data:
         video_row = existing.data[0]
         if video_row["status"] == "completed":
             # Already done — just create a delivery
-            sb.table("deliveries").upsert({
+            await sb.table("deliveries").upsert({
                 "user_id": user_id,
                 "video_id": video_id,
                 "status": "pending",
@@ -473,7 +589,7 @@ async def handle_video_request(update: Update, profile: dict, video_id: str) ->
             return
         elif video_row["status"] in ("pending", "processing"):
             # In progress — create delivery, it'll be sent when done
-            sb.table("deliveries").upsert({
+            await sb.table("deliveries").upsert({
                 "user_id": user_id,
                 "video_id": video_id,
                 "status": "pending",
@@ -498,9 +614,11 @@ async def handle_video_request(update: Update, profile: dict, video_id: str) ->
 
     # Insert into processed_videos + processing_queue + delivery
     channel_id = ""  # Unknown for on-demand, not tied to a channel subscription
-    db.insert_new_video(video_id, channel_id, video_title, video_url)
-    db.enqueue_video(video_id, video_url, video_title, channel_id)
-    sb.table("deliveries").upsert({
+    await db_async.insert_new_video(video_id, channel_id, video_title, video_url)
+    await db_async.enqueue_video(
+        video_id, video_url, video_title, channel_id, priority=db_async.PRIORITY_ON_DEMAND
+    )
+    await sb.table("deliveries").upsert({
         "user_id": user_id,
         "video_id": video_id,
         "status": "pending",
@@ -508,7 +626,7 @@ async def handle_video_request(update: Update, profile: dict, video_id: str) ->
     }, on_conflict="user_id,video_id").execute()
 
     if not is_pro:
-        used = db.count_on_demand_this_month(user_id)
+        used = await db_async.count_on_demand_this_month(user_id)
         remaining = ON_DEMAND_MONTHLY_LIMIT - used
         await update.message.reply_text(
             f"Processing: {video_title}\n\n"
@@ -541,8 +659,8 @@ async def handle_channel_subscribe(update: Update, profile: dict, text: str) ->
 
     # Check subscription limit for free users
     if not is_pro:
-        sb = db.get_client()
-        count_res = (
+        sb = await db_async.get_client()
+        count_res = await (
             sb.table("subscriptions")
             .select("id", count="exact")
             .eq("user_id", user_id)
@@ -559,9 +677,9 @@ async def handle_channel_subscribe(update: Update, profile: dict, text: str) ->
             return
 
     # Insert subscription
-    sb = db.get_client()
+    sb = await db_async.get_client()
     try:
-        sb.table("subscriptions").insert({
+        await sb.table("subscriptions").insert({
             "user_id": user_id,
             "channel_id": channel_id,
             "channel_name": channel_name,
@@ -578,7 +696,7 @@ async def handle_channel_subscribe(update: Update, profile: dict, text: str) ->
 
     # Mark existing videos as skipped (non-blocking)
     try:
-        db.mark_existing_videos_as_skipped(channel_id)
+        await db_async.mark_existing_videos_as_skipped(channel_id)
     except Exception:
         pass
 
@@ -600,7 +718,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     text = update.message.text.strip()
 
     # Check if user is connected
-    profile = _get_profile_by_chat_id(chat_id)
+    profile = await _get_profile_by_chat_id(chat_id)
     if not profile:
         await update.message.reply_text(
             "Your Telegram is not connected to a BriefTube account.\n\n"
@@ -1,15 +1,17 @@
 """Supabase database client for the worker."""
 
 import logging
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 import httpx
 from supabase import create_client, Client, ClientOptions
 
 from config import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from supabase_pool import PoolStats, RetryingTransport
 
 logger = logging.getLogger(__name__)
 
 _client: Client = None
+pool_stats = PoolStats()
 
 
 def _make_client() -> Client:
@@ -17,9 +19,10 @@ def _make_client() -> Client:
 
     Supabase/Cloudflare sends HTTP/2 GOAWAY frames aggressively, which breaks
     persistent connections and causes 'ConnectionTerminated' / 'Server disconnected'
-    errors. Using HTTP/1.1 avoids this entirely.
+    errors. Using HTTP/1.1 avoids this entirely. The pool is sized and kept
+    healthy by supabase_pool.py (stale connections resent transparently).
     """
-    http_client = httpx.Client(http2=False, timeout=30.0)
+    http_client = httpx.Client(transport=RetryingTransport(pool_stats), timeout=30.0)
     options = ClientOptions(httpx_client=http_client)
     return create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, options=options)
 
@@ -34,11 +37,13 @@ def get_client() -> Client:
 def reset_client() -> None:
     """Force-recreate the Supabase client on next get_client() call.
 
-    Call this after a connection error so the stale HTTP connection is
-    dropped and a fresh one is established.
+    A last resort: a connection the server closed is already discarded and
+    the request resent by the pool (supabase_pool.py), so this is only for
+    a client that keeps failing.
     """
     global _client
-    _client = None
+    _client = None  # not closed: other threads may still be using it
+    pool_stats.resets += 1
     logger.info("Supabase client reset — will reconnect on next query")
 
 
@@ -87,32 +92,15 @@ def get_all_known_video_ids() -> set[str]:
     return known
 
 
-def mark_video_completed(video_id: str, summary: str, audio_url: str, metadata: dict = None):
-    sb = get_client()
-    update_data = {
-        "summary": summary,
-        "audio_url": audio_url,
-        "status": "completed",
-        "processed_at": datetime.now(timezone.utc).isoformat(),
-    }
-    if metadata:
-        update_data["metadata"] = metadata
-    sb.table("processed_videos").update(update_data).eq("video_id", video_id).execute()
-
+def mark_video_failed(video_id: str) -> dict | None:
+    """Count a failed attempt: back to pending, or failed at the third.
 
-def mark_video_failed(video_id: str):
+    One atomic RPC (fail_video) — concurrent workers never lose an increment.
+    Returns {status, failure_count}, or None if the row is gone.
+    """
     sb = get_client()
-    # Increment failure_count — use execute() (not .single()) to avoid throwing
-    # if the row was deleted between job pick and failure handling.
-    res = sb.table("processed_videos").select("failure_count").eq("video_id", video_id).execute()
-    if not res.data:
-        return  # Row gone — nothing to update
-    count = (res.data[0].get("failure_count") or 0) + 1
-    status = "failed" if count >= 3 else "pending"
-    sb.table("processed_videos").update({
-        "failure_count": count,
-        "status": status,
-    }).eq("video_id", video_id).execute()
+    res = sb.rpc("fail_video", {"p_video_id": video_id}).execute()
+    return res.data[0] if res.data else None
 
 
 def insert_new_video(video_id: str, channel_id: str, video_title: str, video_url: str):
@@ -132,9 +120,165 @@ def insert_new_video(video_id: str, channel_id: str, video_title: str, video_url
     }, on_conflict="video_id", ignore_duplicates=True).execute()
 
 
+# ── Summary Variants ───────────────────────────────────────────
+
+def get_delivery_languages(video_id: str) -> dict[str, list[str | None]]:
+    """Summary languages a video's pending deliveries need.
+
+    Returns {language: [tts_voice, ...]} from the recipients' profiles — the
+    distinct voices per language, most common first (onboarding saves the
+    language and a matching voice together).
+    """
+    sb = get_client()
+    res = (
+        sb.table("deliveries")
+        .select("user_id")
+        .eq("video_id", video_id)
+        .eq("status", "pending")
+        .execute()
+    )
+    user_ids = list({d["user_id"] for d in (res.data or [])})
+    counts: dict[str, dict[str | None, int]] = {}
+    for i in range(0, len(user_ids), 100):
+        profiles = (
+            sb.table("profiles")
+            .select("preferred_language, tts_voice")
+            .in_("id", user_ids[i : i + 100])
+            .execute()
+        )
+        _count_voices(profiles.data or [], counts)
+    return _rank_voices(counts)
+
+
+def _count_voices(profiles: list[dict], counts: dict[str, dict[str | None, int]]) -> None:
+    """Add profiles' (language, voice) pairs to `counts` (shared with db_async)."""
+    for p in profiles:
+        lang = (p.get("preferred_language") or "").lower()
+        if lang:
+            voices = counts.setdefault(lang, {})
+            voice = p.get("tts_voice") or None
+            voices[voice] = voices.get(voice, 0) + 1
+
+
+def _rank_voices(counts: dict[str, dict[str | None, int]]) -> dict[str, list[str | None]]:
+    """Distinct voices per language, most common first, unknown voice last."""
+    return {
+        lang: sorted(voices, key=lambda v: (v is None, -voices[v]))
+        for lang, voices in counts.items()
+    }
+
+
+def upsert_video_summary(
+    video_id: str, language: str, summary: str, audio_url: str, tts_voice: str | None
+):
+    sb = get_client()
+    sb.table("video_summaries").upsert({
+        "video_id": video_id,
+        "language": language,
+        "summary": summary,
+        "audio_url": audio_url,
+        "tts_voice": tts_voice,
+    }, on_conflict="video_id,language").execute()
+
+
+def get_video_summaries(video_ids: list[str]) -> dict[tuple[str, str], dict]:
+    """All summary variants of these videos, keyed by (video_id, language)."""
+    sb = get_client()
+    variants: dict[tuple[str, str], dict] = {}
+    for i in range(0, len(video_ids), 100):
+        res = (
+            sb.table("video_summaries")
+            .select("video_id, language, summary, audio_url, tts_voice")
+            .in_("video_id", video_ids[i : i + 100])
+            .execute()
+        )
+        for row in res.data or []:
+            variants[(row["video_id"], row["language"])] = row
+    return variants
+
+
+def get_audio_artifact(
+    video_id: str, language: str, voice: str, audio_format: str
+) -> dict | None:
+    """Stored audio of one (video, language, voice, format), if synthesized."""
+    sb = get_client()
+    res = (
+        sb.table("audio_artifacts")
+        .select("storage_path, audio_url, size_bytes, telegram_file_id, photo_file_id")
+        .eq("video_id", video_id)
+        .eq("language", language)
+        .eq("voice", voice)
+        .eq("format", audio_format)
+        .limit(1)
+        .execute()
+    )
+    return res.data[0] if res.data else None
+
+
+def upsert_audio_artifact(
+    video_id: str,
+    language: str,
+    voice: str,
+    audio_format: str,
+    storage_path: str,
+    audio_url: str,
+    size_bytes: int,
+):
+    sb = get_client()
+    sb.table("audio_artifacts").upsert({
+        "video_id": video_id,
+        "language": language,
+        "voice": voice,
+        "format": audio_format,
+        "storage_path": storage_path,
+        "audio_url": audio_url,
+        "size_bytes": size_bytes,
+    }, on_conflict="video_id,language,voice,format").execute()
+
+
+def set_audio_artifact_telegram_ids(
+    video_id: str,
+    language: str,
+    voice: str,
+    audio_format: str,
+    telegram_file_id: str | None,
+    photo_file_id: str | None,
+):
+    """Record the Telegram file_ids an artifact was delivered with (no-op if
+    the artifact has no row, e.g. its upload failed)."""
+    update = {k: v for k, v in {
+        "telegram_file_id": telegram_file_id,
+        "photo_file_id": photo_file_id,
+    }.items() if v}
+    if not update:
+        return
+    sb = get_client()
+    (
+        sb.table("audio_artifacts")
+        .update(update)
+        .eq("video_id", video_id)
+        .eq("language", language)
+        .eq("voice", voice)
+        .eq("format", audio_format)
+        .execute()
+    )
+
+
 # ── Processing Queue ───────────────────────────────────────────
 
-def enqueue_video(video_id: str, youtube_url: str, video_title: str, channel_id: str):
+# processing_queue.priority — higher is picked first and may spend the last
+# slice of the Groq daily quota (see groq_quota.py)
+PRIORITY_RSS = 0
+PRIORITY_ON_DEMAND = 10
+
+
+def enqueue_video(
+    video_id: str,
+    youtube_url: str,
+    video_title: str,
+    channel_id: str,
+    priority: int = PRIORITY_RSS,
+):
     sb = get_client()
     sb.table("processing_queue").upsert({
         "video_id": video_id,
@@ -142,14 +286,17 @@ def enqueue_video(video_id: str, youtube_url: str, video_title: str, channel_id:
         "video_title": video_title,
         "channel_id": channel_id,
         "status": "queued",
+        "priority": priority,
     }, on_conflict="video_id", ignore_duplicates=True).execute()
 
 
 def pick_next_job() -> dict | None:
-    """Pick the next queued job (oldest first) atomically. Returns dict or None.
+    """Pick the next queued job (highest priority, then oldest) atomically.
+    Returns dict or None.
 
     Uses a PostgreSQL function with FOR UPDATE SKIP LOCKED so concurrent
-    workers or rapid restarts never pick the same job twice.
+    workers or rapid restarts never pick the same job twice. Jobs deferred
+    with defer_job() are skipped until their not_before time.
     """
     sb = get_client()
     res = sb.rpc("pick_next_processing_job").execute()
@@ -158,29 +305,83 @@ def pick_next_job() -> dict | None:
     return res.data[0]
 
 
-def complete_job(job_id: str):
+def complete_video_job(
+    job_id: str,
+    video_id: str,
+    summary: str,
+    audio_url: str,
+    metadata: dict = None,
+    variants: list[dict] = None,
+) -> dict | None:
+    """Mark a processed video done in one transaction (complete_video_job RPC):
+    upsert its summary variants ({language, summary, audio_url, tts_voice}),
+    complete the video row and its job. Returns {video_status, job_status,
+    variants}."""
     sb = get_client()
-    sb.table("processing_queue").update({"status": "completed"}).eq("id", job_id).execute()
-
-
-def fail_job(job_id: str):
+    res = sb.rpc("complete_video_job", {
+        "p_job_id": job_id,
+        "p_video_id": video_id,
+        "p_summary": summary,
+        "p_audio_url": audio_url,
+        "p_metadata": metadata or None,
+        "p_variants": variants or [],
+    }).execute()
+    return res.data[0] if res.data else None
+
+
+def defer_job(job_id: str, until: datetime):
+    """Put a job back in the queue, not to be picked before `until`.
+
+    Unlike fail_job() this doesn't count as an attempt (attempts is left
+    as is) — used when the job is fine but has to wait for a budget (e.g.
+    the Groq quota reset). started_at is cleared, since the job isn't
+    running any more; the next pick sets it again.
+    """
     sb = get_client()
-    # Use execute() without .single() — avoids throwing if the job was deleted.
-    res = sb.table("processing_queue").select("attempts, video_id").eq("id", job_id).execute()
-    if not res.data:
-        return  # Job already gone — nothing to update
-    attempts = (res.data[0].get("attempts") or 0) + 1
-    status = "failed" if attempts >= 3 else "queued"
     sb.table("processing_queue").update({
-        "status": status,
-        "attempts": attempts,
+        "status": "queued",
+        "not_before": until.isoformat(),
+        "started_at": None,
     }).eq("id", job_id).execute()
-    # Keep processed_videos in sync: when the job permanently fails, mark the
-    # video as failed too so it doesn't stay stuck in "pending" forever.
-    if status == "failed":
-        video_id = res.data[0].get("video_id")
-        if video_id:
-            mark_video_failed(video_id)
+
+
+def fail_job(job_id: str, fail_video: bool = False) -> dict | None:
+    """Count a failed attempt: requeued, or failed at the third.
+
+    One atomic RPC (fail_processing_job). The video's failure is counted in
+    the same call when `fail_video` is set, and always when the job
+    permanently fails — so processed_videos doesn't stay stuck in "pending".
+    Returns {job_status, attempts, video_status, failure_count}, or None if
+    the job is gone.
+    """
+    sb = get_client()
+    res = sb.rpc("fail_processing_job", {"p_job_id": job_id, "p_fail_video": fail_video}).execute()
+    return res.data[0] if res.data else None
+
+
+# ── Groq Usage Ledger ──────────────────────────────────────────
+
+def get_groq_usage(day: date) -> dict | None:
+    """Today's (or any UTC day's) Groq ledger row: audio_seconds, cost_usd, requests."""
+    sb = get_client()
+    res = (
+        sb.table("groq_usage_ledger")
+        .select("audio_seconds, cost_usd, requests")
+        .eq("day", day.isoformat())
+        .execute()
+    )
+    return res.data[0] if res.data else None
+
+
+def record_groq_usage(day: date, audio_seconds: float, cost_usd: float) -> dict | None:
+    """Atomically add billed Groq usage to the ledger. Returns the updated row."""
+    sb = get_client()
+    res = sb.rpc("record_groq_usage", {
+        "p_day": day.isoformat(),
+        "p_seconds": audio_seconds,
+        "p_cost": cost_usd,
+    }).execute()
+    return res.data[0] if res.data else None
 
 
 # ── Deliveries ─────────────────────────────────────────────────
@@ -268,12 +469,28 @@ def get_pending_deliveries(limit: int = 20) -> list[dict]:
     user_ids = list({d["user_id"] for d in raw_deliveries})
     profiles_res = (
         sb.table("profiles")
-        .select("id, telegram_chat_id, tts_voice, telegram_connected")
+        .select("id, telegram_chat_id, tts_voice, telegram_connected, preferred_language")
         .in_("id", user_ids)
         .execute()
     )
     profile_map = {p["id"]: p for p in (profiles_res.data or [])}
 
+    # 4. Per-language summary variants — each user gets their language when
+    # it was produced, else the video's primary summary
+    variants = get_video_summaries(list(video_map))
+
+    return _delivery_rows(raw_deliveries, video_map, profile_map, variants, limit)
+
+
+def _delivery_rows(
+    raw_deliveries: list[dict],
+    video_map: dict[str, dict],
+    profile_map: dict[str, dict],
+    variants: dict[tuple[str, str], dict],
+    limit: int,
+) -> list[dict]:
+    """Join pending deliveries with their video, profile and summary variant
+    (shared with db_async)."""
     results = []
     for d in raw_deliveries:
         v = video_map.get(d["video_id"])
@@ -282,6 +499,8 @@ def get_pending_deliveries(limit: int = 20) -> list[dict]:
         profile = profile_map.get(d["user_id"])
         if not profile or not profile.get("telegram_connected"):
             continue
+        language = (profile.get("preferred_language") or "").lower()
+        variant = variants.get((v["video_id"], language))
         results.append({
             "delivery_id": d["id"],
             "chat_id": profile["telegram_chat_id"],
@@ -289,8 +508,11 @@ def get_pending_deliveries(limit: int = 20) -> list[dict]:
             "video_id": v["video_id"],
             "video_title": v["video_title"],
             "channel_id": v["channel_id"],
-            "summary": v["summary"],
-            "audio_url": v["audio_url"],
+            "summary": variant["summary"] if variant else v["summary"],
+            "audio_url": variant["audio_url"] if variant else v["audio_url"],
+            # Voice audio_url was synthesized with (None = unknown / default)
+            "audio_voice": variant.get("tts_voice") if variant else None,
+            "summary_language": language if variant else None,
         })
         if len(results) >= limit:
             break
@@ -361,6 +583,17 @@ def mark_delivery_failed(delivery_id: str):
     sb.table("deliveries").update({"status": "failed"}).eq("id", delivery_id).execute()
 
 
+def mark_deliveries(delivery_ids: list[str], status: str, at: str | None = None):
+    """Set the outcome of many deliveries at once — one UPDATE per 100 ids
+    (status_buffer.py). `at` is the sent_at of sent deliveries."""
+    sb = get_client()
+    values = {"status": status}
+    if status == "sent":
+        values["sent_at"] = at or datetime.now(timezone.utc).isoformat()
+    for i in range(0, len(delivery_ids), 100):
+        sb.table("deliveries").update(values).in_("id", delivery_ids[i : i + 100]).execute()
+
+
 def count_on_demand_this_month(user_id: str) -> int:
     """Count on-demand deliveries for a user in the current calendar month."""
     sb = get_client()
@@ -0,0 +1,534 @@
+"""Async Supabase database client for the worker's event loop.
+
+Same functions as db.py, as coroutines on an httpx.AsyncClient: code running
+on the event loop (main.py loops, bot handlers, the audio artifact cache)
+awaits them instead of blocking every other coroutine on a network round
+trip. db.py stays the client for code that runs in worker threads (RSS scan,
+transcription, rate limiter RPCs).
+"""
+
+import asyncio
+import logging
+from datetime import date, datetime, timezone
+
+import httpx
+from supabase import AsyncClient, AsyncClientOptions, acreate_client
+
+from config import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from db import PRIORITY_ON_DEMAND, PRIORITY_RSS, _count_voices, _delivery_rows, _rank_voices  # noqa: F401
+from supabase_pool import AsyncRetryingTransport, PoolStats
+
+logger = logging.getLogger(__name__)
+
+_client: AsyncClient | None = None
+_http: httpx.AsyncClient | None = None
+_client_lock = asyncio.Lock()
+_closing: set[asyncio.Task] = set()
+pool_stats = PoolStats()
+
+
+async def _make_client() -> AsyncClient:
+    """Create an async Supabase client with HTTP/2 disabled (see db._make_client)."""
+    global _http
+    _http = httpx.AsyncClient(transport=AsyncRetryingTransport(pool_stats), timeout=30.0)
+    options = AsyncClientOptions(httpx_client=_http)
+    return await acreate_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, options=options)
+
+
+async def get_client() -> AsyncClient:
+    """Return the shared async client — creates it on first call."""
+    global _client
+    if _client is None:
+        async with _client_lock:
+            if _client is None:
+                _client = await _make_client()
+    return _client
+
+
+def reset_client() -> None:
+    """Force-recreate the client on next get_client() call — a last resort,
+    see db.reset_client. The old connections are closed in the background."""
+    global _client, _http
+    old, _client, _http = _http, None, None
+    if old is not None:
+        try:
+            task = asyncio.get_running_loop().create_task(old.aclose())
+        except RuntimeError:
+            pass  # no running loop — nothing to close it on
+        else:
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
+    pool_stats.resets += 1
+    logger.info("Supabase async client reset — will reconnect on next query")
+
+
+async def close() -> None:
+    """Close the connection pool (shutdown)."""
+    global _client, _http
+    if _http is not None:
+        await _http.aclose()
+    _client, _http = None, None
+
+
+# ── Subscriptions ──────────────────────────────────────────────
+
+async def get_all_channel_ids() -> list[str]:
+    """Get all distinct channel IDs that at least one user is subscribed to."""
+    sb = await get_client()
+    res = await sb.table("subscriptions").select("channel_id").eq("active", True).execute()
+    return list({row["channel_id"] for row in res.data})
+
+
+# ── Processed Videos ───────────────────────────────────────────
+
+async def is_video_processed(video_id: str) -> bool:
+    sb = await get_client()
+    res = await sb.table("processed_videos").select("id").eq("video_id", video_id).execute()
+    return len(res.data) > 0
+
+
+async def get_all_known_video_ids() -> set[str]:
+    """Return the set of ALL video_ids already in processed_videos (paginated)."""
+    sb = await get_client()
+    known: set[str] = set()
+    offset = 0
+    while True:
+        res = await (
+            sb.table("processed_videos")
+            .select("video_id")
+            .range(offset, offset + 999)
+            .execute()
+        )
+        if not res.data:
+            break
+        for row in res.data:
+            known.add(row["video_id"])
+        if len(res.data) < 1000:
+            break
+        offset += 1000
+    return known
+
+
+async def mark_video_failed(video_id: str) -> dict | None:
+    """Count a failed attempt atomically (see db.mark_video_failed)."""
+    sb = await get_client()
+    res = await sb.rpc("fail_video", {"p_video_id": video_id}).execute()
+    return res.data[0] if res.data else None
+
+
+async def insert_new_video(video_id: str, channel_id: str, video_title: str, video_url: str):
+    """Insert a new video into processed_videos (status=pending), never
+    overwriting an existing row."""
+    sb = await get_client()
+    await sb.table("processed_videos").upsert({
+        "video_id": video_id,
+        "channel_id": channel_id,
+        "video_title": video_title,
+        "video_url": video_url,
+        "status": "pending",
+    }, on_conflict="video_id", ignore_duplicates=True).execute()
+
+
+# ── Summary Variants ───────────────────────────────────────────
+
+async def get_delivery_languages(video_id: str) -> dict[str, list[str | None]]:
+    """Summary languages a video's pending deliveries need: {language: [tts_voice, ...]}."""
+    sb = await get_client()
+    res = await (
+        sb.table("deliveries")
+        .select("user_id")
+        .eq("video_id", video_id)
+        .eq("status", "pending")
+        .execute()
+    )
+    user_ids = list({d["user_id"] for d in (res.data or [])})
+    counts: dict[str, dict[str | None, int]] = {}
+    for i in range(0, len(user_ids), 100):
+        profiles = await (
+            sb.table("profiles")
+            .select("preferred_language, tts_voice")
+            .in_("id", user_ids[i : i + 100])
+            .execute()
+        )
+        _count_voices(profiles.data or [], counts)
+    return _rank_voices(counts)
+
+
+async def upsert_video_summary(
+    video_id: str, language: str, summary: str, audio_url: str, tts_voice: str | None
+):
+    sb = await get_client()
+    await sb.table("video_summaries").upsert({
+        "video_id": video_id,
+        "language": language,
+        "summary": summary,
+        "audio_url": audio_url,
+        "tts_voice": tts_voice,
+    }, on_conflict="video_id,language").execute()
+
+
+async def get_video_summaries(video_ids: list[str]) -> dict[tuple[str, str], dict]:
+    """All summary variants of these videos, keyed by (video_id, language)."""
+    sb = await get_client()
+    variants: dict[tuple[str, str], dict] = {}
+    for i in range(0, len(video_ids), 100):
+        res = await (
+            sb.table("video_summaries")
+            .select("video_id, language, summary, audio_url, tts_voice")
+            .in_("video_id", video_ids[i : i + 100])
+            .execute()
+        )
+        for row in res.data or []:
+            variants[(row["video_id"], row["language"])] = row
+    return variants
+
+
+async def get_audio_artifact(
+    video_id: str, language: str, voice: str, audio_format: str
+) -> dict | None:
+    """Stored audio of one (video, language, voice, format), if synthesized."""
+    sb = await get_client()
+    res = await (
+        sb.table("audio_artifacts")
+        .select("storage_path, audio_url, size_bytes, telegram_file_id, photo_file_id")
+        .eq("video_id", video_id)
+        .eq("language", language)
+        .eq("voice", voice)
+        .eq("format", audio_format)
+        .limit(1)
+        .execute()
+    )
+    return res.data[0] if res.data else None
+
+
+async def upsert_audio_artifact(
+    video_id: str,
+    language: str,
+    voice: str,
+    audio_format: str,
+    storage_path: str,
+    audio_url: str,
+    size_bytes: int,
+):
+    sb = await get_client()
+    await sb.table("audio_artifacts").upsert({
+        "video_id": video_id,
+        "language": language,
+        "voice": voice,
+        "format": audio_format,
+        "storage_path": storage_path,
+        "audio_url": audio_url,
+        "size_bytes": size_bytes,
+    }, on_conflict="video_id,language,voice,format").execute()
+
+
+async def set_audio_artifact_telegram_ids(
+    video_id: str,
+    language: str,
+    voice: str,
+    audio_format: str,
+    telegram_file_id: str | None,
+    photo_file_id: str | None,
+):
+    """Record the Telegram file_ids an artifact was delivered with."""
+    update = {k: v for k, v in {
+        "telegram_file_id": telegram_file_id,
+        "photo_file_id": photo_file_id,
+    }.items() if v}
+    if not update:
+        return
+    sb = await get_client()
+    await (
+        sb.table("audio_artifacts")
+        .update(update)
+        .eq("video_id", video_id)
+        .eq("language", language)
+        .eq("voice", voice)
+        .eq("format", audio_format)
+        .execute()
+    )
+
+
+# ── Processing Queue ───────────────────────────────────────────
+
+async def enqueue_video(
+    video_id: str,
+    youtube_url: str,
+    video_title: str,
+    channel_id: str,
+    priority: int = PRIORITY_RSS,
+):
+    sb = await get_client()
+    await sb.table("processing_queue").upsert({
+        "video_id": video_id,
+        "youtube_url": youtube_url,
+        "video_title": video_title,
+        "channel_id": channel_id,
+        "status": "queued",
+        "priority": priority,
+    }, on_conflict="video_id", ignore_duplicates=True).execute()
+
+
+async def pick_next_job() -> dict | None:
+    """Pick the next queued job atomically (pick_next_processing_job RPC)."""
+    sb = await get_client()
+    res = await sb.rpc("pick_next_processing_job").execute()
+    if not res.data:
+        return None
+    return res.data[0]
+
+
+async def complete_video_job(
+    job_id: str,
+    video_id: str,
+    summary: str,
+    audio_url: str,
+    metadata: dict = None,
+    variants: list[dict] = None,
+) -> dict | None:
+    """Variants, video and job completed in one transaction (see db.complete_video_job)."""
+    sb = await get_client()
+    res = await sb.rpc("complete_video_job", {
+        "p_job_id": job_id,
+        "p_video_id": video_id,
+        "p_summary": summary,
+        "p_audio_url": audio_url,
+        "p_metadata": metadata or None,
+        "p_variants": variants or [],
+    }).execute()
+    return res.data[0] if res.data else None
+
+
+async def defer_job(job_id: str, until: datetime):
+    """Put a job back in the queue, not to be picked before `until` (see db.defer_job)."""
+    sb = await get_client()
+    await sb.table("processing_queue").update({
+        "status": "queued",
+        "not_before": until.isoformat(),
+        "started_at": None,
+    }).eq("id", job_id).execute()
+
+
+async def fail_job(job_id: str, fail_video: bool = False) -> dict | None:
+    """Count a failed attempt atomically, cascading to the video (see db.fail_job)."""
+    sb = await get_client()
+    res = await sb.rpc("fail_processing_job", {"p_job_id": job_id, "p_fail_video": fail_video}).execute()
+    return res.data[0] if res.data else None
+
+
+# ── Groq Usage Ledger ──────────────────────────────────────────
+
+async def get_groq_usage(day: date) -> dict | None:
+    """A UTC day's Groq ledger row: audio_seconds, cost_usd, requests."""
+    sb = await get_client()
+    res = await (
+        sb.table("groq_usage_ledger")
+        .select("audio_seconds, cost_usd, requests")
+        .eq("day", day.isoformat())
+        .execute()
+    )
+    return res.data[0] if res.data else None
+
+
+async def record_groq_usage(day: date, audio_seconds: float, cost_usd: float) -> dict | None:
+    """Atomically add billed Groq usage to the ledger. Returns the updated row."""
+    sb = await get_client()
+    res = await sb.rpc("record_groq_usage", {
+        "p_day": day.isoformat(),
+        "p_seconds": audio_seconds,
+        "p_cost": cost_usd,
+    }).execute()
+    return res.data[0] if res.data else None
+
+
+# ── Deliveries ─────────────────────────────────────────────────
+
+async def create_deliveries_for_video(video_id: str, channel_id: str):
+    """Create delivery entries for all users subscribed to this channel."""
+    sb = await get_client()
+    subs = await (
+        sb.table("subscriptions")
+        .select("user_id")
+        .eq("channel_id", channel_id)
+        .eq("active", True)
+        .execute()
+    )
+    for sub in subs.data:
+        await sb.table("deliveries").upsert({
+            "user_id": sub["user_id"],
+            "video_id": video_id,
+            "status": "pending",
+        }, on_conflict="user_id,video_id").execute()
+
+
+async def get_pending_deliveries(limit: int = 20) -> list[dict]:
+    """Get pending deliveries for completed videos (see db.get_pending_deliveries)."""
+    sb = await get_client()
+
+    # 1. Collect all completed video IDs (paginate past the 1000-row limit)
+    completed_ids: list[str] = []
+    offset = 0
+    while True:
+        res = await (
+            sb.table("processed_videos")
+            .select("video_id")
+            .eq("status", "completed")
+            .range(offset, offset + 999)
+            .execute()
+        )
+        if not res.data:
+            break
+        completed_ids.extend(row["video_id"] for row in res.data)
+        if len(res.data) < 1000:
+            break
+        offset += 1000
+
+    if not completed_ids:
+        return []
+
+    # 2. Pending deliveries for those videos (batches of 100 for URL limits)
+    raw_deliveries: list[dict] = []
+    for i in range(0, len(completed_ids), 100):
+        res = await (
+            sb.table("deliveries")
+            .select("id, user_id, video_id")
+            .eq("status", "pending")
+            .in_("video_id", completed_ids[i : i + 100])
+            .order("created_at")
+            .limit(limit * 5)
+            .execute()
+        )
+        raw_deliveries.extend(res.data or [])
+        if len(raw_deliveries) >= limit * 5:
+            break
+
+    if not raw_deliveries:
+        return []
+
+    # 3. Video metadata, user profiles and summary variants
+    videos_res = await (
+        sb.table("processed_videos")
+        .select("video_id, video_title, channel_id, summary, audio_url")
+        .eq("status", "completed")
+        .in_("video_id", list({d["video_id"] for d in raw_deliveries}))
+        .execute()
+    )
+    video_map = {v["video_id"]: v for v in (videos_res.data or [])}
+    profiles_res = await (
+        sb.table("profiles")
+        .select("id, telegram_chat_id, tts_voice, telegram_connected, preferred_language")
+        .in_("id", list({d["user_id"] for d in raw_deliveries}))
+        .execute()
+    )
+    profile_map = {p["id"]: p for p in (profiles_res.data or [])}
+    variants = await get_video_summaries(list(video_map))
+
+    return _delivery_rows(raw_deliveries, video_map, profile_map, variants, limit)
+
+
+async def cleanup_undeliverable_deliveries() -> int:
+    """Mark pending deliveries as failed when their video failed or the user
+    has no Telegram connected. Returns the number cleaned up."""
+    sb = await get_client()
+    cleaned = 0
+
+    failed_videos = await (
+        sb.table("processed_videos")
+        .select("video_id")
+        .eq("status", "failed")
+        .execute()
+    )
+    failed_ids = [v["video_id"] for v in (failed_videos.data or [])]
+    for i in range(0, len(failed_ids), 100):
+        res = await (
+            sb.table("deliveries")
+            .update({"status": "failed"})
+            .eq("status", "pending")
+            .in_("video_id", failed_ids[i : i + 100])
+            .execute()
+        )
+        cleaned += len(res.data or [])
+
+    disconnected = await (
+        sb.table("profiles")
+        .select("id")
+        .or_("telegram_connected.is.false,telegram_chat_id.is.null")
+        .execute()
+    )
+    user_ids = [p["id"] for p in (disconnected.data or [])]
+    for i in range(0, len(user_ids), 100):
+        res = await (
+            sb.table("deliveries")
+            .update({"status": "failed"})
+            .eq("status", "pending")
+            .in_("user_id", user_ids[i : i + 100])
+            .execute()
+        )
+        cleaned += len(res.data or [])
+
+    return cleaned
+
+
+async def mark_delivery_sent(delivery_id: str):
+    sb = await get_client()
+    await sb.table("deliveries").update({
+        "status": "sent",
+        "sent_at": datetime.now(timezone.utc).isoformat(),
+    }).eq("id", delivery_id).execute()
+
+
+async def mark_delivery_failed(delivery_id: str):
+    sb = await get_client()
+    await sb.table("deliveries").update({"status": "failed"}).eq("id", delivery_id).execute()
+
+
+async def mark_deliveries(delivery_ids: list[str], status: str, at: str | None = None):
+    """Set the outcome of many deliveries at once (see db.mark_deliveries)."""
+    sb = await get_client()
+    values = {"status": status}
+    if status == "sent":
+        values["sent_at"] = at or datetime.now(timezone.utc).isoformat()
+    for i in range(0, len(delivery_ids), 100):
+        await sb.table("deliveries").update(values).in_("id", delivery_ids[i : i + 100]).execute()
+
+
+async def count_on_demand_this_month(user_id: str) -> int:
+    """Count on-demand deliveries for a user in the current calendar month."""
+    sb = await get_client()
+    month_start = datetime.now(timezone.utc).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    ).isoformat()
+    res = await (
+        sb.table("deliveries")
+        .select("id", count="exact")
+        .eq("user_id", user_id)
+        .eq("source", "on_demand")
+        .gte("created_at", month_start)
+        .execute()
+    )
+    return res.count or 0
+
+
+async def mark_existing_videos_as_skipped(channel_id: str):
+    """Mark all existing RSS videos for a channel as skipped."""
+    import feedparser
+
+    rss_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
+    feed = await asyncio.to_thread(feedparser.parse, rss_url)  # blocking fetch
+
+    rows = [
+        {
+            "video_id": entry.yt_videoid,
+            "channel_id": channel_id,
+            "video_title": entry.get("title", "[initial]"),
+            "video_url": entry.get("link", f"https://www.youtube.com/watch?v={entry.yt_videoid}"),
+            "status": "skipped",
+        }
+        for entry in feed.entries
+        if getattr(entry, "yt_videoid", None)
+    ]
+    if rows:
+        sb = await get_client()
+        await sb.table("processed_videos").upsert(
+            rows, on_conflict="video_id", ignore_duplicates=True
+        ).execute()
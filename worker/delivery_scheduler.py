@@ -0,0 +1,132 @@
+"""
+Delivery scheduler — sends to many chats at once, in order within each chat.
+
+The delivery loop used to send one delivery at a time, so throughput was
+bounded by the round trips of a single chat however many chats were waiting.
+Deliveries are now queued in one lane per chat:
+
+- a lane sends its deliveries one after another, in the order they were
+  submitted (created_at), so a chat never receives summaries out of order
+- up to DELIVERY_CONCURRENCY lanes send at the same time
+- the rates themselves are enforced per message in telegram_deliverer.py:
+  the bot-wide and per-chat token buckets (rate_limiter.py), and RetryAfter
+  pauses that hold back only the chat — or, for a bot-wide flood, every chat —
+  that was refused
+
+Lanes outlive a fetch: the delivery loop submits new deliveries while others
+are still being sent. A delivery already queued or in flight is ignored when
+a later fetch returns it again. So is one that finished after the fetch
+started: get_pending_deliveries takes several round trips and may return a
+delivery that was sent meanwhile. Finished ids are kept until a fetch that
+started after they finished has been submitted (their outcome is then held
+by status_buffer until it is in the database).
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from config import DELIVERY_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryScheduler:
+    """Per-chat FIFO lanes, run concurrently across chats."""
+
+    def __init__(self, concurrency: int = DELIVERY_CONCURRENCY):
+        self._deliver: Optional[Callable[[dict], Awaitable[None]]] = None
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._lanes: dict[str, deque[dict]] = {}  # chat_id → deliveries, oldest first
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._queued: set = set()  # delivery ids queued or in flight
+        self._finished: dict = {}  # delivery id → monotonic time it finished
+        self._changed = asyncio.Event()
+        self.completed = 0  # sent or failed
+        self.sending = 0
+        self._started = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    def queued(self) -> list[dict]:
+        """Every delivery queued or in flight."""
+        return [d for lane in self._lanes.values() for d in lane]
+
+    def submit(
+        self,
+        deliveries: list[dict],
+        deliver: Callable[[dict], Awaitable[None]],
+        fetched_at: float,
+    ) -> int:
+        """Queue deliveries behind those of the same chat; `deliver(d)` sends
+        one and records its outcome. `fetched_at` is the monotonic time the
+        fetch that returned `deliveries` started. Returns how many were new
+        (not queued, in flight, or finished since the fetch started)."""
+        self._deliver = deliver
+        # This fetch started after these finished: it no longer needs them
+        for delivery_id in [i for i, at in self._finished.items() if at < fetched_at]:
+            del self._finished[delivery_id]
+        added = 0
+        for d in deliveries:
+            if d["delivery_id"] in self._queued or d["delivery_id"] in self._finished:
+                continue
+            self._queued.add(d["delivery_id"])
+            chat = str(d["chat_id"])
+            self._lanes.setdefault(chat, deque()).append(d)
+            if chat not in self._tasks:
+                self._tasks[chat] = asyncio.create_task(self._run_lane(chat))
+            added += 1
+        return added
+
+    async def _run_lane(self, chat: str) -> None:
+        lane = self._lanes[chat]
+        try:
+            while lane:
+                d = lane[0]  # stays queued (and pinned) until sent
+                try:
+                    async with self._slots:
+                        self.sending += 1
+                        try:
+                            await self._deliver(d)
+                        finally:
+                            self.sending -= 1
+                except Exception as e:
+                    logger.error(f"Delivery {d['delivery_id']} error: {e}")
+                finally:
+                    lane.popleft()
+                    self._queued.discard(d["delivery_id"])
+                    self._finished[d["delivery_id"]] = time.monotonic()
+                    self.completed += 1
+                    self._changed.set()
+        finally:
+            # No await since the last `while lane` check: nothing was appended
+            del self._lanes[chat]
+            del self._tasks[chat]
+
+    async def wait_below(self, count: int, timeout: Optional[float] = None) -> None:
+        """Wait until fewer than `count` deliveries are queued, or `timeout`."""
+        async def _wait():
+            while len(self._queued) >= count:
+                self._changed.clear()
+                await self._changed.wait()
+        try:
+            await asyncio.wait_for(_wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def snapshot(self) -> dict:
+        elapsed = time.monotonic() - self._started
+        return {
+            "queued": len(self._queued),
+            "chats": len(self._lanes),
+            "sending": self.sending,
+            "completed": self.completed,
+            "per_minute": round(self.completed / elapsed * 60, 1) if elapsed > 0 else 0.0,
+        }
+
+
+# Global instance: the delivery loop submits, /monitor_stats reads
+delivery_scheduler = DeliveryScheduler()
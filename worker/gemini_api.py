@@ -3,15 +3,36 @@ Gemini API integration for video summarization with multilingual support
 Uses google-genai (modern package) with Gemini 3
 """
 
+import asyncio
+import json
 import logging
 import os
-from typing import Optional, Tuple
+import re
+import time
+import threading
+from typing import Callable, NamedTuple, Optional, Tuple
 from google import genai
-from google.genai.types import GenerateContentConfig
+from google.genai.types import GenerateContentConfig, HttpOptions
+
+from config import (
+    GEMINI_MAP_REDUCE_TOKENS,
+    GEMINI_MAP_CHUNK_TOKENS,
+    GEMINI_MAP_CONCURRENCY,
+    GEMINI_REQUEST_TIMEOUT,
+)
+from model_health import ModelHealth, classify_error
+from rate_limiter import rate_limiter
 
 logger = logging.getLogger(__name__)
 
 
+class SummaryResult(NamedTuple):
+    summary: Optional[str]
+    error: Optional[str]
+    model: Optional[str]   # model that produced the summary
+    tokens: int            # total tokens billed for the successful call
+
+
 class GeminiSummarizer:
     """
     Summarizes video transcripts using Gemini 3 API
@@ -27,6 +48,22 @@ class GeminiSummarizer:
         "gemini-2.0-flash",        # Stable fallback
     ]
 
+    # Bump whenever the prompt or generation settings change: it is part of
+    # the summary cache key (summary_cache.py), so old summaries stop matching
+    PROMPT_VERSION = "1"
+
+    # Languages summarized together in one summarize_languages_async() call
+    MAX_BATCH_LANGUAGES = 4
+
+    # Rough token estimate for planning (Gemini averages ~4 chars per token
+    # on the European languages we mostly see)
+    CHARS_PER_TOKEN = 4
+
+    # Map-reduce: the final summary's word range is capped so it always fits
+    # in the reduce call's output budget
+    MAX_SUMMARY_WORDS = 2500
+    REDUCE_MAX_OUTPUT_TOKENS = 8192
+
     # Language names for prompts
     LANGUAGE_NAMES = {
         'fr': 'français',
@@ -57,62 +94,60 @@ class GeminiSummarizer:
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY must be provided or set in environment")
 
-        self.client = genai.Client(api_key=self.api_key)
+        # HTTP-level timeout (ms) so a stalled request can't pin a sync caller
+        self.client = genai.Client(
+            api_key=self.api_key,
+            http_options=HttpOptions(timeout=GEMINI_REQUEST_TIMEOUT * 1000),
+        )
+        # Event loop of the blocking wrappers (_run_sync), started on first use
+        self._sync_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync_lock = threading.Lock()
         logger.info("Gemini API client initialized")
 
     def _get_language_name(self, lang_code: str) -> str:
         """Get full language name from code"""
         return self.LANGUAGE_NAMES.get(lang_code.lower(), lang_code)
 
-    def summarize(
-        self,
-        transcript: str,
-        source_language: Optional[str] = None,
-        target_language: str = 'fr',
-        model: Optional[str] = None
-    ) -> Tuple[Optional[str], Optional[str]]:
-        """
-        Summarize a video transcript and translate to target language.
-
-        The video URL is intentionally NOT passed to Gemini: providing it lets
-        the model use its training knowledge about the video instead of strictly
-        following the transcript, which causes hallucinations.
+    @staticmethod
+    def _length_guidance(transcript: str, max_words_cap: Optional[int] = None) -> str:
+        """Target summary length based on transcript length.
 
-        Args:
-            transcript: Full video transcript text
-            source_language: Language code of the transcript (e.g., 'en', 'fr')
-            target_language: Desired language for the summary (default: 'fr')
-            model: Optional specific model to use (default: tries models in order)
-
-        Returns:
-            Tuple of (summary_text, error_message)
+        Never ask for MORE words than the original — that forces hallucination.
         """
-        if not transcript or len(transcript.strip()) < 50:
-            return None, "transcript_too_short"
-
-        # Build the prompt
-        target_lang_name = self._get_language_name(target_language)
-
-        # Determine target summary length based on transcript length.
-        # Never ask for MORE words than the original — that forces hallucination.
         transcript_words = len(transcript.split())
 
         if transcript_words < 150:
             # Very short video — keep 60-80% of original, never exceed it
             min_words = max(30, int(transcript_words * 0.6))
             max_words = int(transcript_words * 0.9)
-            length_guidance = f"environ {min_words}-{max_words} mots"
         elif transcript_words < 500:
             min_words = int(transcript_words * 0.4)
             max_words = int(transcript_words * 0.7)
-            length_guidance = f"environ {min_words}-{max_words} mots"
         else:
             min_words = int(transcript_words * 0.25)
             max_words = int(transcript_words * 0.5)
-            length_guidance = f"environ {min_words}-{max_words} mots"
+        if max_words_cap and max_words > max_words_cap:
+            min_words, max_words = max_words_cap // 2, max_words_cap
+        return f"environ {min_words}-{max_words} mots"
+
+    # Shared by the single- and multi-language prompts
+    _GROUNDING_RULE = (
+        "RÈGLE ABSOLUE : base-toi UNIQUEMENT sur la transcription fournie. "
+        "N'utilise aucune connaissance externe sur cette vidéo ou ce sujet. "
+        "Si la transcription est ambiguë ou incomplète, résume ce qui est présent sans inventer.\n\n"
+    )
+
+    def _build_prompt(
+        self, transcript: str, source_language: Optional[str], target_language: str
+    ) -> str:
+        """Prompt for one summary in target_language.
+
+        No video URL: providing it lets Gemini use its training knowledge
+        about the video instead of strictly following the transcript.
+        """
+        target_lang_name = self._get_language_name(target_language)
+        length_guidance = self._length_guidance(transcript)
 
-        # Build prompt — no video URL: providing it lets Gemini use its training
-        # knowledge about the video instead of strictly following the transcript.
         if source_language and source_language != target_language:
             source_lang_name = self._get_language_name(source_language)
             intro = (
@@ -128,9 +163,7 @@ class GeminiSummarizer:
 
         prompt_parts = [
             intro,
-            "RÈGLE ABSOLUE : base-toi UNIQUEMENT sur la transcription fournie. "
-            "N'utilise aucune connaissance externe sur cette vidéo ou ce sujet. "
-            "Si la transcription est ambiguë ou incomplète, résume ce qui est présent sans inventer.\n\n"
+            self._GROUNDING_RULE,
             "Instructions :\n"
             f"1. Résumé de {length_guidance} — ne dépasse pas cette limite\n"
             "2. Capture les points clés et idées principales de la transcription\n"
@@ -141,41 +174,585 @@ class GeminiSummarizer:
             f"Résumé en {target_lang_name} ({length_guidance}) :"
         ]
 
-        prompt = "".join(prompt_parts)
+        return "".join(prompt_parts)
+
+    def _build_batch_prompt(
+        self, transcript: str, source_language: Optional[str], target_languages: list[str]
+    ) -> str:
+        """Prompt for one summary per language, answered as a JSON object."""
+        length_guidance = self._length_guidance(transcript)
+        names = ", ".join(
+            f"{self._get_language_name(lang)} ({lang})" for lang in target_languages
+        )
+        source = (
+            f"La transcription ci-dessous provient d'une vidéo en "
+            f"{self._get_language_name(source_language)}.\n"
+            if source_language else ""
+        )
+        example = ", ".join(f'"{lang}": "..."' for lang in target_languages)
+        return "".join([
+            "Tu es un assistant qui résume des vidéos YouTube.\n",
+            source,
+            f"Tu dois produire un résumé dans chacune de ces langues : {names}.\n\n",
+            self._GROUNDING_RULE,
+            "Instructions :\n"
+            f"1. Chaque résumé fait {length_guidance} — ne dépasse pas cette limite\n"
+            "2. Capture les points clés et idées principales de la transcription\n"
+            "3. Évite les répétitions et le remplissage\n"
+            "4. Ton naturel et direct, adapté à une écoute audio\n"
+            "5. Chaque résumé est entièrement rédigé dans sa langue, avec le même contenu\n"
+            "6. Réponds UNIQUEMENT avec un objet JSON dont les clés sont les codes de "
+            f"langue et les valeurs les résumés : {{{example}}}\n\n",
+            f"Transcription :\n{transcript}\n",
+        ])
+
+    def summarize(
+        self,
+        transcript: str,
+        source_language: Optional[str] = None,
+        target_language: str = 'fr',
+        model: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Summarize a video transcript and translate to target language.
+
+        Returns:
+            Tuple of (summary_text, error_message) — see summarize_with_usage()
+        """
+        result = self.summarize_with_usage(transcript, source_language, target_language, model)
+        return result.summary, result.error
+
+    def summarize_with_usage(
+        self,
+        transcript: str,
+        source_language: Optional[str] = None,
+        target_language: str = 'fr',
+        model: Optional[str] = None,
+        map_reduce: Optional[bool] = None,
+    ) -> SummaryResult:
+        """Blocking summarize_with_usage_async(), for scripts and benchmarks."""
+        return self._run_sync(self.summarize_with_usage_async(
+            transcript, source_language, target_language, model, map_reduce
+        ))
+
+    def _run_sync(self, coro):
+        """Run a coroutine on this summarizer's own event loop (started on
+        first use, in a daemon thread) and wait for it. One loop for every
+        call keeps the async client's connections on the loop that opened
+        them; callers may be on any thread. Not for the worker's event loop,
+        which awaits the async methods directly."""
+        with self._sync_lock:
+            if self._sync_loop is None:
+                self._sync_loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._sync_loop.run_forever, name="gemini-sync", daemon=True
+                ).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._sync_loop).result()
+
+    # ── Shared helpers ────────────────────────────────────────
+
+    @staticmethod
+    def _healthy(models: list[str]) -> list[str]:
+        """`models` reordered by health, open circuits skipped (model_health.py)."""
+        ordered = gemini_health.order(models)
+        skipped = [m for m in models if m not in ordered]
+        if skipped:
+            logger.info(f"Skipping unhealthy model(s): {', '.join(skipped)}")
+        return ordered
+
+    def _attempts(self, models: list[str]):
+        """Yield the models to try, best first, each marked as started."""
+        for model_name in self._healthy(models):
+            if gemini_health.begin(model_name):
+                yield model_name
+
+    async def _throttle_async(self, prompt: str) -> None:
+        """Wait for the shared Gemini request and token budgets (rate_limiter.py)."""
+        await rate_limiter.acquire_async("gemini")
+        await rate_limiter.acquire_async("gemini_tokens", self.estimate_tokens(prompt))
+
+    @staticmethod
+    def _generation_config(max_output_tokens: int = 4096, json_output: bool = False) -> GenerateContentConfig:
+        if json_output:
+            return GenerateContentConfig(
+                temperature=0.7,
+                max_output_tokens=max_output_tokens,
+                response_mime_type="application/json",
+            )
+        return GenerateContentConfig(temperature=0.7, max_output_tokens=max_output_tokens)
+
+    @staticmethod
+    def _usage_tokens(response) -> int:
+        usage = getattr(response, "usage_metadata", None)
+        return (getattr(usage, "total_token_count", None) or 0) if usage else 0
+
+    @staticmethod
+    def _reject(model_name: str, error: BaseException) -> None:
+        logger.error(f"Failed with model {model_name}: {error}")
+        gemini_health.record_failure(model_name, classify_error(error))
+
+    def _accept_text(
+        self, model_name: str, response, started: float, min_chars: int, label: str
+    ) -> Optional[SummaryResult]:
+        """SummaryResult for a usable response, None to try the next model."""
+        text = (response.text or "").strip()
+
+        if len(text) < min_chars:
+            logger.warning(f"{label.capitalize()} too short ({len(text)} chars), trying next model")
+            gemini_health.record_failure(model_name, "too_short", trip=False)
+            return None
+
+        gemini_health.record_success(model_name, time.monotonic() - started)
+        tokens = self._usage_tokens(response)
+        logger.info(
+            f"✅ Successfully generated {label} with {model_name}: "
+            f"{len(text)} chars, {tokens} tokens"
+        )
+        return SummaryResult(text, None, model_name, tokens)
+
+    def _accept_batch(
+        self, model_name: str, response, started: float, target_languages: list[str]
+    ) -> Optional[dict[str, SummaryResult]]:
+        """Usable languages of a batched JSON response, None to try the next model."""
+        try:
+            data = json.loads(response.text)
+        except (TypeError, ValueError):
+            data = None
+        if not isinstance(data, dict):
+            logger.warning("Batch summary is not a JSON object, trying next model")
+            gemini_health.record_failure(model_name, "bad_output", trip=False)
+            return None
+        gemini_health.record_success(model_name, time.monotonic() - started)
+
+        tokens = self._usage_tokens(response)
+        results: dict[str, SummaryResult] = {}
+        for lang in target_languages:
+            summary = data.get(lang)
+            if isinstance(summary, str) and len(summary.strip()) >= 100:
+                # Tokens split evenly — used for cache savings only
+                results[lang] = SummaryResult(
+                    summary.strip(), None, model_name, tokens // len(target_languages)
+                )
+        if not results:
+            logger.warning("Batch summary returned no usable language, trying next model")
+            return None
+
+        logger.info(
+            f"✅ Successfully generated {len(results)}/{len(target_languages)} "
+            f"summaries with {model_name}: {tokens} tokens"
+        )
+        return results
+
+    def _language_batches(self, target_languages: list[str]) -> list[list[str]]:
+        """Groups of 2+ languages worth a batched call (singles go alone)."""
+        if len(target_languages) < 2:
+            return []
+        batches = [
+            target_languages[i : i + self.MAX_BATCH_LANGUAGES]
+            for i in range(0, len(target_languages), self.MAX_BATCH_LANGUAGES)
+        ]
+        return [batch for batch in batches if len(batch) > 1]
+
+    # ── Map-reduce (very long transcripts) ────────────────────
+
+    @classmethod
+    def estimate_tokens(cls, text: str) -> int:
+        return len(text) // cls.CHARS_PER_TOKEN
+
+    @classmethod
+    def split_transcript(cls, transcript: str, max_tokens: int = GEMINI_MAP_CHUNK_TOKENS) -> list[str]:
+        """Split a transcript into parts of at most ~max_tokens, cutting at
+        sentence ends when there are any (auto captions often have none, in
+        which case parts are cut between words)."""
+        max_chars = max_tokens * cls.CHARS_PER_TOKEN
+        units: list[str] = []
+        for sentence in re.split(r"(?<=[.!?…])\s+", transcript.strip()):
+            if len(sentence) <= max_chars:
+                units.append(sentence)
+                continue
+            # Unpunctuated run: cut into word groups small enough to pack well
+            group: list[str] = []
+            group_chars = 0
+            for word in sentence.split():
+                if group and group_chars + len(word) + 1 > max_chars // 8:
+                    units.append(" ".join(group))
+                    group, group_chars = [], 0
+                group.append(word)
+                group_chars += len(word) + 1
+            if group:
+                units.append(" ".join(group))
+
+        parts: list[str] = []
+        current: list[str] = []
+        size = 0
+        for unit in units:
+            if current and size + len(unit) + 1 > max_chars:
+                parts.append(" ".join(current))
+                current, size = [], 0
+            current.append(unit)
+            size += len(unit) + 1
+        if current:
+            parts.append(" ".join(current))
+        return parts
+
+    def _build_map_prompt(self, part: str, index: int, total: int) -> str:
+        """Notes on one part of the transcript, in the transcript's language
+        so every target language can be reduced from the same notes."""
+        return "".join([
+            f"Tu es un assistant qui résume des vidéos YouTube.\n"
+            f"Voici la partie {index}/{total} de la transcription d'une longue vidéo.\n\n",
+            self._GROUNDING_RULE,
+            "Instructions :\n"
+            f"1. Prends des notes détaillées de cette partie ({self._length_guidance(part)})\n"
+            "2. Garde tous les faits, chiffres, noms, arguments et conclusions, dans l'ordre\n"
+            "3. Pas d'introduction ni de conclusion : seulement les notes\n"
+            "4. Rédige dans la langue de la transcription\n\n",
+            f"Transcription (partie {index}/{total}) :\n{part}\n\n",
+            "Notes :",
+        ])
+
+    def _build_reduce_prompt(
+        self,
+        notes: list[str],
+        transcript: str,
+        source_language: Optional[str],
+        target_language: str,
+    ) -> str:
+        """Final summary from the partial notes — same rules as the single-shot
+        prompt, length still based on the full transcript."""
+        target_lang_name = self._get_language_name(target_language)
+        length_guidance = self._length_guidance(transcript, self.MAX_SUMMARY_WORDS)
+        source = (
+            f"La vidéo est en {self._get_language_name(source_language)}.\n"
+            if source_language and source_language != target_language else ""
+        )
+        sections = "\n\n".join(
+            f"[Partie {i}/{len(notes)}]\n{n}" for i, n in enumerate(notes, 1)
+        )
+        return "".join([
+            "Tu es un assistant qui résume des vidéos YouTube.\n"
+            "Une longue transcription a été découpée en parties, chacune résumée en notes.\n",
+            source,
+            f"Produis à partir de ces notes un seul résumé en {target_lang_name} de toute la vidéo.\n\n",
+            "RÈGLE ABSOLUE : base-toi UNIQUEMENT sur les notes fournies. "
+            "N'utilise aucune connaissance externe sur cette vidéo ou ce sujet.\n\n"
+            "Instructions :\n"
+            f"1. Résumé de {length_guidance} — ne dépasse pas cette limite\n"
+            "2. Couvre toute la vidéo, du début à la fin, en gardant les points clés\n"
+            "3. Fusionne ce qui se répète entre les parties, évite le remplissage\n"
+            "4. Ton naturel et direct, adapté à une écoute audio\n"
+            f"5. Langue : {target_lang_name} obligatoire\n\n",
+            f"Notes :\n{sections}\n\n",
+            f"Résumé en {target_lang_name} ({length_guidance}) :",
+        ])
+
+    def _map_prompts(self, transcript: str) -> list[tuple[str, str]]:
+        """(prompt, label) for each part of the map step."""
+        parts = self.split_transcript(transcript)
+        logger.info(
+            f"Map-reduce summarization: ~{self.estimate_tokens(transcript)} tokens "
+            f"→ {len(parts)} parts"
+        )
+        return [
+            (self._build_map_prompt(part, i, len(parts)), f"notes {i}/{len(parts)}")
+            for i, part in enumerate(parts, 1)
+        ]
+
+    @staticmethod
+    def _map_failed(mapped: list[SummaryResult], target_languages: list[str]) -> Optional[dict[str, SummaryResult]]:
+        failed = [i for i, r in enumerate(mapped, 1) if not r.summary]
+        if not failed:
+            return None
+        logger.error(f"Map-reduce: notes failed for part(s) {failed}")
+        return {
+            lang: SummaryResult(None, "map_step_failed", None, 0)
+            for lang in target_languages
+        }
 
-        # Try models in order
-        models_to_try = [model] if model else self.MODELS
+    # ── Gemini calls (event loop, no executor threads) ────────
+    #
+    # On the google-genai async client. Every request is bounded by
+    # GEMINI_REQUEST_TIMEOUT, and cancelling the calling task (e.g.
+    # VIDEO_TIMEOUT) aborts the in-flight HTTP request instead of leaving it
+    # running in a thread. summarize() / summarize_with_usage() wrap these
+    # for blocking callers.
 
-        for model_name in models_to_try:
+    async def _generate_async(
+        self,
+        prompt: str,
+        models: list[str],
+        max_output_tokens: int = 4096,
+        min_chars: int = 100,
+        label: str = "summary",
+    ) -> SummaryResult:
+        """Run one prompt, trying healthy models in order until one returns
+        at least `min_chars` of text."""
+        for model_name in self._attempts(models):
+            started = time.monotonic()
             try:
-                logger.info(f"Attempting summarization with model: {model_name}")
-
-                response = self.client.models.generate_content(
-                    model=model_name,
-                    contents=prompt,
-                    config=GenerateContentConfig(
-                        temperature=0.7,
-                        max_output_tokens=4096,
-                    )
+                logger.info(f"Attempting {label} with model: {model_name}")
+                await self._throttle_async(prompt)
+                response = await asyncio.wait_for(
+                    self.client.aio.models.generate_content(
+                        model=model_name,
+                        contents=prompt,
+                        config=self._generation_config(max_output_tokens),
+                    ),
+                    timeout=GEMINI_REQUEST_TIMEOUT,
                 )
+            except asyncio.CancelledError:
+                gemini_health.abandon(model_name)
+                raise
+            except Exception as e:
+                self._reject(model_name, e)
+                continue
+            result = self._accept_text(model_name, response, started, min_chars, label)
+            if result:
+                return result
+
+        # All models failed
+        return SummaryResult(None, "all_models_failed", None, 0)
+
+    async def summarize_async(
+        self,
+        transcript: str,
+        source_language: Optional[str] = None,
+        target_language: str = 'fr',
+        model: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Async summarize(): (summary_text, error_message)."""
+        result = await self.summarize_with_usage_async(
+            transcript, source_language, target_language, model
+        )
+        return result.summary, result.error
+
+    async def summarize_with_usage_async(
+        self,
+        transcript: str,
+        source_language: Optional[str] = None,
+        target_language: str = 'fr',
+        model: Optional[str] = None,
+        map_reduce: Optional[bool] = None,
+    ) -> SummaryResult:
+        """
+        Summarize a video transcript and translate to target language.
+
+        The video URL is intentionally NOT passed to Gemini: providing it lets
+        the model use its training knowledge about the video instead of strictly
+        following the transcript, which causes hallucinations.
+
+        Args:
+            transcript: Full video transcript text
+            source_language: Language code of the transcript (e.g., 'en', 'fr')
+            target_language: Desired language for the summary (default: 'fr')
+            model: Optional specific model to use (default: tries models in order)
+            map_reduce: Force (True) or disable (False) map-reduce; by default
+                it is used when the transcript exceeds GEMINI_MAP_REDUCE_TOKENS
+
+        Returns:
+            SummaryResult(summary, error, model, tokens)
+        """
+        if not transcript or len(transcript.strip()) < 50:
+            return SummaryResult(None, "transcript_too_short", None, 0)
+
+        if map_reduce is None:
+            map_reduce = self.estimate_tokens(transcript) > GEMINI_MAP_REDUCE_TOKENS
+        if map_reduce:
+            results = await self._summarize_map_reduce_async(
+                transcript, source_language, [target_language], model
+            )
+            return results[target_language]
+
+        prompt = self._build_prompt(transcript, source_language, target_language)
+        return await self._generate_async(prompt, [model] if model else self.MODELS)
+
+    async def _summarize_map_reduce_async(
+        self,
+        transcript: str,
+        source_language: Optional[str],
+        target_languages: list[str],
+        model: Optional[str] = None,
+    ) -> dict[str, SummaryResult]:
+        """Hierarchical summary: notes on each part in parallel (at most
+        GEMINI_MAP_CONCURRENCY calls at once), then one reduce call per
+        target language over the notes.
+
+        A failed part only retries that part (through the model fallback
+        list), never the whole transcript. Tokens of the map step are shared
+        evenly between the target languages.
+        """
+        models = [model] if model else self.MODELS
+        limit = asyncio.Semaphore(max(1, GEMINI_MAP_CONCURRENCY))
+
+        async def bounded(prompt: str, **kwargs) -> SummaryResult:
+            async with limit:
+                return await self._generate_async(prompt, models, **kwargs)
+
+        mapped = await asyncio.gather(*(
+            bounded(prompt, min_chars=50, label=label)
+            for prompt, label in self._map_prompts(transcript)
+        ))
+        failed = self._map_failed(mapped, target_languages)
+        if failed:
+            return failed
+        notes = [r.summary for r in mapped]
+        map_tokens = sum(r.tokens for r in mapped) // len(target_languages)
+
+        reduced = await asyncio.gather(*(
+            bounded(
+                self._build_reduce_prompt(notes, transcript, source_language, lang),
+                max_output_tokens=self.REDUCE_MAX_OUTPUT_TOKENS,
+            )
+            for lang in target_languages
+        ))
+        return {
+            lang: result._replace(tokens=result.tokens + map_tokens)
+            for lang, result in zip(target_languages, reduced)
+        }
 
-                summary = response.text.strip()
+    async def summarize_languages_async(
+        self,
+        transcript: str,
+        source_language: Optional[str],
+        target_languages: list[str],
+    ) -> dict[str, SummaryResult]:
+        """
+        Summarize one transcript in several languages.
 
-                if len(summary) < 100:
-                    logger.warning(f"Summary too short ({len(summary)} chars), trying next model")
-                    continue
+        Languages are batched MAX_BATCH_LANGUAGES at a time into a single
+        Gemini call (the transcript — most of the input tokens — is sent once
+        per batch instead of once per language). Any language a batch didn't
+        return falls back to its own summarize_with_usage_async() call;
+        batches and fallbacks run concurrently.
 
+        Transcripts above GEMINI_MAP_REDUCE_TOKENS are mapped once and
+        reduced per language instead.
+
+        Returns:
+            {language: SummaryResult} for every requested language
+        """
+        if self.estimate_tokens(transcript) > GEMINI_MAP_REDUCE_TOKENS:
+            return await self._summarize_map_reduce_async(
+                transcript, source_language, target_languages
+            )
+
+        results: dict[str, SummaryResult] = {}
+        for batch_results in await asyncio.gather(*(
+            self._summarize_batch_async(transcript, source_language, batch)
+            for batch in self._language_batches(target_languages)
+        )):
+            results.update(batch_results)
+        missing = [lang for lang in target_languages if lang not in results]
+        for lang, result in zip(missing, await asyncio.gather(*(
+            self.summarize_with_usage_async(transcript, source_language, lang)
+            for lang in missing
+        ))):
+            results[lang] = result
+        return results
+
+    async def _summarize_batch_async(
+        self,
+        transcript: str,
+        source_language: Optional[str],
+        target_languages: list[str],
+    ) -> dict[str, SummaryResult]:
+        """One Gemini call for several languages. Returns only the languages
+        that came back with a usable summary (possibly none)."""
+        if not transcript or len(transcript.strip()) < 50:
+            return {}
+        prompt = self._build_batch_prompt(transcript, source_language, target_languages)
+
+        for model_name in self._attempts(self.MODELS):
+            started = time.monotonic()
+            try:
                 logger.info(
-                    f"✅ Successfully generated summary with {model_name}: "
-                    f"{len(summary)} chars"
+                    f"Attempting {len(target_languages)}-language summarization "
+                    f"({', '.join(target_languages)}) with model: {model_name}"
                 )
+                await self._throttle_async(prompt)
+                response = await asyncio.wait_for(
+                    self.client.aio.models.generate_content(
+                        model=model_name,
+                        contents=prompt,
+                        config=self._generation_config(4096 * len(target_languages), json_output=True),
+                    ),
+                    timeout=GEMINI_REQUEST_TIMEOUT,
+                )
+            except asyncio.CancelledError:
+                gemini_health.abandon(model_name)
+                raise
+            except Exception as e:
+                self._reject(model_name, e)
+                continue
+            results = self._accept_batch(model_name, response, started, target_languages)
+            if results:
+                return results
 
-                return summary, None
+        return {}
 
+    async def summarize_stream_async(
+        self,
+        transcript: str,
+        source_language: Optional[str],
+        target_language: str,
+        on_text: Callable[[str], None],
+    ) -> SummaryResult:
+        """Single-call summary streamed as it is generated.
+
+        `on_text` receives each piece of text as it arrives. Models are only
+        switched before the first piece; a stream that breaks after that
+        returns an error ("stream_interrupted") and the caller discards
+        what it received. Not for map-reduce-sized transcripts.
+        """
+        if not transcript or len(transcript.strip()) < 50:
+            return SummaryResult(None, "transcript_too_short", None, 0)
+        prompt = self._build_prompt(transcript, source_language, target_language)
+
+        for model_name in self._attempts(self.MODELS):
+            started = time.monotonic()
+            parts: list[str] = []
+            tokens = 0
+            try:
+                logger.info(f"Attempting streamed summary with model: {model_name}")
+                await self._throttle_async(prompt)
+                async with asyncio.timeout(GEMINI_REQUEST_TIMEOUT):
+                    stream = await self.client.aio.models.generate_content_stream(
+                        model=model_name,
+                        contents=prompt,
+                        config=self._generation_config(),
+                    )
+                    async for chunk in stream:
+                        tokens = self._usage_tokens(chunk) or tokens
+                        if chunk.text:
+                            parts.append(chunk.text)
+                            on_text(chunk.text)
+            except asyncio.CancelledError:
+                gemini_health.abandon(model_name)
+                raise
             except Exception as e:
-                logger.error(f"Failed with model {model_name}: {e}")
-                # Try next model
+                self._reject(model_name, e)
+                if parts:
+                    return SummaryResult(None, "stream_interrupted", model_name, 0)
                 continue
 
-        # All models failed
-        return None, "all_models_failed"
+            text = "".join(parts).strip()
+            if len(text) < 100:
+                logger.warning(f"Streamed summary too short ({len(text)} chars)")
+                gemini_health.record_failure(model_name, "too_short", trip=False)
+                if parts:
+                    return SummaryResult(None, "summary_too_short", model_name, 0)
+                continue
+
+            gemini_health.record_success(model_name, time.monotonic() - started)
+            logger.info(
+                f"✅ Successfully streamed summary with {model_name}: "
+                f"{len(text)} chars, {tokens} tokens"
+            )
+            return SummaryResult(text, None, model_name, tokens)
+
+        return SummaryResult(None, "all_models_failed", None, 0)
+
+
+# Shared by every GeminiSummarizer — model health is a property of the API,
+# not of one client
+gemini_health = ModelHealth()
@@ -0,0 +1,184 @@
+"""
+Groq daily quota scheduler — plans Whisper usage before calling the API.
+
+Groq's free tier allows GROQ_DAILY_QUOTA_SECONDS of audio per UTC day. The
+billed seconds are kept in the groq_usage_ledger table (one row per day), so
+the budget survives restarts and is shared by every worker.
+
+Before a video is transcribed its audio duration is known from the YouTube
+metadata, so the scheduler can admit it against the remaining budget:
+- normal priority (RSS) may fill GROQ_NORMAL_PRIORITY_PCT of the quota
+- high priority (on-demand) may use the whole quota
+A job that isn't admitted goes to local Whisper if available, otherwise it
+is deferred to the next reset — no 429 needed to find out.
+
+A 429 on the daily audio-seconds limit stops admission until the reset; a
+429 on a per-minute / per-hour limit only pauses it for the time Groq asks.
+"""
+
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+
+import db
+from config import GROQ_DAILY_QUOTA_SECONDS, GROQ_NORMAL_PRIORITY_PCT
+from monitoring import stats
+
+logger = logging.getLogger(__name__)
+
+# Re-read the ledger at most this often (other workers write to it too)
+_LEDGER_SYNC_SECONDS = 60
+
+
+class Reservation(NamedTuple):
+    """Estimated Groq seconds held for one admitted job until it settles."""
+    day: date
+    seconds: float
+
+
+def next_reset() -> datetime:
+    """Next Groq quota reset: midnight UTC."""
+    now = datetime.now(timezone.utc)
+    return datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+
+
+class GroqQuotaScheduler:
+    """Admits Whisper jobs against the remaining Groq daily budget.
+
+    used      — seconds billed today (from the ledger + this process's settles)
+    reserved  — estimates of admitted jobs that haven't settled yet
+    A job is admitted only if used + reserved + its estimate stays under the
+    ceiling for its priority.
+    """
+
+    def __init__(
+        self,
+        daily_seconds: float = GROQ_DAILY_QUOTA_SECONDS,
+        normal_pct: float = GROQ_NORMAL_PRIORITY_PCT,
+    ):
+        self.daily_seconds = daily_seconds
+        self.normal_pct = normal_pct
+        self._lock = threading.Lock()
+        self._day = datetime.now(timezone.utc).date()
+        self._used = 0.0
+        self._reserved = 0.0
+        self._synced_at = 0.0  # monotonic time of the last ledger read
+        self._exhausted_until: Optional[datetime] = None
+
+    def _roll_day(self) -> None:
+        """Start a fresh budget at midnight UTC. Caller holds the lock."""
+        today = datetime.now(timezone.utc).date()
+        if today != self._day:
+            self._day = today
+            self._used = 0.0
+            self._reserved = 0.0
+            self._synced_at = 0.0
+        if self._exhausted_until and datetime.now(timezone.utc) >= self._exhausted_until:
+            self._exhausted_until = None
+
+    def _sync_ledger(self) -> None:
+        """Refresh today's usage from the ledger (throttled, never raises)."""
+        with self._lock:
+            self._roll_day()
+            if time.monotonic() - self._synced_at < _LEDGER_SYNC_SECONDS:
+                return
+            day = self._day
+            self._synced_at = time.monotonic()
+        try:
+            row = db.get_groq_usage(day)
+        except Exception as e:
+            logger.warning(f"Groq ledger read failed (using local count): {e}")
+            return
+        seconds = float(row["audio_seconds"]) if row else 0.0
+        cost = float(row["cost_usd"]) if row else 0.0
+        with self._lock:
+            if day == self._day:
+                self._used = max(self._used, seconds)
+        stats.set_groq_usage(seconds, cost)
+
+    def ceiling(self, priority: int) -> float:
+        """Seconds of today's quota a job of this priority may fill up to."""
+        if priority >= db.PRIORITY_ON_DEMAND:
+            return self.daily_seconds
+        return self.daily_seconds * self.normal_pct / 100
+
+    def remaining(self, priority: int = db.PRIORITY_RSS) -> float:
+        with self._lock:
+            self._roll_day()
+            return max(0.0, self.ceiling(priority) - self._used - self._reserved)
+
+    def admit(self, seconds: float, priority: int = db.PRIORITY_RSS) -> Optional[Reservation]:
+        """Reserve `seconds` of today's budget, or return None if it doesn't fit."""
+        self._sync_ledger()
+        with self._lock:
+            self._roll_day()
+            if self._exhausted_until is not None:
+                return None
+            available = self.ceiling(priority) - self._used - self._reserved
+            if seconds > available:
+                logger.info(
+                    f"Groq quota: {seconds:.0f}s requested, {max(0.0, available):.0f}s "
+                    f"left for priority {priority} (used {self._used:.0f}s, "
+                    f"reserved {self._reserved:.0f}s of {self.daily_seconds:.0f}s)"
+                )
+                return None
+            self._reserved += seconds
+            return Reservation(self._day, seconds)
+
+    def settle(self, reservation: Reservation, billed_seconds: float, cost_usd: float) -> None:
+        """Release a reservation and record what Groq actually billed.
+
+        Call exactly once per admitted job — also when it failed (with the
+        seconds billed before the failure, possibly 0).
+        """
+        with self._lock:
+            self._roll_day()
+            if reservation.day == self._day:
+                self._reserved = max(0.0, self._reserved - reservation.seconds)
+                self._used += billed_seconds
+        if billed_seconds <= 0:
+            return
+
+        try:
+            row = db.record_groq_usage(reservation.day, billed_seconds, cost_usd)
+        except Exception as e:
+            logger.warning(f"Groq ledger write failed (usage kept in memory only): {e}")
+            row = None
+        if row:
+            seconds = float(row["audio_seconds"])
+            with self._lock:
+                if reservation.day == self._day:
+                    self._used = max(self._used, seconds)
+            stats.set_groq_usage(seconds, float(row["cost_usd"]))
+        else:
+            stats.record_groq_usage(billed_seconds, cost_usd)
+
+    def mark_exhausted(self) -> None:
+        """Stop admitting until the next reset (Groq refused on its daily
+        audio-seconds limit)."""
+        with self._lock:
+            self._exhausted_until = next_reset()
+        logger.warning(f"Groq quota exhausted — no Groq jobs until {self._exhausted_until:%H:%M} UTC")
+
+    def pause(self, seconds: float, limit: str = "") -> None:
+        """Stop admitting for `seconds` (Groq refused on a per-minute or
+        per-hour limit). Never shortens a longer pause already in place."""
+        until = datetime.now(timezone.utc) + timedelta(seconds=seconds)
+        with self._lock:
+            if self._exhausted_until is None or until > self._exhausted_until:
+                self._exhausted_until = until
+            until = self._exhausted_until
+        logger.warning(f"Groq rate limit {limit or '(unnamed)'} — no Groq jobs until {until:%H:%M:%S} UTC")
+
+    def resume_at(self) -> datetime:
+        """When a job refused by the quota should be tried again: the end of
+        the current pause, else the next reset."""
+        with self._lock:
+            self._roll_day()
+            return self._exhausted_until or next_reset()
+
+
+# Global instance shared by every WhisperTranscriber
+groq_quota = GroqQuotaScheduler()
@@ -0,0 +1,118 @@
+"""
+Size-bounded LRU cache of audio files in AUDIO_DIR.
+
+Replaces the age-based cleanup that globbed and stat'ed every file on each
+delivery loop iteration and deleted popular audio after an hour, only for it
+to be downloaded again (or re-synthesized) for the next recipient.
+
+- the directory is scanned once at startup; afterwards an in-memory index
+  (file name → size, in least-recently-used order) is kept up to date
+- files are evicted least recently used first, only when the total exceeds
+  AUDIO_CACHE_MAX_MB
+- files with pending deliveries are pinned and never evicted
+- hits / misses / evictions are counted for /monitor_stats
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Optional
+
+from config import AUDIO_CACHE_MAX_MB, AUDIO_DIR
+
+logger = logging.getLogger(__name__)
+
+
+class LocalAudioCache:
+    """LRU index over the audio files of one directory, by file stem."""
+
+    def __init__(self, directory: Path = AUDIO_DIR, max_bytes: int = AUDIO_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._files: Optional[OrderedDict[str, int]] = None  # file name → bytes, LRU first
+        self._bytes = 0
+        self._pinned: set[str] = set()  # stems
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _index(self) -> OrderedDict[str, int]:
+        """Scan the directory on first use, oldest files first. Caller holds the lock."""
+        if self._files is None:
+            found = []
+            for path in self.directory.iterdir():
+                if path.name.startswith(".") and path.name.endswith(".part"):
+                    path.unlink(missing_ok=True)  # download interrupted by a restart
+                elif path.is_file() and not path.name.startswith("."):
+                    st = path.stat()
+                    found.append((st.st_mtime, path.name, st.st_size))
+            self._files = OrderedDict((name, size) for _, name, size in sorted(found))
+            self._bytes = sum(self._files.values())
+            logger.info(f"Audio cache: {len(self._files)} files, {self._bytes // (1024 * 1024)} MB")
+        return self._files
+
+    def lookup(self, stem: str, suffixes: Iterable[str]) -> Optional[Path]:
+        """Cached file `stem` + the first suffix present, marked as recently used."""
+        with self._lock:
+            files = self._index()
+            for suffix in suffixes:
+                name = f"{stem}{suffix}"
+                if name not in files:
+                    continue
+                path = self.directory / name
+                if not path.exists():  # deleted behind our back
+                    self._bytes -= files.pop(name)
+                    continue
+                files.move_to_end(name)
+                self.hits += 1
+                return path
+            self.misses += 1
+            return None
+
+    def add(self, path: Path) -> None:
+        """Register a file just written to the directory, then evict overflow."""
+        size = path.stat().st_size
+        with self._lock:
+            files = self._index()
+            self._bytes += size - files.pop(path.name, 0)
+            files[path.name] = size
+            self._evict(keep=path.name)
+
+    def pin(self, stems: Iterable[str]) -> None:
+        """Replace the set of pinned file stems (audio with pending deliveries)."""
+        with self._lock:
+            self._pinned = set(stems)
+
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used files until under budget. Caller holds the lock."""
+        if self._bytes <= self.max_bytes:
+            return
+        for name in list(self._files):
+            if self._bytes <= self.max_bytes:
+                break
+            if name == keep or Path(name).stem in self._pinned:
+                continue
+            try:
+                (self.directory / name).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Could not delete audio file {name}: {e}")
+                continue
+            self._bytes -= self._files.pop(name)
+            self.evictions += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            files = self._index()
+            lookups = self.hits + self.misses
+            return {
+                "files": len(files),
+                "mb": round(self._bytes / (1024 * 1024), 1),
+                "max_mb": round(self.max_bytes / (1024 * 1024)),
+                "pinned": len(self._pinned),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
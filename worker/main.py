@@ -11,21 +11,31 @@ Three concurrent loops:
 import asyncio
 import logging
 import re
+import time
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
+from typing import Optional
 
-import aiohttp
-
-from config import RSS_CHECK_INTERVAL, TELEGRAM_BOT_TOKEN, SUPABASE_URL, ADMIN_TELEGRAM_CHAT_ID, MAX_CONCURRENT_VIDEOS
+from config import (
+    RSS_CHECK_INTERVAL, TELEGRAM_BOT_TOKEN, SUPABASE_URL, ADMIN_TELEGRAM_CHAT_ID,
+    MAX_CONCURRENT_VIDEOS, GROQ_DAILY_QUOTA_SECONDS, GEMINI_MAP_REDUCE_TOKENS,
+    STREAMING_TTS, DEFAULT_TTS_VOICE, DELIVERY_BATCH_SIZE,
+)
 from transcript_extractor import TranscriptExtractor
-from gemini_api import GeminiSummarizer
-from text_cleaner import clean_for_tts
-from tts_processor import text_to_audio, cleanup_audio_files
-from telegram_deliverer import send_audio_to_user
+from gemini_api import GeminiSummarizer, SummaryResult
+from summary_cache import summary_cache
+from text_cleaner import SentenceSplitter, clean_for_tts
+from tts_processor import text_stream_to_audio
+from audio_artifacts import ArtifactKey, audio_artifacts
+from storage_uploader import storage_uploader
+from telegram_deliverer import SendResult, send_audio_to_user
+from delivery_scheduler import delivery_scheduler
+from status_buffer import status_buffer
 from bot_handler import create_bot_application, MonitoringAlert, send_daily_report
-from monitoring import stats
+from monitoring import loop_lag, stats
+from groq_quota import groq_quota
 import rss_scanner
-import db
+import db_async
 from datetime import datetime, time as datetime_time
 
 # ── Logging ────────────────────────────────────────────────────
@@ -82,8 +92,9 @@ async def rss_loop(alert_system: MonitoringAlert):
             error_msg = str(e)
             logger.error(f"RSS loop error: {error_msg}")
             if "Server disconnected" in error_msg or "ConnectionTerminated" in error_msg:
-                logger.warning("Supabase connection issue in RSS loop - resetting client")
-                db.reset_client()
+                # A write on a closed connection (reads are resent by the
+                # pool, supabase_pool.py) — the next scan uses a fresh one
+                logger.warning("Supabase connection issue in RSS loop - retrying next scan")
             else:
                 await alert_system.send_alert(
                     f"RSS Scanner error: {error_msg}",
@@ -95,13 +106,142 @@ async def rss_loop(alert_system: MonitoringAlert):
 
 # ── Processor: single video ────────────────────────────────────
 
+async def _stream_variant(
+    video_id: str,
+    transcript: str,
+    source_lang: str,
+    language: str,
+    voice: str | None,
+    gemini_summarizer: GeminiSummarizer,
+) -> tuple[SummaryResult, Path | None]:
+    """Stream one summary from Gemini straight into TTS: each sentence group
+    is cleaned and synthesized while the rest is still being generated.
+
+    Returns (result, audio_path) — audio_path is None if the summary or the
+    audio failed (the caller falls back to the non-streaming path).
+    """
+    splitter = SentenceSplitter()
+    segments: asyncio.Queue[str | None] = asyncio.Queue()
+
+    def on_text(text: str) -> None:
+        for segment in splitter.feed(text):
+            segments.put_nowait(clean_for_tts(segment))
+
+    async def segment_stream():
+        while (segment := await segments.get()) is not None:
+            yield segment
+
+    tts = asyncio.create_task(text_stream_to_audio(
+        segment_stream(), voice=voice,
+        output_filename=ArtifactKey.of(video_id, language, voice).stem,
+    ))
+    try:
+        result = await gemini_summarizer.summarize_stream_async(
+            transcript, source_lang, language, on_text
+        )
+    except BaseException:
+        tts.cancel()
+        raise
+    if not result.summary:
+        tts.cancel()
+        return result, None
+
+    for segment in splitter.flush():
+        segments.put_nowait(clean_for_tts(segment))
+    segments.put_nowait(None)
+    try:
+        return result, await tts
+    except Exception as e:
+        logger.warning(f"[{video_id}] Streamed audio failed for {language}: {e}")
+        return result, None
+
+
+async def _summarize_variants(
+    video_id: str,
+    transcript: str,
+    source_lang: str,
+    voices: dict[str, str | None],
+    gemini_summarizer: GeminiSummarizer,
+) -> tuple[dict[str, str], dict[str, Path], str | None]:
+    """Summaries of one transcript in each language of `voices`, from the
+    summary cache when possible and from a single batched Gemini call
+    otherwise. With STREAMING_TTS, missing summaries are streamed into TTS
+    instead (languages whose stream fails go through the batch).
+
+    Returns ({language: summary}, {language: audio already synthesized},
+    first_error) — languages that failed are missing from the first dict.
+    """
+    summaries: dict[str, str] = {}
+    missing: list[str] = []
+    for lang in voices:
+        cached = await asyncio.to_thread(
+            summary_cache.get,
+            transcript, lang,
+            GeminiSummarizer.PROMPT_VERSION, gemini_summarizer.MODELS,
+        )
+        stats.record_summary_cache(cached is not None, cached.tokens if cached else 0)
+        if cached:
+            summaries[lang] = cached.summary
+            logger.info(
+                f"[{video_id}] Summary cache hit: {lang} "
+                f"({cached.model}, {cached.tokens} tokens saved)"
+            )
+        else:
+            missing.append(lang)
+
+    generated: dict[str, SummaryResult] = {}
+    audio_paths: dict[str, Path] = {}
+    if (
+        missing
+        and STREAMING_TTS
+        and gemini_summarizer.estimate_tokens(transcript) <= GEMINI_MAP_REDUCE_TOKENS
+    ):
+        logger.info(f"[{video_id}] Streaming summary + audio: {', '.join(missing)}...")
+        outcomes = await asyncio.gather(*(
+            _stream_variant(video_id, transcript, source_lang, lang, voices[lang], gemini_summarizer)
+            for lang in missing
+        ))
+        for lang, (result, audio_path) in zip(missing, outcomes):
+            if result.summary:
+                generated[lang] = result
+                if audio_path:
+                    audio_paths[lang] = audio_path
+            else:
+                logger.warning(
+                    f"[{video_id}] Streamed summary failed for {lang} ({result.error}), "
+                    f"retrying without streaming"
+                )
+        missing = [lang for lang in missing if lang not in generated]
+
+    if missing:
+        logger.info(f"[{video_id}] Generating summary: {', '.join(missing)}...")
+        generated.update(await gemini_summarizer.summarize_languages_async(
+            transcript, source_lang, missing
+        ))
+
+    error = None
+    for lang, result in generated.items():
+        if not result.summary:
+            logger.warning(f"[{video_id}] Summary failed for {lang}: {result.error}")
+            error = error or result.error
+            continue
+        summaries[lang] = result.summary
+        await asyncio.to_thread(
+            summary_cache.put,
+            transcript, lang, GeminiSummarizer.PROMPT_VERSION,
+            result.model, result.summary, result.tokens,
+        )
+    return summaries, audio_paths, error
+
+
 async def _process_video(
     job: dict,
     transcript_extractor: TranscriptExtractor,
     gemini_summarizer: GeminiSummarizer,
     alert_system: MonitoringAlert,
 ) -> None:
-    """Process one video job: transcript → Gemini summary → TTS → upload → mark done."""
+    """Process one video job: transcript → Gemini summaries (one per recipient
+    language) → TTS → upload → mark done."""
     video_id = job["video_id"]
     youtube_url = job["youtube_url"]
     video_title = job.get("video_title", video_id)
@@ -110,7 +250,7 @@ async def _process_video(
     logger.info(f"[{video_id}] Processing: {video_title}")
 
     try:
-        user_language = job.get("user_language", "fr")
+        user_language = job.get("user_language") or "fr"
         tts_voice = job.get("tts_voice") or None
 
         # Step 1: Extract transcript
@@ -118,7 +258,8 @@ async def _process_video(
         transcript, source_lang, error, transcript_cost = await asyncio.to_thread(
             transcript_extractor.get_transcript,
             youtube_url,
-            preferred_languages=[user_language, 'fr', 'en']
+            preferred_languages=[user_language, 'fr', 'en'],
+            priority=job.get("priority") or 0,
         )
 
         # ── Post-transcript alerts ──────────────────────────────────────
@@ -135,39 +276,45 @@ async def _process_video(
                 level="WARNING",
             )
 
-        # Track Groq usage and alert on quota milestones
+        # Alert on quota milestones (usage is recorded by the Groq quota ledger)
         if transcript_cost > 0:
-            groq_seconds = (transcript_cost / 0.00067) * 60
-            stats.record_groq_usage(groq_seconds, transcript_cost)
             if stats.groq_quota_pct >= 80 and not stats.groq_alert_80_sent:
                 stats.groq_alert_80_sent = True
                 await alert_system.send_alert(
                     f"⚠️ **Quota Groq à {stats.groq_quota_pct:.0f}%**\n\n"
-                    f"Utilisé : {stats.groq_seconds_today:.0f} / 28800s\n"
+                    f"Utilisé : {stats.groq_seconds_today:.0f} / {GROQ_DAILY_QUOTA_SECONDS}s\n"
                     f"Coût du jour : ${stats.groq_cost_today:.3f}\n"
                     "Reset à minuit UTC.",
                     level="WARNING",
                 )
 
-        # Alert on Groq rate-limit 429 (quota exhausted)
-        if error and ("rate_limit_exceeded" in error or "429" in error):
+        # Alert when Groq refused on its daily audio-seconds limit (quota exhausted)
+        groq_exhausted = bool(error) and error.startswith("groq_quota_exhausted")
+        if groq_exhausted:
             m = re.search(r"Used (\d+), Requested (\d+)", error)
             quota_info = ""
             if m:
                 used, req = int(m.group(1)), int(m.group(2))
-                quota_info = f"\n{used}/{used + req}s utilisés ({used/28800*100:.0f}%)"
+                quota_info = f"\n{used}/{used + req}s utilisés ({used/GROQ_DAILY_QUOTA_SECONDS*100:.0f}%)"
             await alert_system.send_alert(
                 f"🔴 **Quota Groq épuisé**{quota_info}\n\n"
-                "Les vidéos sans transcript YouTube échoueront jusqu'au reset "
-                "à minuit UTC.",
+                "Les vidéos sans transcript YouTube sont reportées au reset "
+                "à minuit UTC (sauf si LOCAL_WHISPER_MODEL est configuré).",
                 level="ERROR",
             )
 
         if not transcript:
+            if error == "groq_quota_deferred" or groq_exhausted:
+                # Not a failure: wait for the quota without using an attempt —
+                # until the reset, or the end of a per-minute / per-hour pause
+                resume = groq_quota.resume_at()
+                logger.info(f"[{video_id}] Groq quota full — deferred to {resume:%Y-%m-%d %H:%M} UTC")
+                await db_async.defer_job(job["id"], resume)
+                return
             logger.error(f"[{video_id}] Transcript extraction failed: {error}")
             if TranscriptExtractor.should_retry(error):
                 logger.info(f"[{video_id}] Will retry later")
-                db.fail_job(job["id"])
+                await db_async.fail_job(job["id"])
             else:
                 raise Exception(f"Transcript extraction failed: {error}")
             return
@@ -177,56 +324,72 @@ async def _process_video(
             f"lang: {source_lang}, cost: ${transcript_cost:.4f}"
         )
 
-        # Step 2: Summarize
-        logger.info(f"[{video_id}] Generating summary...")
-        summary, summary_error = await asyncio.to_thread(
-            gemini_summarizer.summarize,
-            transcript=transcript,
-            source_language=source_lang,
-            target_language=user_language,
+        # Step 2: Summarize in every language the video's recipients need
+        voices = await db_async.get_delivery_languages(video_id)
+        languages = list(dict.fromkeys([user_language, *voices]))
+        variant_voices = {
+            lang: (tts_voice if lang == user_language else None) or next(iter(voices.get(lang) or []), None)
+            for lang in languages
+        }
+        summaries, streamed_audio, summary_error = await _summarize_variants(
+            video_id, transcript, source_lang, variant_voices, gemini_summarizer
         )
-
+        summary = summaries.get(user_language)
         if not summary:
             raise Exception(f"Summary generation failed: {summary_error}")
 
-        logger.info(f"[{video_id}] Summary: {len(summary)} chars")
-
-        # Step 3: Clean + TTS
-        clean_summary = clean_for_tts(summary)
-        logger.info(f"[{video_id}] Generating audio...")
-        audio_path = await text_to_audio(
-            clean_summary,
-            voice=tts_voice,
-            output_filename=f"video_{video_id}"
+        logger.info(
+            f"[{video_id}] Summary: {len(summary)} chars"
+            + (f" (+ {', '.join(lang for lang in summaries if lang != user_language)})"
+               if len(summaries) > 1 else "")
         )
 
-        # Step 4: Upload to Supabase Storage
-        audio_url = ""
-        try:
-            sb = db.get_client()
-            with open(audio_path, "rb") as f:
-                storage_path = f"audio/{video_id}.mp3"
-                sb.storage.from_("audio").upload(
-                    storage_path,
-                    f.read(),
-                    {"content-type": "audio/mpeg", "upsert": "true"},
-                )
-            audio_url = sb.storage.from_("audio").get_public_url(storage_path)
-        except Exception as e:
-            logger.warning(f"[{video_id}] Storage upload failed (using local): {e}")
-            audio_url = str(audio_path)
-
-        # Step 5: Mark done
-        db.mark_video_completed(
-            video_id, summary, audio_url,
+        # Step 3+4: Clean + TTS (unless streamed) + upload each variant, in
+        # the primary voice of its language (audio_artifacts.py)
+        audio_urls = dict(zip(summaries, await asyncio.gather(*(
+            audio_artifacts.ensure(
+                ArtifactKey.of(video_id, lang, variant_voices[lang]), text, streamed_audio.get(lang)
+            )
+            for lang, text in summaries.items()
+        ))))
+
+        # Other recipients' voices ahead of time — best effort, the delivery
+        # loop synthesizes any that are still missing
+        primary = {ArtifactKey.of(video_id, lang, variant_voices[lang]) for lang in summaries}
+        extra = list(dict.fromkeys(
+            key
+            for lang in summaries
+            for key in (ArtifactKey.of(video_id, lang, voice) for voice in voices.get(lang) or [])
+            if key not in primary
+        ))
+        for key, outcome in zip(extra, await asyncio.gather(
+            *(audio_artifacts.ensure(key, summaries[key.language]) for key in extra),
+            return_exceptions=True,
+        )):
+            if isinstance(outcome, Exception):
+                logger.warning(f"[{video_id}] Audio for {key.language}/{key.voice} failed: {outcome}")
+
+        # Step 5: Mark done — variants, video and job in one transaction, so
+        # deliveries never see the completed video without its variants
+        await db_async.complete_video_job(
+            job["id"], video_id, summary, audio_urls[user_language],
             metadata={
                 "transcript_cost": transcript_cost,
                 "transcript_length": len(transcript),
                 "source_language": source_lang,
                 "summary_length": len(summary),
-            }
+                "summary_languages": list(summaries),
+            },
+            variants=[
+                {
+                    "language": lang,
+                    "summary": text,
+                    "audio_url": audio_urls[lang],
+                    "tts_voice": variant_voices[lang],
+                }
+                for lang, text in summaries.items()
+            ],
         )
-        db.complete_job(job["id"])
 
         processing_time = (datetime.now() - start_time).total_seconds()
         stats.record_video_processed(processing_time)
@@ -245,16 +408,14 @@ async def _process_video(
 
     except asyncio.TimeoutError:
         logger.error(f"[{video_id}] Timeout")
-        db.fail_job(job["id"])
-        db.mark_video_failed(video_id)
+        await db_async.fail_job(job["id"], fail_video=True)
         stats.record_video_failed("Timeout", f"Timeout: {video_title}")
         await alert_system.send_alert(f"⏱️ **Timeout**\n\n{video_title[:80]}", level="WARNING")
 
     except Exception as e:
         error_msg = str(e)
         logger.error(f"[{video_id}] Error: {error_msg}")
-        db.fail_job(job["id"])
-        db.mark_video_failed(video_id)
+        await db_async.fail_job(job["id"], fail_video=True)
         stats.record_video_failed(type(e).__name__, error_msg)
         await alert_system.send_alert(
             f"🔴 **Error**\n\nVideo: {video_title[:60]}\nError: {error_msg[:100]}",
@@ -296,7 +457,7 @@ async def processor_loop(alert_system: MonitoringAlert):
 
             # Serialize job picking — prevents two concurrent tasks picking the same row
             async with _pick_lock:
-                job = await asyncio.to_thread(db.pick_next_job)
+                job = await db_async.pick_next_job()
 
             if not job:
                 semaphore.release()
@@ -314,8 +475,7 @@ async def processor_loop(alert_system: MonitoringAlert):
                 except asyncio.TimeoutError:
                     logger.error(f"[{j['video_id']}] Timed out after {VIDEO_TIMEOUT}s — marking failed")
                     try:
-                        db.fail_job(j["id"])
-                        db.mark_video_failed(j["video_id"])
+                        await db_async.fail_job(j["id"], fail_video=True)
                     except Exception:
                         pass
                 finally:
@@ -334,21 +494,91 @@ async def processor_loop(alert_system: MonitoringAlert):
 
 # ── Loop 3: Telegram Deliverer ─────────────────────────────────
 
+def _artifact_key(d: dict) -> ArtifactKey:
+    return ArtifactKey.of(d["video_id"], d.get("summary_language"), d.get("tts_voice"))
+
+
+async def _send_delivery(d: dict, key: ArtifactKey, known_url: Optional[str]) -> SendResult:
+    """Send the audio of `key`, by Telegram file_id once an earlier delivery
+    uploaded it (no upload, no download), and remember new file_ids."""
+    voice_id, photo_id = await audio_artifacts.telegram_ids(key)
+    audio_path = None if voice_id else await audio_artifacts.get(key, d["summary"], known_url)
+
+    result = await send_audio_to_user(
+        chat_id=d["chat_id"],
+        audio_path=audio_path,
+        video_title=d["video_title"],
+        video_id=d["video_id"],
+        channel_id=d["channel_id"],
+        voice_file_id=voice_id,
+        photo_file_id=photo_id,
+        load_audio=lambda: audio_artifacts.get(key, d["summary"], known_url),
+    )
+    if result.voice_refused or result.photo_refused:
+        # Only the refused file_id — the next chats upload that file again
+        audio_artifacts.forget_telegram_ids(key, voice=result.voice_refused, photo=result.photo_refused)
+    if result.ok:
+        await audio_artifacts.remember_telegram_ids(key, result.voice_file_id, result.photo_file_id)
+    return result
+
+
+async def _deliver(d: dict) -> None:
+    """Send one delivery and record its outcome (run by the scheduler)."""
+    try:
+        video_id = d["video_id"]
+        if not d.get("summary"):
+            logger.warning(f"No audio for {video_id}")
+            await status_buffer.record(d["delivery_id"], "failed")
+            return
+
+        # Audio in the recipient's language variant and voice —
+        # local file, Storage, or synthesized once for everyone
+        # with this voice
+        key = _artifact_key(d)
+        known_url = d.get("audio_url") if (
+            d.get("summary_language")
+            and (d.get("audio_voice") or DEFAULT_TTS_VOICE) == key.voice
+        ) else None
+
+        # The first recipient uploads the audio; chats sent to concurrently
+        # wait for its file_id rather than uploading it too
+        async with audio_artifacts.first_upload(key):
+            result = await _send_delivery(d, key, known_url)
+        # Journaled, written in bulk by status_buffer — the delivery is never
+        # fetched (and sent) again meanwhile, even if the write is delayed
+        if result.ok:
+            await status_buffer.record(d["delivery_id"], "sent")
+            stats.record_delivery_sent()
+        else:
+            await status_buffer.record(d["delivery_id"], "failed")
+            stats.record_delivery_failed()
+
+    except Exception as e:
+        logger.error(f"Delivery error: {e}")
+        await status_buffer.record(d["delivery_id"], "failed")
+
+
 async def delivery_loop(alert_system: MonitoringAlert):
-    """Send completed audio to subscribed users."""
+    """Send completed audio to subscribed users.
+
+    Fetches pending deliveries and hands them to the delivery scheduler
+    (per-chat lanes sent concurrently, see delivery_scheduler.py). The next
+    fetch happens once the queue has room again, while the rest is sending.
+    """
     logger.info("Telegram Deliverer started")
 
     _cleanup_counter = 0  # Run cleanup every N cycles
+    _connection_errors = 0  # consecutive loops failed by a connection error
 
     while True:
         try:
             # Periodically clean up undeliverable deliveries (failed videos /
             # disconnected users) so they don't block the queue.
             _cleanup_counter += 1
-            if _cleanup_counter >= 20:  # every ~5 min (20 × 15s sleep)
+            if _cleanup_counter >= 20:  # every ~5 min when idle (20 × 15s sleep)
                 _cleanup_counter = 0
                 try:
-                    cleaned = await asyncio.to_thread(db.cleanup_undeliverable_deliveries)
+                    cleaned = await db_async.cleanup_undeliverable_deliveries()
                     if cleaned:
                         logger.info(f"Cleaned up {cleaned} undeliverable deliveries")
                 except Exception as e:
@@ -359,100 +589,53 @@ async def delivery_loop(alert_system: MonitoringAlert):
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    deliveries = db.get_pending_deliveries(limit=10)
+                    # Deliveries finished after this may still read as pending
+                    fetched_at = time.monotonic()
+                    deliveries = await db_async.get_pending_deliveries(limit=DELIVERY_BATCH_SIZE)
                     break
                 except Exception as e:
                     if attempt < max_retries - 1:
                         logger.warning(f"Delivery fetch failed (attempt {attempt + 1}/{max_retries}): {e}")
-                        db.reset_client()  # Force reconnect before retry
                         await asyncio.sleep(2 ** attempt)  # Exponential backoff
                     else:
                         raise
 
-            for d in deliveries:
-                try:
-                    video_id = d["video_id"]
-                    audio_url = d.get("audio_url", "")
-
-                    # Get or download audio file
-                    audio_path = Path(__file__).parent / "audio" / f"video_{video_id}.mp3"
-
-                    if not audio_path.exists() and audio_url and audio_url.startswith("http"):
-                        # Download from Supabase Storage
-                        async with aiohttp.ClientSession() as session:
-                            async with session.get(audio_url) as resp:
-                                if resp.status == 200:
-                                    audio_path.parent.mkdir(exist_ok=True)
-                                    with open(audio_path, "wb") as f:
-                                        f.write(await resp.read())
-
-                    if not audio_path.exists():
-                        # Regenerate audio from summary
-                        if d.get("summary"):
-                            voice = d.get("tts_voice") or None
-                            audio_path = await text_to_audio(
-                                d["summary"], voice=voice, output_filename=f"video_{video_id}"
-                            )
-                        else:
-                            logger.warning(f"No audio for {video_id}")
-                            db.mark_delivery_failed(d["delivery_id"])
-                            continue
-
-                    # Send to user
-                    success = await send_audio_to_user(
-                        chat_id=d["chat_id"],
-                        audio_path=audio_path,
-                        video_title=d["video_title"],
-                        video_id=video_id,
-                        channel_id=d["channel_id"],
-                    )
-
-                    if success:
-                        # Retry marking as sent to survive transient Supabase
-                        # errors — a failure here would leave the delivery
-                        # "pending" and cause a re-send on the next cycle.
-                        for _attempt in range(3):
-                            try:
-                                db.mark_delivery_sent(d["delivery_id"])
-                                stats.record_delivery_sent()
-                                break
-                            except Exception as mark_err:
-                                if _attempt < 2:
-                                    logger.warning(
-                                        f"mark_delivery_sent failed (attempt {_attempt + 1}/3): {mark_err}"
-                                    )
-                                    db.reset_client()
-                                    await asyncio.sleep(1)
-                                else:
-                                    logger.error(
-                                        f"Could not mark delivery {d['delivery_id']} as sent "
-                                        f"after 3 attempts — audio was already sent to user"
-                                    )
-                    else:
-                        db.mark_delivery_failed(d["delivery_id"])
-                        stats.record_delivery_failed()
+            # Sent or failed but not yet written (or written after this fetch
+            # started): may still read as "pending"
+            deliveries = [d for d in deliveries if d["delivery_id"] not in status_buffer]
+            status_buffer.fetched(fetched_at)
+            added = delivery_scheduler.submit(deliveries, _deliver, fetched_at)
 
-                    # Rate limit: 1 message per second
-                    await asyncio.sleep(1)
+            # Audio of the deliveries in flight must survive cache eviction
+            audio_artifacts.pin([_artifact_key(d) for d in delivery_scheduler.queued()])
 
-                except Exception as e:
-                    logger.error(f"Delivery error: {e}")
-                    db.mark_delivery_failed(d["delivery_id"])
+            _connection_errors = 0
 
-            if not deliveries:
+            if added:
+                # Fetch more once half the batch is out
+                await delivery_scheduler.wait_below(max(1, DELIVERY_BATCH_SIZE // 2))
+            elif len(delivery_scheduler):
+                # Everything pending is already queued — wait for it to drain
+                # (new deliveries are picked up after at most 15 s)
+                await delivery_scheduler.wait_below(1, timeout=15)
+            else:
                 await asyncio.sleep(15)
 
-            # Cleanup old audio files every cycle
-            cleanup_audio_files(max_age_hours=1)
-
         except Exception as e:
             error_msg = str(e)
             logger.error(f"Delivery loop error: {error_msg}")
 
             # Alert on persistent delivery errors
             if "Server disconnected" in error_msg or "ConnectionTerminated" in error_msg:
-                logger.warning("Supabase connection issue - resetting client and retrying")
-                db.reset_client()  # Drop stale connection so next iteration reconnects
+                # Stale connections are already dropped and resent by the
+                # pool; only a client failing loop after loop is rebuilt
+                _connection_errors += 1
+                if _connection_errors >= 3:
+                    logger.warning("Supabase connection keeps failing - resetting client")
+                    db_async.reset_client()
+                    _connection_errors = 0
+                else:
+                    logger.warning("Supabase connection issue - retrying")
                 await asyncio.sleep(10)
             else:
                 await alert_system.send_alert(
@@ -509,12 +692,18 @@ async def main():
             level="INFO"
         )
 
+    # Outcomes of deliveries sent before a crash: written on the first flush,
+    # and never fetched for sending again
+    status_buffer.load()
+
     try:
         # Run all loops concurrently (including alert processor)
         tasks = [
             rss_loop(alert_system),
             processor_loop(alert_system),
             delivery_loop(alert_system),
+            status_buffer.run(),
+            loop_lag.run(),
         ]
 
         # Add alert processor if admin configured
@@ -524,6 +713,10 @@ async def main():
         await asyncio.gather(*tasks)
 
     finally:
+        # Write buffered delivery outcomes (kept in the journal if this fails)
+        if not await status_buffer.flush():
+            logger.warning(f"{len(status_buffer)} delivery outcomes left in the journal for next start")
+
         # Send shutdown alert
         if ADMIN_TELEGRAM_CHAT_ID:
             await alert_system.send_alert(
@@ -537,6 +730,9 @@ async def main():
         await bot_app.updater.stop()
         await bot_app.stop()
         await bot_app.shutdown()
+        await audio_artifacts.close()
+        await storage_uploader.close()
+        await db_async.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,222 @@
+"""
+Per-model health tracking and circuit breakers for the Gemini fallback list.
+
+GeminiSummarizer.MODELS used to be tried in fixed order, so while the first
+model was down every video waited for it to fail before falling back. Each
+model now has:
+- a rolling window of recent calls: success rate, latency, error classes
+- a circuit breaker: after GEMINI_BREAKER_FAILURES consecutive failures the
+  model is skipped for a cooldown (doubling on each re-open, capped), then
+  half-open — one probe call at a time decides whether it closes again
+- the configured order, kept: a model is only moved behind the healthy ones
+  while half-open, failing most of its recent calls, or clearly slower than
+  the fastest healthy model. A demoted model still gets a call at its own
+  place every _PROBE_INTERVAL seconds, so it can show it has recovered.
+
+Thread-safe: map-reduce and concurrent videos record from several threads.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from config import GEMINI_BREAKER_COOLDOWN, GEMINI_BREAKER_FAILURES
+
+# Recent calls kept per model for the success rate / error breakdown
+_WINDOW = 20
+# Smoothing of the latency average (weight of the newest call)
+_LATENCY_ALPHA = 0.3
+# A model is only judged failing / slow once it has this many calls
+_MIN_SAMPLES = 3
+_MAX_COOLDOWN = 900
+# Failing: more than half of its last _RECENT calls failed
+_RECENT = 5
+# Slow: smoothed latency over this many times the fastest healthy model's
+# (well above the normal gap between the flash and pro models)
+_SLOW_FACTOR = 4.0
+# How often a demoted model is tried at its configured place
+_PROBE_INTERVAL = 60
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def classify_error(error: Exception) -> str:
+    """Coarse error class: quota, server, client, timeout or other."""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if isinstance(code, int):
+        if code == 429:
+            return "quota"
+        if code >= 500:
+            return "server"
+        if code >= 400:
+            return "client"
+    msg = str(error).lower()
+    if isinstance(error, TimeoutError) or "timeout" in msg or "deadline" in msg:
+        return "timeout"
+    if "resource_exhausted" in msg or "429" in msg:
+        return "quota"
+    return "other"
+
+
+class _ModelState:
+    def __init__(self):
+        self.calls: deque[tuple[bool, Optional[str]]] = deque(maxlen=_WINDOW)
+        self.latency: Optional[float] = None  # smoothed seconds, successes only
+        self.successes = 0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_until = 0.0  # monotonic
+        self.cooldown = float(GEMINI_BREAKER_COOLDOWN)
+        self.probe_in_flight = False
+        self.next_probe = 0.0  # monotonic: when a demoted model is tried in place again
+
+    def failing(self) -> bool:
+        recent = list(self.calls)[-_RECENT:]
+        return len(recent) >= _MIN_SAMPLES and sum(not ok for ok, _ in recent) * 2 > len(recent)
+
+
+class ModelHealth:
+    """Health registry for a list of interchangeable models."""
+
+    def __init__(self, failure_threshold: int = GEMINI_BREAKER_FAILURES):
+        self.failure_threshold = max(1, failure_threshold)
+        self._lock = threading.Lock()
+        self._models: dict[str, _ModelState] = {}
+
+    def _get(self, model: str) -> _ModelState:
+        """Caller holds the lock."""
+        if model not in self._models:
+            self._models[model] = _ModelState()
+        return self._models[model]
+
+    def _refresh(self, m: _ModelState, now: float) -> None:
+        """OPEN → HALF_OPEN once the cooldown is over. Caller holds the lock."""
+        if m.state == OPEN and now >= m.opened_until:
+            m.state = HALF_OPEN
+            m.probe_in_flight = False
+
+    def _fastest(self) -> Optional[float]:
+        """Smoothed latency of the fastest healthy model. Caller holds the lock."""
+        return min(
+            (
+                m.latency for m in self._models.values()
+                if m.state == CLOSED and m.latency is not None
+                and m.successes >= _MIN_SAMPLES and not m.failing()
+            ),
+            default=None,
+        )
+
+    def _demoted(self, m: _ModelState, fastest: Optional[float]) -> bool:
+        """Half-open, failing or clearly slow. Caller holds the lock."""
+        if m.state == HALF_OPEN or m.failing():
+            return True
+        return (
+            fastest is not None and m.latency is not None
+            and m.successes >= _MIN_SAMPLES and m.latency > fastest * _SLOW_FACTOR
+        )
+
+    def order(self, models: list[str]) -> list[str]:
+        """Models worth trying now, in configured order.
+
+        Open circuits are skipped and demoted models (see _demoted) move
+        behind the others — except once every _PROBE_INTERVAL, when a demoted
+        model keeps its place for this call. If every circuit is open, the one
+        closest to its retry time is returned alone so a call is never
+        refused outright.
+        """
+        now = time.monotonic()
+        with self._lock:
+            states = []
+            for model in models:
+                m = self._get(model)
+                self._refresh(m, now)
+                if m.state == OPEN or (m.state == HALF_OPEN and m.probe_in_flight):
+                    continue
+                states.append((model, m))
+            if not states:
+                return [min(models, key=lambda x: self._models[x].opened_until)] if models else []
+            fastest = self._fastest()
+            healthy, demoted = [], []
+            for model, m in states:
+                if not self._demoted(m, fastest):
+                    healthy.append(model)
+                elif now >= m.next_probe:
+                    m.next_probe = now + _PROBE_INTERVAL
+                    healthy.append(model)
+                else:
+                    demoted.append(model)
+        return healthy + demoted
+
+    def begin(self, model: str) -> bool:
+        """Mark a call as started. False if the model is half-open and another
+        thread's probe is already in flight — skip it then."""
+        with self._lock:
+            m = self._get(model)
+            self._refresh(m, time.monotonic())
+            if m.state == HALF_OPEN:
+                if m.probe_in_flight:
+                    return False
+                m.probe_in_flight = True
+            return True
+
+    def abandon(self, model: str) -> None:
+        """A started call was cancelled by the caller — no outcome to record."""
+        with self._lock:
+            self._get(model).probe_in_flight = False
+
+    def record_success(self, model: str, latency: float) -> None:
+        with self._lock:
+            m = self._get(model)
+            m.calls.append((True, None))
+            m.successes += 1
+            m.latency = latency if m.latency is None else (
+                _LATENCY_ALPHA * latency + (1 - _LATENCY_ALPHA) * m.latency
+            )
+            m.consecutive_failures = 0
+            m.state = CLOSED
+            m.probe_in_flight = False
+            m.cooldown = float(GEMINI_BREAKER_COOLDOWN)
+
+    def record_failure(self, model: str, error_class: str, trip: bool = True) -> None:
+        """Record a failed call. trip=False for failures that say nothing about
+        the model's availability (e.g. an answer that was too short)."""
+        now = time.monotonic()
+        with self._lock:
+            m = self._get(model)
+            m.calls.append((False, error_class))
+            m.probe_in_flight = False
+            if not trip:
+                return
+            m.consecutive_failures += 1
+            if m.state == HALF_OPEN:
+                # Failed probe: back to open, wait twice as long
+                m.cooldown = min(m.cooldown * 2, _MAX_COOLDOWN)
+                m.state, m.opened_until = OPEN, now + m.cooldown
+            elif m.state == CLOSED and m.consecutive_failures >= self.failure_threshold:
+                m.state, m.opened_until = OPEN, now + m.cooldown
+
+    def snapshot(self) -> dict[str, dict]:
+        """Per-model state for monitoring."""
+        now = time.monotonic()
+        out: dict[str, dict] = {}
+        with self._lock:
+            for m in self._models.values():
+                self._refresh(m, now)
+            fastest = self._fastest()
+            for model, m in self._models.items():
+                errors: dict[str, int] = {}
+                for ok, error_class in m.calls:
+                    if not ok:
+                        errors[error_class] = errors.get(error_class, 0) + 1
+                ok_count = sum(ok for ok, _ in m.calls)
+                out[model] = {
+                    "state": m.state,
+                    "success_rate": round(ok_count / len(m.calls) * 100, 1) if m.calls else None,
+                    "latency_s": round(m.latency, 2) if m.latency is not None else None,
+                    "calls": len(m.calls),
+                    "demoted": self._demoted(m, fastest),
+                    "errors": errors,
+                    "retry_in_s": round(m.opened_until - now) if m.state == OPEN else 0,
+                }
+        return out
@@ -5,13 +5,18 @@ Tracks worker statistics, formats logs, and exposes system info.
 Alert delivery (MonitoringAlert) lives in bot_handler.py.
 """
 
+import asyncio
 import html as _html
 import logging
 import re
+import time
+from collections import deque
 from datetime import datetime, timezone
 from pathlib import Path
 import psutil
 
+from config import GROQ_DAILY_QUOTA_SECONDS
+
 logger = logging.getLogger(__name__)
 
 # ── Log formatting helpers (shared with log_bot.py and bot_handler.py) ────────
@@ -128,6 +133,11 @@ class WorkerStats:
         self.groq_alert_80_sent = False
         self.ip_block_alert_sent = False
 
+        # Gemini summary cache (summary_cache.py)
+        self.summary_cache_hits = 0
+        self.summary_cache_misses = 0
+        self.summary_tokens_saved = 0
+
     def record_video_processed(self, processing_time: float):
         """Record a successfully processed video."""
         self.videos_processed += 1
@@ -158,8 +168,8 @@ class WorkerStats:
         """Record a failed delivery."""
         self.deliveries_failed += 1
 
-    def record_groq_usage(self, audio_seconds: float, cost_usd: float) -> None:
-        """Track Groq Whisper usage, auto-resetting daily at midnight UTC."""
+    def _roll_groq_day(self) -> None:
+        """Reset the daily Groq counters and alerts at midnight UTC."""
         today = datetime.now(timezone.utc).date()
         if today != self._groq_day:
             self.groq_seconds_today = 0.0
@@ -167,13 +177,36 @@ class WorkerStats:
             self._groq_day = today
             self.groq_alert_80_sent = False
             self.ip_block_alert_sent = False
+
+    def record_groq_usage(self, audio_seconds: float, cost_usd: float) -> None:
+        """Track Groq Whisper usage, auto-resetting daily at midnight UTC."""
+        self._roll_groq_day()
         self.groq_seconds_today += audio_seconds
         self.groq_cost_today += cost_usd
 
+    def set_groq_usage(self, audio_seconds: float, cost_usd: float) -> None:
+        """Overwrite today's Groq usage with the totals from the DB ledger."""
+        self._roll_groq_day()
+        self.groq_seconds_today = audio_seconds
+        self.groq_cost_today = cost_usd
+
+    def record_summary_cache(self, hit: bool, tokens_saved: int = 0) -> None:
+        """Record a summary cache lookup (tokens_saved: tokens of the cached call)."""
+        if hit:
+            self.summary_cache_hits += 1
+            self.summary_tokens_saved += tokens_saved
+        else:
+            self.summary_cache_misses += 1
+
+    @property
+    def summary_cache_hit_rate(self) -> float:
+        lookups = self.summary_cache_hits + self.summary_cache_misses
+        return self.summary_cache_hits / lookups * 100 if lookups else 0.0
+
     @property
     def groq_quota_pct(self) -> float:
-        """Percentage of daily Groq free-tier quota used (limit: 28800s/day)."""
-        return min(self.groq_seconds_today / 28800 * 100, 100.0)
+        """Percentage of daily Groq free-tier quota used (GROQ_DAILY_QUOTA_SECONDS)."""
+        return min(self.groq_seconds_today / GROQ_DAILY_QUOTA_SECONDS * 100, 100.0)
 
     def get_uptime(self) -> str:
         """Get formatted uptime."""
@@ -210,6 +243,10 @@ class WorkerStats:
             "groq_seconds_today": round(self.groq_seconds_today, 1),
             "groq_cost_today": round(self.groq_cost_today, 4),
             "groq_quota_pct": round(self.groq_quota_pct, 1),
+            "summary_cache_hits": self.summary_cache_hits,
+            "summary_cache_misses": self.summary_cache_misses,
+            "summary_cache_hit_rate": round(self.summary_cache_hit_rate, 1),
+            "summary_tokens_saved": self.summary_tokens_saved,
         }
 
 
@@ -217,6 +254,45 @@ class WorkerStats:
 stats = WorkerStats()
 
 
+# ── Event loop lag ────────────────────────────────────────────────
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a sleeping task.
+
+    Every blocking call made on the loop (sync HTTP, disk I/O, CPU work)
+    delays every coroutine — deliveries, bot commands — by as long as it
+    runs; the overshoot of a short periodic sleep measures exactly that.
+    """
+
+    def __init__(self, interval: float = 0.5, window: int = 600):
+        self.interval = interval
+        self._samples: deque[float] = deque(maxlen=window)  # lag in seconds, newest last
+        self.max_lag = 0.0
+
+    async def run(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - started - self.interval)
+            self._samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def snapshot(self) -> dict:
+        """Lag over the last `window` samples (5 min by default), in ms."""
+        samples = sorted(self._samples)
+        if not samples:
+            return {"p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0, "max_ever_ms": 0.0}
+        return {
+            "p50_ms": round(samples[len(samples) // 2] * 1000, 1),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 1),
+            "max_ms": round(samples[-1] * 1000, 1),
+            "max_ever_ms": round(self.max_lag * 1000, 1),
+        }
+
+
+loop_lag = LoopLagMonitor()
+
+
 # ── System Information ────────────────────────────────────────────
 
 def get_system_info() -> dict:
@@ -0,0 +1,209 @@
+"""
+Token-bucket rate limiter shared by every external call site.
+
+Each external API has one or more named buckets (see BUCKETS): a bucket
+holds up to `capacity` units and refills at `capacity / period` units per
+second. A unit is whatever the budget is counted in — requests, Gemini
+tokens or audio seconds — so one mechanism covers requests/sec, tokens/min
+and audio-seconds/hour limits. A caller asks for `amount` units and waits
+until the bucket can cover them; a request larger than the whole bucket is
+let through once it is full and leaves the bucket in debt, so it is never
+refused outright.
+
+Backends:
+- local (default): in-process buckets, thread-safe
+- postgres (RATE_LIMIT_BACKEND=postgres): buckets marked `shared` live in the
+  rate_limit_buckets table and are taken through the take_rate_limit_tokens
+  RPC, so every worker process draws from one budget. If the RPC fails the
+  local bucket is used instead — a limiter outage never blocks the pipeline.
+
+Usable from both worlds:
+    rate_limiter.acquire("youtube")                      # worker threads
+    await rate_limiter.acquire_async("gemini_tokens", n)  # event loop
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from config import (
+    GEMINI_REQUESTS_PER_MINUTE,
+    GEMINI_TOKENS_PER_MINUTE,
+    GROQ_AUDIO_SECONDS_PER_HOUR,
+    GROQ_REQUESTS_PER_MINUTE,
+    RATE_LIMIT_BACKEND,
+    TELEGRAM_CHAT_MESSAGES_PER_SECOND,
+    TELEGRAM_MESSAGES_PER_SECOND,
+    YOUTUBE_REQUESTS_PER_MINUTE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Longest single sleep while waiting, so a bucket refilled by another process
+# (postgres backend) is noticed reasonably quickly
+_MAX_WAIT_STEP = 5.0
+
+
+class Bucket(NamedTuple):
+    """`capacity` units per `period` seconds. `shared` buckets use the
+    postgres backend when it is enabled; the others always stay local."""
+    capacity: float
+    period: float
+    shared: bool = True
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+
+# Named buckets. A capacity of 0 disables the bucket (acquire returns at once).
+BUCKETS: dict[str, Bucket] = {
+    "gemini": Bucket(GEMINI_REQUESTS_PER_MINUTE, 60),
+    "gemini_tokens": Bucket(GEMINI_TOKENS_PER_MINUTE, 60),
+    "groq": Bucket(GROQ_REQUESTS_PER_MINUTE, 60),
+    "groq_audio": Bucket(GROQ_AUDIO_SECONDS_PER_HOUR, 3600),
+    "youtube": Bucket(YOUTUBE_REQUESTS_PER_MINUTE, 60),
+    "telegram": Bucket(TELEGRAM_MESSAGES_PER_SECOND, 1),
+    # One bucket per chat ("telegram_chat:<chat_id>"), local only
+    "telegram_chat": Bucket(TELEGRAM_CHAT_MESSAGES_PER_SECOND, 1, shared=False),
+}
+
+
+class _LocalBuckets:
+    """In-process token buckets.
+
+    A bucket that has refilled to capacity is the same as a missing one, so
+    those are dropped every _PRUNE_INTERVAL seconds — per-chat keys would
+    otherwise accumulate for every chat ever sent to.
+    """
+
+    _PRUNE_INTERVAL = 60.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key → (tokens, monotonic time, monotonic time it is full again)
+        self._state: dict[str, tuple[float, float, float]] = {}
+        self._pruned_at = time.monotonic()
+
+    def _prune(self, now: float) -> None:
+        """Drop the buckets that are full again. Caller holds the lock."""
+        self._pruned_at = now
+        for key in [k for k, (_, _, full_at) in self._state.items() if full_at <= now]:
+            del self._state[key]
+
+    def take(self, key: str, amount: float, bucket: Bucket) -> float:
+        """Take `amount` units now and return 0, or return the seconds to
+        wait before trying again."""
+        now = time.monotonic()
+        need = min(amount, bucket.capacity)
+        with self._lock:
+            if now - self._pruned_at >= self._PRUNE_INTERVAL:
+                self._prune(now)
+            tokens, updated, _ = self._state.get(key, (bucket.capacity, now, now))
+            tokens = min(bucket.capacity, tokens + (now - updated) * bucket.rate)
+            wait = 0.0
+            if tokens >= need:
+                tokens -= amount
+            else:
+                wait = (need - tokens) / bucket.rate
+            self._state[key] = (tokens, now, now + (bucket.capacity - tokens) / bucket.rate)
+            return wait
+
+
+class _PostgresBuckets:
+    """Buckets in the rate_limit_buckets table, shared by all workers."""
+
+    def take(self, key: str, amount: float, bucket: Bucket) -> float:
+        import db  # late import: db pulls in the Supabase client
+
+        res = db.get_client().rpc("take_rate_limit_tokens", {
+            "p_name": key,
+            "p_amount": amount,
+            "p_capacity": bucket.capacity,
+            "p_rate": bucket.rate,
+        }).execute()
+        return float(res.data or 0.0)
+
+
+class RateLimiter:
+    """Named token buckets with sync and async acquire."""
+
+    def __init__(self, buckets: dict[str, Bucket], backend: str = "local"):
+        self.buckets = buckets
+        self._local = _LocalBuckets()
+        self._shared = _PostgresBuckets() if backend == "postgres" else None
+        self._lock = threading.Lock()
+        self._waited: dict[str, float] = {}  # bucket → total seconds callers waited
+        self._fallback_logged = False
+
+    def _bucket(self, name: str) -> Optional[Bucket]:
+        bucket = self.buckets.get(name)
+        if bucket is None:
+            raise KeyError(f"Unknown rate limit bucket: {name}")
+        return bucket if bucket.capacity > 0 and bucket.period > 0 else None
+
+    def _take(self, name: str, key: str, amount: float, bucket: Bucket) -> float:
+        if self._shared is not None and bucket.shared:
+            try:
+                return self._shared.take(key, amount, bucket)
+            except Exception as e:
+                if not self._fallback_logged:
+                    logger.warning(f"Shared rate limiter unavailable, using local buckets: {e}")
+                    self._fallback_logged = True
+        return self._local.take(key, amount, bucket)
+
+    def _record_wait(self, name: str, seconds: float) -> None:
+        if seconds > 0:
+            with self._lock:
+                self._waited[name] = self._waited.get(name, 0.0) + seconds
+
+    @staticmethod
+    def _key(name: str, key: Optional[str]) -> str:
+        return f"{name}:{key}" if key is not None else name
+
+    def acquire(self, name: str, amount: float = 1, key: Optional[str] = None) -> float:
+        """Block until bucket `name` (or its `key` sub-bucket) covers `amount`.
+        Returns the seconds waited."""
+        bucket = self._bucket(name)
+        if bucket is None or amount <= 0:
+            return 0.0
+        started = time.monotonic()
+        while True:
+            wait = self._take(name, self._key(name, key), amount, bucket)
+            if wait <= 0:
+                break
+            time.sleep(min(wait, _MAX_WAIT_STEP))
+        waited = time.monotonic() - started
+        self._record_wait(name, waited)
+        return waited
+
+    async def acquire_async(self, name: str, amount: float = 1, key: Optional[str] = None) -> float:
+        """acquire() for the event loop: waits with asyncio.sleep, and shared
+        buckets are taken off the loop (the RPC is a blocking HTTP call)."""
+        bucket = self._bucket(name)
+        if bucket is None or amount <= 0:
+            return 0.0
+        started = time.monotonic()
+        full_key = self._key(name, key)
+        while True:
+            if self._shared is not None and bucket.shared:
+                wait = await asyncio.to_thread(self._take, name, full_key, amount, bucket)
+            else:
+                wait = self._local.take(full_key, amount, bucket)
+            if wait <= 0:
+                break
+            await asyncio.sleep(min(wait, _MAX_WAIT_STEP))
+        waited = time.monotonic() - started
+        self._record_wait(name, waited)
+        return waited
+
+    def waited_seconds(self) -> dict[str, float]:
+        """Total seconds callers spent waiting, per bucket (monitoring)."""
+        with self._lock:
+            return {name: round(s, 1) for name, s in self._waited.items()}
+
+
+# Global instance shared by every API client in the worker
+rate_limiter = RateLimiter(BUCKETS, RATE_LIMIT_BACKEND)
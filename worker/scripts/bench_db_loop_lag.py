@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark Supabase queries from the event loop: throughput and event-loop lag.
+
+Runs the delivery loop's read queries (get_pending_deliveries,
+get_delivery_languages, count_on_demand_this_month) ROUNDS times, CONCURRENCY
+at once, three ways, and measures how late the event loop wakes a 10 ms
+ticker meanwhile (what deliveries and bot commands would suffer):
+- blocking: db.py called on the event loop (the old handlers)
+- thread:   db.py in worker threads (asyncio.to_thread)
+- async:    db_async.py (httpx.AsyncClient, no thread)
+
+Read-only: safe to run against production.
+Needs SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY (worker .env).
+
+Usage:
+    python scripts/bench_db_loop_lag.py
+    python scripts/bench_db_loop_lag.py --rounds 50 --concurrency 10 --modes thread async
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))  # worker/ directory
+
+import db
+import db_async
+from monitoring import LoopLagMonitor
+
+MODES = ("blocking", "thread", "async")
+_NO_USER = "00000000-0000-0000-0000-000000000000"
+
+
+async def queries(mode: str, video_id: str) -> None:
+    calls = [
+        ("get_pending_deliveries", (20,)),
+        ("get_delivery_languages", (video_id,)),
+        ("count_on_demand_this_month", (_NO_USER,)),
+    ]
+    for name, args in calls:
+        if mode == "blocking":
+            getattr(db, name)(*args)
+        elif mode == "thread":
+            await asyncio.to_thread(getattr(db, name), *args)
+        else:
+            await getattr(db_async, name)(*args)
+
+
+async def measure(mode: str, rounds: int, concurrency: int, video_id: str) -> tuple[float, dict]:
+    lag = LoopLagMonitor(interval=0.01, window=100_000)
+    ticker = asyncio.create_task(lag.run())
+    await asyncio.sleep(0.05)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with slots:
+            await queries(mode, video_id)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one() for _ in range(rounds)))
+    finally:
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.02)  # let the ticker record the last stall
+        ticker.cancel()
+    return elapsed, lag.snapshot()
+
+
+async def run(args) -> None:
+    # Warm both clients so connection setup is not measured
+    pending = await asyncio.to_thread(db.get_pending_deliveries, 1)
+    video_id = pending[0]["video_id"] if pending else "dQw4w9WgXcQ"
+    await db_async.get_client()
+
+    print(f"{args.rounds} rounds × 3 queries, {args.concurrency} at once")
+    print(f"{'mode':<9} {'time':>8} {'q/s':>7} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}")
+    try:
+        for mode in args.modes:
+            elapsed, lag = await measure(mode, args.rounds, args.concurrency, video_id)
+            print(
+                f"{mode:<9} {elapsed:>7.2f}s {args.rounds * 3 / elapsed:>7.1f} "
+                f"{lag['p50_ms']:>7.0f}ms {lag['p99_ms']:>7.0f}ms {lag['max_ms']:>7.0f}ms"
+            )
+    finally:
+        await db_async.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20, help="Query rounds per mode (default: 20)")
+    parser.add_argument("--concurrency", type=int, default=5, help="Rounds in flight at once (default: 5)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES),
+                        help="Query paths to compare (default: all)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark the local Whisper backend (faster-whisper, CPU int8) for capacity planning.
+
+Encodes each sample file the way the worker does (16 kHz mono Opus), then
+transcribes all of them at once through LocalWhisperBackend for every
+process/thread layout given. Reports throughput as audio-seconds per
+wall-second, total and per core, so you can size LOCAL_WHISPER_PROCESSES /
+LOCAL_WHISPER_THREADS against the audio you expect once Groq's quota is gone.
+
+The first run per model downloads it from Hugging Face; model load time is
+measured separately and excluded from throughput.
+
+Usage:
+    python scripts/bench_local_whisper.py samples/*.mp3
+    python scripts/bench_local_whisper.py talk.m4a --model medium --layouts 1x8 2x4 4x2
+    python scripts/bench_local_whisper.py talk.m4a --language fr --max-seconds 300
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))  # worker/ directory
+
+from audio_preprocess import detect_silences
+from config import LOCAL_WHISPER_MODEL
+from whisper_backends import LOCAL_WHISPER_AVAILABLE, LocalWhisperBackend
+from whisper_transcriber import WhisperTranscriber
+
+
+def encode(src: Path, dst: Path, max_seconds: int) -> float:
+    """Encode like the worker does; returns the encoded duration in seconds."""
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+            "-i", str(src), "-t", str(max_seconds),
+            *WhisperTranscriber._encode_args(),
+            str(dst),
+        ],
+        check=True,
+    )
+    _, duration = detect_silences(dst)
+    return duration or 0.0
+
+
+def parse_layout(layout: str) -> tuple[int, int]:
+    """'2x4' → (2 processes, 4 threads each)."""
+    processes, threads = layout.lower().split("x")
+    return int(processes), int(threads)
+
+
+def bench_layout(model: str, processes: int, threads: int, files: list[Path], language: str | None,
+                 audio_seconds: float) -> None:
+    backend = LocalWhisperBackend(model, processes, threads)
+    try:
+        # Warm-up: loads the model in every pool process
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=processes) as pool:
+            list(pool.map(lambda _: backend.transcribe_chunk(files[0], language), range(processes)))
+        load = time.monotonic() - started
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(files)) as pool:
+            list(pool.map(lambda f: backend.transcribe_chunk(f, language), files))
+        wall = time.monotonic() - started
+    finally:
+        backend.shutdown()
+
+    cores = processes * threads
+    rate = audio_seconds / wall if wall else 0.0
+    print(
+        f"{processes}x{threads:<6} {cores:>5} {load:>8.1f}s {wall:>8.1f}s "
+        f"{rate:>9.1f}x {rate / cores:>9.2f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", type=Path, help="Local audio/video sample files")
+    parser.add_argument("--model", default=LOCAL_WHISPER_MODEL or "small",
+                        help="faster-whisper model (default: LOCAL_WHISPER_MODEL or small)")
+    cores = os.cpu_count() or 1
+    parser.add_argument("--layouts", nargs="+", default=[f"1x{cores}", f"2x{max(1, cores // 2)}"],
+                        help="Process x thread layouts to compare (default: 1xN 2xN/2)")
+    parser.add_argument("--language", default=None, help="Force language (default: auto)")
+    parser.add_argument("--max-seconds", type=int, default=600,
+                        help="Only use the first N seconds of each file (default: 600)")
+    args = parser.parse_args()
+
+    if not LOCAL_WHISPER_AVAILABLE:
+        print("❌ faster-whisper is not installed: pip install faster-whisper")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory(prefix="brieftube_bench_") as tmp:
+        encoded: list[Path] = []
+        audio_seconds = 0.0
+        for i, path in enumerate(args.files):
+            if not path.exists():
+                print(f"❌ Not found: {path}")
+                continue
+            dst = Path(tmp) / f"sample_{i:03d}.ogg"
+            audio_seconds += encode(path, dst, args.max_seconds)
+            encoded.append(dst)
+        if not encoded:
+            sys.exit(1)
+
+        print(f"\nModel {args.model} — {len(encoded)} file(s), {audio_seconds / 60:.1f} min of audio\n")
+        print(f"{'layout':<8} {'cores':>5} {'load':>9} {'wall':>9} {'audio/s':>10} {'per core':>10}")
+        for layout in args.layouts:
+            processes, threads = parse_layout(layout)
+            bench_layout(args.model, processes, threads, encoded, args.language, audio_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark single-shot vs map-reduce Gemini summarization on long transcripts.
+
+Builds synthetic transcripts of the requested lengths (~150 spoken words per
+minute). Each one is a sequence of sections, each built around its own topic
+keyword, so the benchmark can check how much of the video the summary still
+covers. Every transcript is summarized both ways and the script reports
+wall time, total tokens (from Gemini's usage metadata), summary length and
+topic coverage. A real transcript can be passed with --transcript instead.
+
+Uses the real Gemini API (GEMINI_API_KEY) — each run spends tokens.
+
+Usage:
+    python scripts/bench_map_reduce.py
+    python scripts/bench_map_reduce.py --hours 2 4 --language en
+    python scripts/bench_map_reduce.py --transcript long_stream.txt --source-language fr
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))  # worker/ directory
+
+from gemini_api import GeminiSummarizer
+
+WORDS_PER_MINUTE = 150
+
+# Each section of the synthetic transcript is about one of these topics
+TOPICS = [
+    "volcano", "bakery", "satellite", "orchestra", "glacier", "vaccine", "chess",
+    "harbor", "beekeeping", "telescope", "marathon", "library", "submarine",
+    "vineyard", "robotics", "lighthouse", "cartography", "origami", "tornado",
+    "archaeology", "railway", "coral", "printing", "falconry", "desalination",
+    "typography", "avalanche", "perfume", "semaphore", "pottery",
+]
+
+_FILLER = [
+    "so basically what we want to look at here is",
+    "and I think that is really interesting because",
+    "if you remember what we said a bit earlier",
+    "now the important thing to understand is that",
+    "a lot of people ask me about this and",
+    "let me give you a concrete example of",
+]
+
+
+def synthetic_transcript(hours: float, seed: int = 0) -> tuple[str, list[str]]:
+    """Auto-caption-like text (no punctuation) of `hours` of speech.
+
+    Returns (transcript, topics in order of appearance).
+    """
+    rng = random.Random(seed)
+    target_words = int(hours * 60 * WORDS_PER_MINUTE)
+    sections = min(len(TOPICS), max(3, int(hours * 6)))
+    topics = rng.sample(TOPICS, sections)
+    words_per_section = target_words // sections
+
+    out: list[str] = []
+    for topic in topics:
+        section: list[str] = []
+        fact = 0
+        while len(section) < words_per_section:
+            fact += 1
+            section += rng.choice(_FILLER).split()
+            section += (
+                f"the {topic} point number {fact} is that the {topic} "
+                f"measurement reached {rng.randint(10, 999)} units in {rng.randint(1990, 2025)}"
+            ).split()
+        out += section[:words_per_section]
+    return " ".join(out), topics
+
+
+def coverage(summary: str, topics: list[str]) -> float:
+    text = summary.lower()
+    return sum(topic in text for topic in topics) / len(topics) if topics else 0.0
+
+
+def bench(
+    summarizer: GeminiSummarizer,
+    label: str,
+    transcript: str,
+    topics: list[str],
+    source_language: str,
+    language: str,
+) -> None:
+    tokens = summarizer.estimate_tokens(transcript)
+    parts = len(summarizer.split_transcript(transcript))
+    print(f"\n{'=' * 78}\n{label}: {len(transcript.split())} words, ~{tokens} tokens, {parts} part(s)\n{'=' * 78}")
+    print(f"{'mode':<12} {'time':>8} {'tokens':>9} {'words':>7} {'coverage':>9}  error")
+
+    for mode, map_reduce in (("single", False), ("map-reduce", True)):
+        started = time.perf_counter()
+        result = summarizer.summarize_with_usage(
+            transcript, source_language, language, map_reduce=map_reduce
+        )
+        elapsed = time.perf_counter() - started
+        words = len(result.summary.split()) if result.summary else 0
+        cov = f"{coverage(result.summary, topics) * 100:.0f}%" if result.summary and topics else "—"
+        print(
+            f"{mode:<12} {elapsed:>7.1f}s {result.tokens:>9} {words:>7} {cov:>9}  "
+            f"{result.error or ''}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", nargs="+", type=float, default=[1.0, 3.0, 6.0],
+                        help="Synthetic transcript lengths in hours of speech (default: 1 3 6)")
+    parser.add_argument("--transcript", type=Path, default=None,
+                        help="Benchmark this transcript file instead of synthetic ones")
+    parser.add_argument("--source-language", default="en", help="Transcript language (default: en)")
+    parser.add_argument("--language", default="fr", help="Summary language (default: fr)")
+    args = parser.parse_args()
+
+    summarizer = GeminiSummarizer()
+    if args.transcript:
+        if not args.transcript.exists():
+            print(f"❌ Not found: {args.transcript}")
+            return
+        text = args.transcript.read_text(encoding="utf-8")
+        bench(summarizer, args.transcript.name, text, [], args.source_language, args.language)
+        return
+
+    for hours in args.hours:
+        text, topics = synthetic_transcript(hours)
+        bench(summarizer, f"synthetic {hours:g}h", text, topics, args.source_language, args.language)
+
+
+if __name__ == "__main__":
+    main()
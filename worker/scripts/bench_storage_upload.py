@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark Supabase Storage uploads: throughput and event-loop lag.
+
+Uploads random files of each size three ways and measures, while each upload
+runs, how late the event loop wakes a 10 ms ticker (what deliveries and bot
+commands would suffer):
+- blocking:  supabase-py upload called on the event loop (the old step 4)
+- thread:    supabase-py upload in a worker thread, whole file in memory
+- streaming: storage_uploader.py (aiohttp, body streamed from disk,
+             resumable above STORAGE_RESUMABLE_MB)
+
+Files go to bench/ in the audio bucket and are deleted afterwards.
+Needs SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY (worker .env).
+
+Usage:
+    python scripts/bench_storage_upload.py
+    python scripts/bench_storage_upload.py --sizes 1 5 20 --modes thread streaming
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))  # worker/ directory
+
+import db
+from monitoring import LoopLagMonitor
+from storage_uploader import StorageUploader
+
+MODES = ("blocking", "thread", "streaming")
+
+
+def _sync_upload(path: Path, object_path: str) -> None:
+    db.get_client().storage.from_("audio").upload(
+        object_path, path.read_bytes(), {"content-type": "audio/ogg", "upsert": "true"}
+    )
+
+
+async def upload(mode: str, path: Path, object_path: str, uploader: StorageUploader) -> None:
+    if mode == "blocking":
+        _sync_upload(path, object_path)
+    elif mode == "thread":
+        await asyncio.to_thread(_sync_upload, path, object_path)
+    else:
+        await uploader.upload("audio", object_path, path, "audio/ogg")
+
+
+async def measure(mode: str, path: Path, object_path: str, uploader: StorageUploader) -> tuple[float, dict]:
+    lag = LoopLagMonitor(interval=0.01, window=100_000)
+    ticker = asyncio.create_task(lag.run())
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    try:
+        await upload(mode, path, object_path, uploader)
+    finally:
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.02)  # let the ticker record the last stall
+        ticker.cancel()
+    return elapsed, lag.snapshot()
+
+
+async def run(args) -> None:
+    uploader = StorageUploader()
+    uploaded: list[str] = []
+    print(f"{'size':>6} {'mode':<10} {'time':>8} {'MB/s':>7} {'lag p99':>9} {'lag max':>9}")
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench_upload_") as tmp:
+            for size_mb in args.sizes:
+                path = Path(tmp) / f"bench_{size_mb}mb.ogg"
+                path.write_bytes(b"OggS" + os.urandom(int(size_mb * 1024 * 1024) - 4))
+                for mode in args.modes:
+                    object_path = f"bench/{path.stem}_{mode}.ogg"
+                    try:
+                        elapsed, lag = await measure(mode, path, object_path, uploader)
+                    except Exception as e:
+                        print(f"{size_mb:>5g}M {mode:<10} ❌ {e}")
+                        continue
+                    uploaded.append(object_path)
+                    print(
+                        f"{size_mb:>5g}M {mode:<10} {elapsed:>7.2f}s {size_mb / elapsed:>7.2f} "
+                        f"{lag['p99_ms']:>7.0f}ms {lag['max_ms']:>7.0f}ms"
+                    )
+    finally:
+        if uploaded:
+            await asyncio.to_thread(db.get_client().storage.from_("audio").remove, uploaded)
+        await uploader.close()
+    print(f"\nStreaming stage: {uploader.snapshot()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=float, default=[1, 5, 20],
+                        help="File sizes in MB (default: 1 5 20)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES),
+                        help="Upload paths to compare (default: all)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
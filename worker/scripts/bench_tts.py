@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark serial vs sentence-parallel TTS against summary length.
+
+For each summary length, synthesizes the same text once through a single
+edge-tts stream (the old text_to_audio) and once through text_to_audio's
+segmented path for every concurrency level given. Reports wall time, the
+number of segments and the output size. A real summary can be passed with
+--text instead of the synthetic one.
+
+Uses the real edge-tts service (network, no API key).
+
+Usage:
+    python scripts/bench_tts.py
+    python scripts/bench_tts.py --words 300 800 1500 --concurrency 2 4 8
+    python scripts/bench_tts.py --text summary.txt --voice en-US-JennyNeural
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))  # worker/ directory
+
+import edge_tts
+
+import tts_processor
+from config import DEFAULT_TTS_VOICE
+
+_SENTENCES = [
+    "La vidéo commence par une présentation rapide du sujet et de son contexte.",
+    "L'auteur explique ensuite pourquoi ce problème concerne autant de personnes.",
+    "Plusieurs exemples concrets illustrent les difficultés rencontrées sur le terrain.",
+    "Les chiffres présentés montrent une progression nette au cours des dernières années.",
+    "Une méthode en trois étapes est proposée pour aborder la question sereinement.",
+    "Il insiste sur l'importance de mesurer les résultats avant de tirer des conclusions.",
+    "Enfin, il répond aux critiques les plus fréquentes avec des arguments précis.",
+]
+
+
+def synthetic_summary(words: int, seed: int = 0) -> str:
+    """French summary-like text of about `words` words, in paragraphs."""
+    rng = random.Random(seed)
+    paragraphs: list[str] = []
+    count = 0
+    while count < words:
+        paragraph = " ".join(rng.choice(_SENTENCES) for _ in range(5))
+        paragraphs.append(paragraph)
+        count += len(paragraph.split())
+    return "\n\n".join(paragraphs)
+
+
+async def serial(text: str, voice: str, out: Path) -> float:
+    started = time.perf_counter()
+    await edge_tts.Communicate(text, voice).save(str(out))
+    return time.perf_counter() - started
+
+
+async def segmented(text: str, voice: str, out_dir: Path, concurrency: int) -> tuple[float, int, Path]:
+    tts_processor._tts_slots = asyncio.Semaphore(concurrency)
+    tts_processor.AUDIO_DIR = out_dir
+    started = time.perf_counter()
+    path = await tts_processor.text_to_audio(text, voice, f"bench_c{concurrency}")
+    return time.perf_counter() - started, len(tts_processor.split_for_tts(text)), path
+
+
+async def bench(label: str, text: str, voice: str, levels: list[int]) -> None:
+    print(f"\n{'=' * 64}\n{label}: {len(text.split())} words, {len(text)} chars\n{'=' * 64}")
+    print(f"{'mode':<16} {'segments':>8} {'time':>8} {'speedup':>8} {'size':>9}")
+
+    with tempfile.TemporaryDirectory(prefix="bench_tts_") as tmp:
+        out_dir = Path(tmp)
+        out = out_dir / "serial.mp3"
+        base = await serial(text, voice, out)
+        print(f"{'serial':<16} {1:>8} {base:>7.1f}s {'1.0x':>8} {out.stat().st_size / 1024:>7.0f}KB")
+
+        for level in levels:
+            elapsed, segments, path = await segmented(text, voice, out_dir, level)
+            print(
+                f"{f'parallel x{level}':<16} {segments:>8} {elapsed:>7.1f}s "
+                f"{f'{base / elapsed:.1f}x':>8} {path.stat().st_size / 1024:>7.0f}KB"
+            )
+
+
+async def run(args) -> None:
+    if args.text:
+        if not args.text.exists():
+            print(f"❌ Not found: {args.text}")
+            return
+        await bench(args.text.name, args.text.read_text(encoding="utf-8"), args.voice, args.concurrency)
+        return
+    for words in args.words:
+        await bench(f"synthetic {words} words", synthetic_summary(words), args.voice, args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", nargs="+", type=int, default=[300, 800, 1500],
+                        help="Synthetic summary lengths in words (default: 300 800 1500)")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[2, 4, 8],
+                        help="Segment concurrency levels to compare (default: 2 4 8)")
+    parser.add_argument("--text", type=Path, default=None,
+                        help="Benchmark this summary file instead of synthetic ones")
+    parser.add_argument("--voice", default=DEFAULT_TTS_VOICE, help="TTS voice")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark Whisper preprocessing: billed minutes saved vs transcript drift.
+
+For each local sample file, transcribes a plain 16 kHz Opus encode (baseline)
+and one preprocessed variant per tempo, then reports the billed audio saved
+and the word error rate of each variant against the baseline transcript.
+
+Uses the real Groq API (GROQ_API_KEY) — each run spends quota.
+
+Usage:
+    python scripts/bench_whisper_preprocess.py samples/*.mp3
+    python scripts/bench_whisper_preprocess.py talk.m4a --tempo 1.0 1.25 1.5 --no-trim
+    python scripts/bench_whisper_preprocess.py talk.m4a --language fr --max-seconds 300
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))  # worker/ directory
+
+from audio_preprocess import preprocess_for_whisper
+from whisper_transcriber import WhisperTranscriber
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref = _WORD_RE.findall(reference.lower())
+    hyp = _WORD_RE.findall(hypothesis.lower())
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1] / len(ref)
+
+
+def encode_baseline(src: Path, dst: Path, transcriber: WhisperTranscriber, max_seconds: int) -> None:
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+            "-i", str(src), "-t", str(max_seconds),
+            *transcriber._encode_args(),
+            str(dst),
+        ],
+        check=True,
+    )
+
+
+def bench_file(
+    path: Path,
+    transcriber: WhisperTranscriber,
+    tempos: list[float],
+    trim: bool,
+    language: str | None,
+    max_seconds: int,
+) -> None:
+    print(f"\n{'=' * 70}\n{path.name}\n{'=' * 70}")
+    with tempfile.TemporaryDirectory(prefix="brieftube_bench_") as tmp:
+        baseline = Path(tmp) / "baseline.ogg"
+        encode_baseline(path, baseline, transcriber, max_seconds)
+        reference = transcriber.remote.transcribe_chunk(baseline, language)
+        ref_seconds = reference.billed_seconds
+
+        print(f"{'variant':<22} {'billed':>9} {'saved':>8} {'WER':>7}")
+        print(f"{'baseline':<22} {ref_seconds:>8.0f}s {'—':>8} {'—':>7}")
+
+        for tempo in tempos:
+            if tempo == 1.0 and not trim:
+                continue
+            out = Path(tmp) / f"pre_{tempo:g}.ogg"
+            audio, time_map = preprocess_for_whisper(
+                baseline, out, transcriber._encode_args(), tempo=tempo, trim_silence=trim
+            )
+            result = transcriber.remote.transcribe_chunk(audio, language, time_map)
+            billed = result.billed_seconds
+            saved = (1 - billed / ref_seconds) * 100 if ref_seconds else 0.0
+            wer = word_error_rate(reference.text, result.text)
+            label = f"{'trim + ' if trim else ''}{tempo:g}x"
+            print(f"{label:<22} {billed:>8.0f}s {saved:>7.0f}% {wer * 100:>6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", type=Path, help="Local audio/video sample files")
+    parser.add_argument("--tempo", nargs="+", type=float, default=[1.0, 1.25, 1.5, 1.75])
+    parser.add_argument("--no-trim", action="store_true", help="Benchmark tempo only, no silence removal")
+    parser.add_argument("--language", default=None, help="Force Whisper language (default: auto)")
+    parser.add_argument("--max-seconds", type=int, default=600,
+                        help="Only use the first N seconds of each file (default: 600)")
+    args = parser.parse_args()
+
+    transcriber = WhisperTranscriber()
+    for path in args.files:
+        if not path.exists():
+            print(f"❌ Not found: {path}")
+            continue
+        bench_file(path, transcriber, args.tempo, not args.no_trim, args.language, args.max_seconds)
+
+
+if __name__ == "__main__":
+    main()
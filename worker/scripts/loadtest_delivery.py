@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Load test of the delivery scheduler against a local fake Telegram Bot API.
+
+Starts an aiohttp server that answers sendPhoto / sendVoice like the Bot API
+and enforces Telegram's limits itself: a bot-wide message rate and a
+per-chat message rate, answering 429 with retry_after when either is
+exceeded. The real delivery path (delivery_scheduler + send_audio_to_user,
+with its rate limiter and flood control) then sends N deliveries spread over
+M chats: the first one uploads a small audio file, the rest reuse its
+file_id as in production. No database, no network.
+
+Reports deliveries/s, messages/s, the 429s the server had to send, and
+whether every chat received its deliveries in submission order.
+--retry-after makes the server refuse the first message to one chat with
+that many seconds, to check that only that chat waits.
+
+Usage:
+    python scripts/loadtest_delivery.py
+    python scripts/loadtest_delivery.py --deliveries 2000 --chats 500 --concurrency 1 20 50
+    python scripts/loadtest_delivery.py --server-rate 30 --retry-after 10
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import re
+import socket
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))  # worker/ directory
+
+from aiohttp import web
+
+_TOKEN = "123456:LOADTEST"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeBotAPI:
+    """sendPhoto / sendVoice with server-side rate limits (token buckets,
+    10% timing slack so client-side pacing jitter is not punished)."""
+
+    def __init__(self, global_rate: float, chat_rate: float, latency: float, retry_after: int):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.latency = latency
+        self.retry_after = retry_after  # first message to chat 0 is refused this long
+        self._buckets: dict[object, tuple[float, float]] = {}
+        self._ids = itertools.count(1)
+        self.messages = 0
+        self.uploads = 0
+        self.rejected = {"global": 0, "chat": 0, "injected": 0}
+        self.received: dict[int, list[str]] = defaultdict(list)  # chat → captions, in order
+
+    def _take(self, key, rate: float) -> bool:
+        """One message from a bucket of one second's worth of `rate`."""
+        now = time.monotonic()
+        capacity = max(1.0, rate)
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        if tokens < 0.9:
+            self._buckets[key] = (tokens, now)
+            return False
+        self._buckets[key] = (tokens - 1, now)
+        return True
+
+    def _too_many(self, reason: str, seconds: int) -> web.Response:
+        self.rejected[reason] += 1
+        return web.json_response({
+            "ok": False,
+            "error_code": 429,
+            "description": f"Too Many Requests: retry after {seconds}",
+            "parameters": {"retry_after": seconds},
+        }, status=429)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        if method == "getMe":
+            return web.json_response({"ok": True, "result": {
+                "id": 1, "is_bot": True, "first_name": "Load test", "username": "loadtest_bot",
+            }})
+        form = await request.post()
+        chat_id = int(form["chat_id"])
+        await asyncio.sleep(self.latency)
+
+        if self.retry_after and chat_id == 0:
+            self.retry_after, seconds = 0, self.retry_after
+            return self._too_many("injected", seconds)
+        if not self._take("global", self.global_rate):
+            return self._too_many("global", 1)
+        if not self._take(chat_id, self.chat_rate):
+            return self._too_many("chat", 1)
+
+        self.messages += 1
+        message = {
+            "message_id": next(self._ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+        }
+        if method == "sendPhoto":
+            self.received[chat_id].append(str(form.get("caption", "")))
+            message["photo"] = [{"file_id": "photo-1", "file_unique_id": "p1", "width": 480, "height": 360}]
+        elif method == "sendVoice":
+            if not isinstance(form.get("voice"), str):
+                self.uploads += 1
+            message["voice"] = {"file_id": "voice-1", "file_unique_id": "v1", "duration": 60}
+        else:
+            return web.json_response({"ok": False, "error_code": 404, "description": "Not Found"}, status=404)
+        return web.json_response({"ok": True, "result": message})
+
+
+def _deliveries(count: int, chats: int) -> list[dict]:
+    return [
+        {"delivery_id": i, "chat_id": str(i % chats), "video_id": "loadtest0001", "video_title": f"Delivery {i}"}
+        for i in range(count)
+    ]
+
+
+def _out_of_order(received: dict[int, list[str]]) -> int:
+    """Chats whose deliveries arrived out of submission order."""
+    bad = 0
+    for captions in received.values():
+        numbers = [int(re.search(r"Delivery (\d+)", c).group(1)) for c in captions]
+        bad += numbers != sorted(numbers)
+    return bad
+
+
+async def run_once(args, concurrency: int, audio: Path) -> None:
+    import telegram_deliverer
+    from delivery_scheduler import DeliveryScheduler
+    from rate_limiter import rate_limiter
+
+    api = FakeBotAPI(args.server_rate, args.server_chat_rate, args.latency / 1000, args.retry_after)
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", api.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    port = _free_port()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+
+    # Fresh bot / limiter state per run
+    telegram_deliverer.TELEGRAM_API_BASE_URL = f"http://127.0.0.1:{port}/bot"
+    telegram_deliverer._bot = None
+    telegram_deliverer.flood_control = telegram_deliverer.FloodControl()
+    rate_limiter._local = type(rate_limiter._local)()
+    await telegram_deliverer.get_bot().initialize()
+
+    file_ids: dict[str, str] = {}
+    uploading = None  # asyncio.Event while the first upload is in flight
+    failed = 0
+
+    async def send(d: dict):
+        result = await telegram_deliverer.send_audio_to_user(
+            chat_id=d["chat_id"],
+            audio_path=None if file_ids else audio,
+            video_title=d["video_title"],
+            video_id=d["video_id"],
+            channel_id="loadtest",
+            voice_file_id=file_ids.get("voice"),
+            photo_file_id=file_ids.get("photo"),
+        )
+        if result.ok and result.voice_file_id:
+            file_ids.setdefault("voice", result.voice_file_id)
+            file_ids.setdefault("photo", result.photo_file_id)
+        return result
+
+    async def deliver(d: dict) -> None:
+        nonlocal uploading, failed
+        # As AudioArtifactCache.first_upload: one upload, the others wait for its file_id
+        if uploading is not None:
+            try:
+                await asyncio.wait_for(uploading.wait(), 10)
+            except asyncio.TimeoutError:
+                pass
+        if not file_ids and uploading is None:
+            uploading = asyncio.Event()
+            try:
+                result = await send(d)
+            finally:
+                uploading.set()
+        else:
+            result = await send(d)
+        if not result.ok:
+            failed += 1
+
+    scheduler = DeliveryScheduler(concurrency)
+    started = time.perf_counter()
+    scheduler.submit(_deliveries(args.deliveries, args.chats), deliver, time.monotonic())
+    await scheduler.wait_below(1)
+    elapsed = time.perf_counter() - started
+    flood = telegram_deliverer.flood_control.snapshot()
+
+    await telegram_deliverer._bot.shutdown()
+    await runner.cleanup()
+
+    rejected = api.rejected
+    print(
+        f"{concurrency:>11} {elapsed:>7.1f}s {args.deliveries / elapsed:>10.1f} {api.messages / elapsed:>8.1f} "
+        f"{rejected['global']:>6} {rejected['chat']:>6} {flood['chat_pauses']:>6} {flood['global_pauses']:>6} "
+        f"{failed:>6} {api.uploads:>7} {_out_of_order(api.received):>9}"
+    )
+
+
+async def run(args) -> None:
+    with tempfile.TemporaryDirectory(prefix="loadtest_delivery_") as tmp:
+        audio = Path(tmp) / "audio.ogg"
+        audio.write_bytes(b"OggS" + bytes(32 * 1024))
+        print(
+            f"{args.deliveries} deliveries to {args.chats} chats — server limits "
+            f"{args.server_rate}/s bot-wide, {args.server_chat_rate}/s per chat, {args.latency} ms latency"
+        )
+        print(
+            f"{'concurrency':>11} {'time':>8} {'deliv/s':>10} {'msg/s':>8} "
+            f"{'429g':>6} {'429c':>6} {'pauseC':>6} {'pauseG':>6} {'failed':>6} {'uploads':>7} {'unordered':>9}"
+        )
+        for concurrency in args.concurrency:
+            await run_once(args, concurrency, audio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deliveries", type=int, default=100, help="Deliveries to send (default: 100)")
+    parser.add_argument("--chats", type=int, default=50, help="Distinct chats (default: 50)")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 20],
+                        help="Scheduler concurrency levels to compare (default: 1 20)")
+    parser.add_argument("--server-rate", type=float, default=30,
+                        help="Fake server's bot-wide limit in messages/s (default: 30)")
+    parser.add_argument("--server-chat-rate", type=float, default=1,
+                        help="Fake server's per-chat limit in messages/s (default: 1)")
+    parser.add_argument("--latency", type=float, default=50, help="Fake server latency in ms (default: 50)")
+    parser.add_argument("--retry-after", type=int, default=0,
+                        help="Refuse the first message to chat 0 with this retry_after (default: off)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", _TOKEN)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
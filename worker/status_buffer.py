@@ -0,0 +1,183 @@
+"""
+Write-behind buffer for delivery status updates.
+
+Each delivery used to write its own outcome (one PATCH per message, retried
+three times in the send path). Outcomes are now recorded here and written in
+bulk — one UPDATE per status for up to 100 deliveries — every
+STATUS_FLUSH_MS, or as soon as STATUS_FLUSH_ITEMS are waiting:
+
+- an outcome is appended to a local journal (cache/status_journal.jsonl,
+  fsynced) before the send is reported done, so a crash before the flush
+  does not lose it: the journal is replayed at startup
+- until its update is in the database, a delivery still looks "pending"
+  there — the delivery loop skips every id held here, so a slow or failed
+  flush never causes a second Telegram send
+- a fetch that started before the update landed may still return it as
+  pending, so a written id stays held until a fetch that started after the
+  write has returned (fetched())
+- a failed flush keeps its updates and is retried with backoff; updates are
+  idempotent, so replaying a journal that was already flushed is harmless
+- later outcomes of the same delivery replace earlier ones
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import db_async
+from config import CACHE_DIR, STATUS_FLUSH_ITEMS, STATUS_FLUSH_MS
+
+logger = logging.getLogger(__name__)
+
+_MAX_BACKOFF = 60
+
+
+class StatusWriteBuffer:
+    """Journaled, coalesced delivery outcomes flushed in bulk."""
+
+    def __init__(
+        self,
+        journal: Path = CACHE_DIR / "status_journal.jsonl",
+        flush_ms: int = STATUS_FLUSH_MS,
+        flush_items: int = STATUS_FLUSH_ITEMS,
+    ):
+        self.journal = journal
+        self.interval = max(0.01, flush_ms / 1000)
+        self.flush_items = max(1, flush_items)
+        self._pending: dict[str, dict] = {}  # delivery_id → {"status", "at"}
+        self._written: dict[str, float] = {}  # delivery_id → monotonic time it was written
+        self._journal_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._failures = 0  # consecutive failed flushes
+        self.recorded = 0
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.replayed = 0
+
+    def __contains__(self, delivery_id) -> bool:
+        """Recorded, and possibly still read as pending by the database."""
+        return delivery_id in self._pending or delivery_id in self._written
+
+    def fetched(self, started: float) -> None:
+        """A fetch that started at monotonic time `started` has returned:
+        outcomes written before it are visible to every later fetch."""
+        for delivery_id in [i for i, at in self._written.items() if at < started]:
+            del self._written[delivery_id]
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def load(self) -> int:
+        """Replay the journal left by the previous run (before any delivery
+        is fetched). Returns the number of outcomes waiting to be written."""
+        try:
+            lines = self.journal.read_text().splitlines()
+        except FileNotFoundError:
+            return 0
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                self._pending[entry["id"]] = {"status": entry["status"], "at": entry["at"]}
+            except (ValueError, KeyError):
+                continue  # torn last line of a crash
+        self.replayed = len(self._pending)
+        if self.replayed:
+            logger.info(f"Status journal: {self.replayed} delivery outcomes to write from the last run")
+        return self.replayed
+
+    def _append(self, line: str) -> None:
+        with open(self.journal, "a") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite(self, entries: dict[str, dict]) -> None:
+        if not entries:
+            self.journal.unlink(missing_ok=True)
+            return
+        tmp = self.journal.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            for delivery_id, e in entries.items():
+                f.write(json.dumps({"id": delivery_id, **e}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal)
+
+    async def record(self, delivery_id: str, status: str) -> None:
+        """Record a delivery outcome ("sent" / "failed"): journaled now,
+        written to the database with the next flush."""
+        entry = {"status": status, "at": datetime.now(timezone.utc).isoformat()}
+        async with self._journal_lock:
+            await asyncio.to_thread(self._append, json.dumps({"id": delivery_id, **entry}) + "\n")
+            self._pending[delivery_id] = entry
+        self.recorded += 1
+        if len(self._pending) >= self.flush_items:
+            self._wake.set()
+
+    async def flush(self) -> bool:
+        """Write every buffered outcome. Returns False if the database write
+        failed (the outcomes stay buffered and journaled)."""
+        async with self._flush_lock:
+            batch = dict(self._pending)
+            if not batch:
+                return True
+            by_status: dict[str, list[str]] = {}
+            for delivery_id, e in batch.items():
+                by_status.setdefault(e["status"], []).append(delivery_id)
+            try:
+                for status, ids in by_status.items():
+                    at = max(batch[i]["at"] for i in ids)
+                    await db_async.mark_deliveries(ids, status, at)
+            except Exception as e:
+                self.failed_flushes += 1
+                self._failures += 1
+                logger.warning(f"Status flush of {len(batch)} deliveries failed (kept, will retry): {e}")
+                return False
+            self._failures = 0
+            self.flushes += 1
+            self.written += len(batch)
+            written_at = time.monotonic()
+            async with self._journal_lock:
+                # Keep what was recorded (or re-recorded) during the write
+                for delivery_id, e in batch.items():
+                    self._written[delivery_id] = written_at
+                    if self._pending.get(delivery_id) is e:
+                        del self._pending[delivery_id]
+                await asyncio.to_thread(self._rewrite, dict(self._pending))
+            return True
+
+    async def run(self) -> None:
+        """Flush every STATUS_FLUSH_MS, or early once STATUS_FLUSH_ITEMS wait;
+        back off while the database refuses."""
+        while True:
+            if self._failures:
+                await asyncio.sleep(min(_MAX_BACKOFF, self.interval * 2 ** self._failures))
+            else:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wake.clear()
+            await self.flush()
+
+    def snapshot(self) -> dict:
+        return {
+            "buffered": len(self._pending),
+            "recorded": self.recorded,
+            "written": self.written,
+            "flushes": self.flushes,
+            "per_flush": round(self.written / self.flushes, 1) if self.flushes else 0.0,
+            "failed_flushes": self.failed_flushes,
+            "replayed": self.replayed,
+        }
+
+
+# Global instance: deliveries record, the flush task writes, the delivery
+# loop skips what is still buffered
+status_buffer = StatusWriteBuffer()
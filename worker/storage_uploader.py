@@ -0,0 +1,224 @@
+"""
+Async Supabase Storage uploads, streamed from disk.
+
+The supabase-py client uploads a `bytes` body with a blocking HTTP call, so
+every upload held the whole file in memory and had to be run in a thread.
+This stage talks to the Storage REST API directly with aiohttp:
+
+- files up to STORAGE_RESUMABLE_MB are sent in one request whose body is
+  read from disk in chunks (off the event loop)
+- larger files use the resumable (TUS) endpoint in 6 MB chunks; after a
+  failed chunk the upload resumes from the offset the server confirms
+  instead of starting over
+- transient failures (network errors, timeouts, 408/429/5xx) are retried
+  with exponential backoff and jitter, STORAGE_UPLOAD_RETRIES times
+- at most STORAGE_UPLOAD_CONCURRENCY uploads run at once
+- bytes, time, retries and resumes are counted for /monitor_stats
+"""
+
+import asyncio
+import base64
+import logging
+import random
+import time
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from urllib.parse import quote
+
+import aiohttp
+
+from config import (
+    STORAGE_RESUMABLE_MB,
+    STORAGE_UPLOAD_CONCURRENCY,
+    STORAGE_UPLOAD_RETRIES,
+    SUPABASE_SERVICE_ROLE_KEY,
+    SUPABASE_URL,
+)
+
+logger = logging.getLogger(__name__)
+
+# Chunk size the Storage resumable endpoint requires (all chunks but the last)
+TUS_CHUNK = 6 * 1024 * 1024
+# Disk read size when streaming a body
+_READ_CHUNK = 256 * 1024
+_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=120)
+_RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class StorageUploadError(Exception):
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+async def _read_chunks(path: Path, start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+    """`length` bytes of `path` from `start` (all when None), read off the loop."""
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        await asyncio.to_thread(f.seek, start)
+        remaining = length
+        while remaining is None or remaining > 0:
+            size = _READ_CHUNK if remaining is None else min(_READ_CHUNK, remaining)
+            chunk = await asyncio.to_thread(f.read, size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(f.close)
+
+
+async def _check(resp: aiohttp.ClientResponse, expected: tuple[int, ...]) -> None:
+    if resp.status in expected:
+        return
+    body = (await resp.text())[:200]
+    raise StorageUploadError(f"HTTP {resp.status}: {body}", retryable=resp.status in _RETRY_STATUSES)
+
+
+class StorageUploader:
+    """Streaming / resumable uploads to Supabase Storage with retries."""
+
+    def __init__(
+        self,
+        base_url: str = SUPABASE_URL,
+        key: str = SUPABASE_SERVICE_ROLE_KEY,
+        concurrency: int = STORAGE_UPLOAD_CONCURRENCY,
+        resumable_bytes: int = STORAGE_RESUMABLE_MB * 1024 * 1024,
+        retries: int = STORAGE_UPLOAD_RETRIES,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.key = key
+        self.resumable_bytes = resumable_bytes
+        self.retries = retries
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.uploads = 0
+        self.failed = 0
+        self.retried = 0
+        self.resumed = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.waiting = 0  # uploads queued behind the concurrency limit
+
+    def _http(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=_TIMEOUT)
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+    def _headers(self, **extra: str) -> dict:
+        return {"Authorization": f"Bearer {self.key}", "apikey": self.key, "x-upsert": "true", **extra}
+
+    def public_url(self, bucket: str, object_path: str) -> str:
+        return f"{self.base_url}/storage/v1/object/public/{bucket}/{quote(object_path)}"
+
+    async def upload(self, bucket: str, object_path: str, path: Path, content_type: str) -> str:
+        """Upload `path` to `bucket/object_path` (overwriting) and return its
+        public URL. Raises StorageUploadError once the retries are used up."""
+        size = (await asyncio.to_thread(path.stat)).st_size
+        self.waiting += 1
+        async with self._slots:
+            self.waiting -= 1
+            started = time.monotonic()
+            try:
+                if size > self.resumable_bytes:
+                    await self._resumable(bucket, object_path, path, size, content_type)
+                else:
+                    await self._with_retries(
+                        object_path, lambda: self._single(bucket, object_path, path, size, content_type)
+                    )
+            except Exception:
+                self.failed += 1
+                raise
+            self.uploads += 1
+            self.bytes += size
+            self.seconds += time.monotonic() - started
+        return self.public_url(bucket, object_path)
+
+    async def _with_retries(self, object_path: str, attempt_fn):
+        for attempt in range(self.retries + 1):
+            try:
+                return await attempt_fn()
+            except (aiohttp.ClientError, asyncio.TimeoutError, StorageUploadError) as e:
+                if attempt == self.retries or (isinstance(e, StorageUploadError) and not e.retryable):
+                    raise
+                self.retried += 1
+                delay = min(2 ** attempt, 30) + random.uniform(0, 1)
+                logger.warning(
+                    f"Storage upload of {object_path} failed ({e}), retry {attempt + 1}/{self.retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+    async def _single(self, bucket: str, object_path: str, path: Path, size: int, content_type: str) -> None:
+        """One POST, body streamed from disk."""
+        url = f"{self.base_url}/storage/v1/object/{bucket}/{quote(object_path)}"
+        headers = self._headers(**{"Content-Type": content_type, "Content-Length": str(size)})
+        async with self._http().post(url, data=_read_chunks(path), headers=headers) as resp:
+            await _check(resp, (200, 201))
+
+    async def _resumable(self, bucket: str, object_path: str, path: Path, size: int, content_type: str) -> None:
+        """TUS upload: create once, then PATCH chunks from the confirmed offset."""
+        tus = {"Tus-Resumable": "1.0.0"}
+        metadata = ",".join(
+            f"{k} {base64.b64encode(v.encode()).decode()}"
+            for k, v in {"bucketName": bucket, "objectName": object_path,
+                         "contentType": content_type, "cacheControl": "3600"}.items()
+        )
+
+        async def create() -> str:
+            headers = self._headers(**tus, **{"Upload-Length": str(size), "Upload-Metadata": metadata})
+            async with self._http().post(f"{self.base_url}/storage/v1/upload/resumable", headers=headers) as resp:
+                await _check(resp, (200, 201))
+                return resp.headers["Location"]
+
+        location = await self._with_retries(object_path, create)
+        offset = 0
+
+        async def send_chunk() -> int:
+            nonlocal offset
+            length = min(TUS_CHUNK, size - offset)
+            headers = self._headers(**tus, **{
+                "Upload-Offset": str(offset),
+                "Content-Type": "application/offset+octet-stream",
+                "Content-Length": str(length),
+            })
+            try:
+                async with self._http().patch(
+                    location, data=_read_chunks(path, offset, length), headers=headers
+                ) as resp:
+                    await _check(resp, (204,))
+                    return int(resp.headers["Upload-Offset"])
+            except Exception:
+                # Ask the server how much it kept before the retry resends
+                try:
+                    async with self._http().head(location, headers=self._headers(**tus)) as head:
+                        if head.status == 200 and "Upload-Offset" in head.headers:
+                            confirmed = int(head.headers["Upload-Offset"])
+                            if confirmed > offset:
+                                offset = confirmed
+                                self.resumed += 1
+                except Exception:
+                    pass
+                raise
+
+        while offset < size:
+            offset = await self._with_retries(object_path, send_chunk)
+
+    def snapshot(self) -> dict:
+        return {
+            "uploads": self.uploads,
+            "failed": self.failed,
+            "retried": self.retried,
+            "resumed": self.resumed,
+            "waiting": self.waiting,
+            "mb": round(self.bytes / (1024 * 1024), 1),
+            "mb_per_s": round(self.bytes / (1024 * 1024) / self.seconds, 2) if self.seconds else 0.0,
+        }
+
+
+# Global instance shared by every upload (one connection pool, one limit)
+storage_uploader = StorageUploader()
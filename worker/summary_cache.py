@@ -0,0 +1,144 @@
+"""
+Persistent Gemini summary cache (SQLite, LRU-bounded).
+
+A video is re-summarized whenever its job is retried after a TTS or upload
+failure, and an on-demand request can ask again for a video already
+summarized in the same language. The summary only depends on the transcript,
+the target language, the prompt and the model, so it is cached under
+(sha256(transcript), target_language, prompt_version, model).
+
+Entries record the tokens the Gemini call used, so hits can report the
+tokens saved. When the cache grows past SUMMARY_CACHE_MAX_ENTRIES the least
+recently used entries are evicted.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from config import SUMMARY_CACHE_MAX_ENTRIES, SUMMARY_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class CachedSummary(NamedTuple):
+    summary: str
+    model: str
+    tokens: int  # total tokens of the Gemini call that produced it
+
+
+def transcript_hash(transcript: str) -> str:
+    return hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """Thread-safe SQLite summary cache shared by the worker's processing tasks."""
+
+    def __init__(self, path: Path = SUMMARY_CACHE_PATH, max_entries: int = SUMMARY_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        """Open the database on first use. Caller holds the lock."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS summaries (
+                    transcript_sha256 TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    tokens INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (transcript_sha256, language, prompt_version, model)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(
+        self,
+        transcript: str,
+        language: str,
+        prompt_version: str,
+        models: list[str],
+    ) -> Optional[CachedSummary]:
+        """Cached summary for this transcript/language/prompt from any of
+        `models` — the earliest model in the list wins. Never raises."""
+        if not models:
+            return None
+        key = transcript_hash(transcript)
+        try:
+            with self._lock:
+                conn = self._db()
+                placeholders = ",".join("?" * len(models))
+                rows = conn.execute(
+                    f"SELECT model, summary, tokens FROM summaries "
+                    f"WHERE transcript_sha256 = ? AND language = ? AND prompt_version = ? "
+                    f"AND model IN ({placeholders})",
+                    (key, language, prompt_version, *models),
+                ).fetchall()
+                if not rows:
+                    return None
+                model, summary, tokens = min(rows, key=lambda r: models.index(r[0]))
+                conn.execute(
+                    "UPDATE summaries SET last_used = ? WHERE transcript_sha256 = ? "
+                    "AND language = ? AND prompt_version = ? AND model = ?",
+                    (time.time(), key, language, prompt_version, model),
+                )
+                conn.commit()
+                return CachedSummary(summary, model, tokens)
+        except sqlite3.Error as e:
+            logger.warning(f"Summary cache read failed: {e}")
+            return None
+
+    def put(
+        self,
+        transcript: str,
+        language: str,
+        prompt_version: str,
+        model: str,
+        summary: str,
+        tokens: int = 0,
+    ) -> None:
+        """Store a summary and evict the least recently used overflow. Never raises."""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._db()
+                conn.execute(
+                    "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (transcript_hash(transcript), language, prompt_version, model,
+                     summary, tokens, now, now),
+                )
+                conn.execute(
+                    "DELETE FROM summaries WHERE rowid IN ("
+                    "  SELECT rowid FROM summaries ORDER BY last_used DESC LIMIT -1 OFFSET ?"
+                    ")",
+                    (self.max_entries,),
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Summary cache write failed: {e}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+
+# Global instance
+summary_cache = SummaryCache()
@@ -0,0 +1,144 @@
+"""
+Managed HTTP connection pool for the Supabase clients (db.py, db_async.py).
+
+The clients used to run on an httpx client with default limits, and their
+answer to 'Server disconnected' / 'ConnectionTerminated' was reset_client(),
+which threw the whole pool away — every caller that hit the error did so,
+and the next requests all reconnected at once. Those errors almost always
+mean a kept-alive connection was closed by Supabase's proxy while idle and
+then reused. Here:
+
+- the pool is sized explicitly (SUPABASE_POOL_SIZE connections, all of
+  which may be kept alive)
+- idle connections are dropped after SUPABASE_KEEPALIVE_EXPIRY seconds, well
+  below the proxy's idle cutoff, so they are rarely reused after it closed them
+- a request that fails on a stale connection is resent on a fresh one, up to
+  SUPABASE_STALE_RETRIES times, when resending it cannot apply it twice: reads,
+  PATCH/PUT/DELETE (PostgREST PATCH assigns literal values), and upserts
+  (Prefer: resolution=…). Inserts and RPC calls are not resent.
+- requests, retries, connections opened (churn) and the connections in use /
+  idle are counted for /monitor_stats
+
+The broken connection itself is discarded by httpcore, so the rest of the
+pool stays in use: reset_client() is a last resort, not the error handler.
+"""
+
+import logging
+import time
+
+import httpx
+
+from config import SUPABASE_KEEPALIVE_EXPIRY, SUPABASE_POOL_SIZE, SUPABASE_STALE_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Raised when a reused connection turns out to be closed by the server
+STALE_ERRORS = (httpx.RemoteProtocolError, httpx.ReadError, httpx.WriteError)
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"}
+
+
+def pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=SUPABASE_POOL_SIZE,
+        max_keepalive_connections=SUPABASE_POOL_SIZE,
+        keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+    )
+
+
+def is_replayable(request: httpx.Request) -> bool:
+    """True when sending `request` twice has the same effect as once, and its
+    body is in memory (can be sent again)."""
+    if not isinstance(request.stream, httpx.ByteStream):
+        return False
+    if request.method in _IDEMPOTENT_METHODS:
+        return True
+    return request.method == "POST" and "resolution=" in request.headers.get("prefer", "")
+
+
+class PoolStats:
+    """Counters of one client's pool (kept across client resets)."""
+
+    def __init__(self):
+        self.requests = 0
+        self.retried = 0   # resent after a stale-connection error
+        self.failed = 0    # stale-connection errors that reached the caller
+        self.opened = 0    # new connections (TCP connects)
+        self.resets = 0    # reset_client() calls
+        self.transport = None  # current transport, for the live pool state
+        self._started = time.monotonic()
+
+    def on_trace(self, event: str) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.opened += 1
+
+    def snapshot(self) -> dict:
+        connections = []
+        pool = getattr(self.transport, "_pool", None)
+        if pool is not None:
+            connections = list(pool.connections)
+        in_use = sum(1 for c in connections if not c.is_idle() and not c.is_closed())
+        idle = sum(1 for c in connections if c.is_idle())
+        minutes = (time.monotonic() - self._started) / 60
+        return {
+            "in_use": in_use,
+            "idle": idle,
+            "size": SUPABASE_POOL_SIZE,
+            "requests": self.requests,
+            "retried": self.retried,
+            "failed": self.failed,
+            "opened": self.opened,
+            "opened_per_min": round(self.opened / minutes, 2) if minutes > 0 else 0.0,
+            "resets": self.resets,
+        }
+
+
+class RetryingTransport(httpx.HTTPTransport):
+    """HTTP/1.1 transport that resends replayable requests after a stale
+    connection error (db.py, called from threads)."""
+
+    def __init__(self, stats: PoolStats):
+        super().__init__(http2=False, limits=pool_limits())
+        self.stats = stats
+        stats.transport = self
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions.setdefault("trace", lambda event, info: self.stats.on_trace(event))
+        self.stats.requests += 1
+        attempt = 0
+        while True:
+            try:
+                return super().handle_request(request)
+            except STALE_ERRORS as e:
+                if attempt >= SUPABASE_STALE_RETRIES or not is_replayable(request):
+                    self.stats.failed += 1
+                    raise
+                attempt += 1
+                self.stats.retried += 1
+                logger.info(f"Supabase {request.method} {request.url.path}: stale connection ({e!r}), resending")
+
+
+class AsyncRetryingTransport(httpx.AsyncHTTPTransport):
+    """Same as RetryingTransport for the event loop's client (db_async.py)."""
+
+    def __init__(self, stats: PoolStats):
+        super().__init__(http2=False, limits=pool_limits())
+        self.stats = stats
+        stats.transport = self
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        async def trace(event: str, info: dict) -> None:
+            self.stats.on_trace(event)
+
+        request.extensions.setdefault("trace", trace)
+        self.stats.requests += 1
+        attempt = 0
+        while True:
+            try:
+                return await super().handle_async_request(request)
+            except STALE_ERRORS as e:
+                if attempt >= SUPABASE_STALE_RETRIES or not is_replayable(request):
+                    self.stats.failed += 1
+                    raise
+                attempt += 1
+                self.stats.retried += 1
+                logger.info(f"Supabase {request.method} {request.url.path}: stale connection ({e!r}), resending")
@@ -1,24 +1,132 @@
 """Telegram Deliverer — sends audio summaries to users."""
 
+import asyncio
 import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Awaitable, Callable, NamedTuple, Optional
 from telegram import Bot
+from telegram.error import BadRequest, RetryAfter
+from telegram.request import HTTPXRequest
 
-from config import TELEGRAM_BOT_TOKEN
+from config import DELIVERY_CONCURRENCY, TELEGRAM_API_BASE_URL, TELEGRAM_BOT_TOKEN
+from rate_limiter import rate_limiter
 
 logger = logging.getLogger(__name__)
 
 _bot: Bot | None = None
 
+# RetryAfter from this many different chats within _FLOOD_WINDOW seconds means
+# the bot-wide limit was hit, not one chat's: every chat is paused then
+_GLOBAL_FLOOD_CHATS = 3
+_FLOOD_WINDOW = 1.0
+# Attempts of one API call that keeps getting RetryAfter
+_FLOOD_ATTEMPTS = 3
+
 
 def get_bot() -> Bot:
     """Return the shared Bot singleton — creates it on first call."""
     global _bot
     if _bot is None:
-        _bot = Bot(token=TELEGRAM_BOT_TOKEN)
+        # One connection per concurrent delivery (python-telegram-bot 20.x
+        # defaults to a single pooled connection)
+        kwargs = {"request": HTTPXRequest(connection_pool_size=DELIVERY_CONCURRENCY + 4)}
+        if TELEGRAM_API_BASE_URL:
+            # Local Bot API server or the load-test fake (scripts/loadtest_delivery.py)
+            kwargs["base_url"] = TELEGRAM_API_BASE_URL
+        _bot = Bot(token=TELEGRAM_BOT_TOKEN, **kwargs)
     return _bot
 
 
+class FloodControl:
+    """Pauses requested by Telegram (RetryAfter), per chat or bot-wide.
+
+    A 429 does not say which limit was hit. It is charged to the chat it
+    came from — only that chat waits — unless several chats are refused at
+    about the same time, which means the bot-wide budget is exhausted and
+    every chat waits.
+    """
+
+    def __init__(self):
+        self._chat_until: dict[int, float] = {}  # chat_id → monotonic time
+        self._global_until = 0.0
+        self._recent: deque[tuple[float, int]] = deque()  # (time, chat_id) of recent 429s
+        self.chat_pauses = 0
+        self.global_pauses = 0
+        self.paused_seconds = 0.0
+
+    async def wait(self, chat_id: int) -> None:
+        """Sleep until neither the bot nor this chat is paused."""
+        while True:
+            delay = max(self._global_until, self._chat_until.get(chat_id, 0.0)) - time.monotonic()
+            if delay <= 0:
+                self._chat_until.pop(chat_id, None)
+                return
+            self.paused_seconds += delay
+            await asyncio.sleep(delay)
+
+    def pause(self, chat_id: int, seconds: float) -> str:
+        """Record a RetryAfter for `chat_id`; returns the scope paused."""
+        now = time.monotonic()
+        self._recent.append((now, chat_id))
+        while self._recent and self._recent[0][0] < now - _FLOOD_WINDOW:
+            self._recent.popleft()
+        if len({chat for _, chat in self._recent}) >= _GLOBAL_FLOOD_CHATS:
+            self._global_until = max(self._global_until, now + seconds)
+            self.global_pauses += 1
+            return "global"
+        self._chat_until[chat_id] = max(self._chat_until.get(chat_id, 0.0), now + seconds)
+        self.chat_pauses += 1
+        return "chat"
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            "chat_pauses": self.chat_pauses,
+            "global_pauses": self.global_pauses,
+            "paused_seconds": round(self.paused_seconds, 1),
+            "paused_chats": sum(until > now for until in self._chat_until.values()),
+            "global_paused": self._global_until > now,
+        }
+
+
+flood_control = FloodControl()
+
+
+def _retry_seconds(error: RetryAfter) -> float:
+    # int seconds in older python-telegram-bot releases, timedelta in newer ones
+    delay = error.retry_after
+    return delay.total_seconds() if hasattr(delay, "total_seconds") else float(delay)
+
+
+async def _throttle(chat_id: int) -> None:
+    """Wait for Telegram-requested pauses, then for the bot-wide and per-chat
+    message budgets (rate_limiter.py)."""
+    await flood_control.wait(chat_id)
+    await rate_limiter.acquire_async("telegram")
+    await rate_limiter.acquire_async("telegram_chat", key=str(chat_id))
+
+
+async def _call(chat_id: int, method, **kwargs):
+    """Throttled Bot API call, retried after RetryAfter (the pause is shared
+    with every other send to the same scope). Other errors propagate."""
+    for attempt in range(_FLOOD_ATTEMPTS):
+        await _throttle(chat_id)
+        try:
+            return await method(chat_id=chat_id, **kwargs)
+        except RetryAfter as e:
+            if attempt == _FLOOD_ATTEMPTS - 1:
+                raise
+            seconds = _retry_seconds(e)
+            scope = flood_control.pause(chat_id, seconds)
+            logger.warning(f"Telegram flood control: {scope} pause of {seconds:.0f}s (chat {chat_id})")
+            for value in kwargs.values():
+                if hasattr(value, "seek"):
+                    value.seek(0)  # re-upload the file from the start
+
+
 def get_thumbnail_url(video_id: str) -> str:
     return f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
 
@@ -30,22 +138,61 @@ def escape_markdown(text: str) -> str:
     return text
 
 
+class SendResult(NamedTuple):
+    ok: bool
+    # Telegram file_ids of what was sent — reusable for every other chat
+    voice_file_id: Optional[str] = None
+    photo_file_id: Optional[str] = None
+    # Stored file_ids Telegram refused (BadRequest) — not to be reused
+    voice_refused: bool = False
+    photo_refused: bool = False
+
+
+def _photo_file_id(message) -> Optional[str]:
+    sizes = getattr(message, "photo", None) or []
+    return sizes[-1].file_id if sizes else None
+
+
+def _voice_file_id(message) -> Optional[str]:
+    voice = getattr(message, "voice", None)
+    return voice.file_id if voice else None
+
+
+@asynccontextmanager
+async def _voice_input(voice_file_id: Optional[str], audio_path: Optional[Path]):
+    """The file_id when known (no upload), else the open audio file."""
+    if voice_file_id:
+        yield voice_file_id
+    else:
+        with open(audio_path, "rb") as f:
+            yield f
+
+
 async def send_audio_to_user(
     chat_id: str,
-    audio_path: Path,
+    audio_path: Optional[Path],
     video_title: str,
     video_id: str,
     channel_id: str,
-) -> bool:
+    voice_file_id: Optional[str] = None,
+    photo_file_id: Optional[str] = None,
+    load_audio: Optional[Callable[[], Awaitable[Path]]] = None,
+) -> SendResult:
     """Send thumbnail + audio to a Telegram user.
 
-    Returns True if successful.
+    With `voice_file_id` / `photo_file_id` (from an earlier delivery of the
+    same audio), Telegram reuses the stored file: no upload, no thumbnail
+    fetch from YouTube. Otherwise `audio_path` is uploaded and the returned
+    file_ids can be reused for the next chats. The thumbnail and the voice
+    are retried separately: a refused photo file_id is resent from the
+    thumbnail URL, a refused voice file_id by uploading the file returned by
+    `load_audio()`. The result says which stored file_id was refused.
     """
     try:
         chat_id_int = int(chat_id)
     except (ValueError, TypeError):
         logger.error(f"Invalid chat_id format: {chat_id!r}")
-        return False
+        return SendResult(False)
 
     bot = get_bot()
     video_url = f"https://youtu.be/{video_id}"
@@ -55,60 +202,58 @@ async def send_audio_to_user(
     safe_url = escape_markdown(video_url)
     caption = f"*{safe_title}*\n\n{safe_url}"
 
+    async def send_photo(photo: str):
+        return await _call(chat_id_int, bot.send_photo, photo=photo, caption=caption, parse_mode="MarkdownV2")
+
+    # Thumbnail — from its stored file_id, else (or if that is refused) its URL
     photo_msg = None
+    photo_refused = False
     try:
-        # Send thumbnail
-        photo_msg = await bot.send_photo(
-            chat_id=chat_id_int,
-            photo=thumbnail_url,
-            caption=caption,
-            parse_mode="MarkdownV2",
-        )
-
-        # Send voice as reply
-        with open(audio_path, "rb") as f:
-            await bot.send_voice(
-                chat_id=chat_id_int,
-                voice=f,
-                reply_to_message_id=photo_msg.message_id,
-            )
+        photo_msg = await send_photo(photo_file_id or thumbnail_url)
+    except Exception as e:
+        logger.error(f"Failed to send thumbnail to chat {chat_id}: {e}")
+        if photo_file_id:
+            photo_refused = isinstance(e, BadRequest)
+            photo_file_id = None
+            try:
+                photo_msg = await send_photo(thumbnail_url)
+            except Exception as e2:
+                logger.error(f"Thumbnail retry from URL also failed: {e2}")
+    if photo_msg is not None:
+        photo_file_id = photo_file_id or _photo_file_id(photo_msg)
 
-        logger.info(f"Delivered to chat {chat_id}: {video_title[:40]}")
-        return True
+    # Voice — as a reply to the thumbnail, or alone with the caption if no
+    # thumbnail could be sent
+    if photo_msg is not None:
+        placement = {"reply_to_message_id": photo_msg.message_id}
+    else:
+        placement = {"caption": caption, "parse_mode": "MarkdownV2"}
 
+    async def send_voice():
+        async with _voice_input(voice_file_id, audio_path) as voice:
+            return await _call(chat_id_int, bot.send_voice, voice=voice, **placement)
+
+    voice_refused = False
+    try:
+        voice_msg = await send_voice()
     except Exception as e:
-        logger.error(f"Failed to deliver to chat {chat_id}: {e}")
+        logger.error(f"Failed to send voice to chat {chat_id}: {e}")
+        try:
+            if voice_file_id:
+                voice_refused = isinstance(e, BadRequest)
+            if voice_file_id and load_audio is not None:
+                # Retried as an upload; the stored file_id is only dropped
+                # if Telegram refused it
+                audio_path, voice_file_id = await load_audio(), None
+            voice_msg = await send_voice()
+            logger.info(f"Voice retry succeeded for chat {chat_id}: {video_title[:40]}")
+        except Exception as e2:
+            logger.error(f"Voice retry also failed: {e2}")
+            # With the thumbnail sent, report success so it isn't sent again
+            # on the next cycle; the user at least got the photo with the title
+            return SendResult(photo_msg is not None, None, photo_file_id, voice_refused, photo_refused)
 
-        if photo_msg is not None:
-            # Thumbnail already sent — only the voice failed.
-            # Retry the voice as a reply to the existing photo instead of
-            # sending a new standalone message (which would create a duplicate).
-            try:
-                with open(audio_path, "rb") as f:
-                    await bot.send_voice(
-                        chat_id=chat_id_int,
-                        voice=f,
-                        reply_to_message_id=photo_msg.message_id,
-                    )
-                logger.info(f"Voice retry succeeded for chat {chat_id}: {video_title[:40]}")
-                return True
-            except Exception as e2:
-                logger.error(f"Voice retry after photo also failed: {e2}")
-                # Return True to prevent re-sending the thumbnail on the next
-                # cycle; the user at least got the photo with the title.
-                return True
-        else:
-            # Nothing sent yet — try voice-only fallback (no thumbnail)
-            try:
-                with open(audio_path, "rb") as f:
-                    await bot.send_voice(
-                        chat_id=chat_id_int,
-                        voice=f,
-                        caption=caption,
-                        parse_mode="MarkdownV2",
-                    )
-                logger.info(f"Voice-only fallback succeeded for chat {chat_id}: {video_title[:40]}")
-                return True
-            except Exception as e2:
-                logger.error(f"Fallback delivery also failed: {e2}")
-                return False
+    logger.info(f"Delivered to chat {chat_id}: {video_title[:40]}")
+    return SendResult(
+        True, voice_file_id or _voice_file_id(voice_msg), photo_file_id, voice_refused, photo_refused
+    )
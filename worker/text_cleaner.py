@@ -58,3 +58,43 @@ def clean_for_tts(text: str) -> str:
     text = _SPACES_RE.sub(' ', text)                # multiple spaces → single
     text = _NEWLINES_RE.sub('\n\n', text)           # 3+ newlines → 2
     return text.strip()
+
+
+# Sentence end (. ! ? … optionally followed by a closing quote/bracket) then
+# whitespace, or a paragraph break
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?…])["»)\]]*\s+|\n\s*\n')
+
+# Segments shorter than this are merged with the next sentence: fewer TTS
+# requests and more natural prosody than one request per short sentence
+MIN_SEGMENT_CHARS = 200
+
+
+class SentenceSplitter:
+    """Cuts streamed text into sentence-aligned segments as it arrives.
+
+    feed() returns the segments completed by the new text (each at least
+    `min_chars` long, except at paragraph breaks); flush() returns what is left
+    once the stream ends. Segments are raw text — run clean_for_tts() on each.
+    """
+
+    def __init__(self, min_chars: int = MIN_SEGMENT_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        self._buffer += text
+        segments: list[str] = []
+        start = 0
+        for match in _SENTENCE_END_RE.finditer(self._buffer):
+            paragraph = "\n" in match.group()
+            if match.end() - start >= self.min_chars or paragraph:
+                segment = self._buffer[start:match.end()].strip()
+                if segment:
+                    segments.append(segment)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return segments
+
+    def flush(self) -> list[str]:
+        segment, self._buffer = self._buffer.strip(), ""
+        return [segment] if segment else []
@@ -20,21 +20,27 @@ from youtube_transcript_api._errors import (
     VideoUnavailable
 )
 
+from rate_limiter import rate_limiter
+
 logger = logging.getLogger(__name__)
 
 # Path to YouTube cookies file (Netscape format).
 # Set YOUTUBE_COOKIES_FILE in .env, or place cookies at worker/cookies/youtube.txt.
 _COOKIES_FILE = Path(__file__).parent / "cookies" / "youtube.txt"
 
-# Import Whisper transcriber (optional, only if API key is set)
+# Import Whisper transcriber (optional, only if an API key or local model is set)
 WHISPER_AVAILABLE = False
 try:
-    if os.environ.get("GROQ_API_KEY") or os.environ.get("OPENAI_API_KEY"):
+    if (
+        os.environ.get("GROQ_API_KEY")
+        or os.environ.get("OPENAI_API_KEY")
+        or os.environ.get("LOCAL_WHISPER_MODEL")
+    ):
         from whisper_transcriber import WhisperTranscriber
         WHISPER_AVAILABLE = True
-        logger.info("Groq Whisper API fallback enabled")
+        logger.info("Whisper fallback enabled (Groq and/or local)")
     else:
-        logger.info("Whisper API fallback disabled (no GROQ_API_KEY)")
+        logger.info("Whisper API fallback disabled (no GROQ_API_KEY or LOCAL_WHISPER_MODEL)")
 except ImportError:
     logger.warning("Whisper transcriber not available (missing dependencies)")
 
@@ -145,7 +151,8 @@ class TranscriptExtractor:
     def get_transcript(
         self,
         youtube_url: str,
-        preferred_languages: list[str] = None
+        preferred_languages: list[str] = None,
+        priority: int = 0,
     ) -> Tuple[Optional[str], Optional[str], Optional[str], float]:
         """
         Get transcript for a YouTube video
@@ -154,6 +161,7 @@ class TranscriptExtractor:
             youtube_url: YouTube video URL
             preferred_languages: List of preferred language codes (e.g., ['fr', 'en'])
                                 If None, will try to get any available transcript
+            priority: Job priority, passed to Whisper for Groq quota admission
 
         Returns:
             Tuple of (transcript_text, detected_language, error_message, cost_usd)
@@ -181,6 +189,7 @@ class TranscriptExtractor:
 
             for lang in preferred_languages:
                 try:
+                    rate_limiter.acquire("youtube")
                     transcript_data = api.fetch(video_id, languages=[lang])
                     detected_lang = lang
                     logger.info(f"Found transcript in preferred language: {lang}")
@@ -197,6 +206,7 @@ class TranscriptExtractor:
             # that have FR transcripts but no EN, without falling back to Whisper.
             if transcript_data is None:
                 try:
+                    rate_limiter.acquire("youtube")
                     transcript_data = api.fetch(video_id, languages=preferred_languages)
                     detected_lang = 'auto'
                     logger.info("Found transcript via multi-language fallback")
@@ -219,7 +229,7 @@ class TranscriptExtractor:
                 # Step 3: Whisper API fallback (paid, uses Groq quota)
                 if self.enable_whisper_fallback and self.whisper_transcriber:
                     logger.warning("YouTube transcripts not available, trying Whisper API fallback...")
-                    return self._whisper_fallback(youtube_url, preferred_languages)
+                    return self._whisper_fallback(youtube_url, preferred_languages, priority)
                 else:
                     return None, None, "no_transcript_available", 0.0
 
@@ -236,7 +246,7 @@ class TranscriptExtractor:
                 self.last_ip_blocked = False
             if self.enable_whisper_fallback and self.whisper_transcriber:
                 logger.info("Trying Whisper API fallback...")
-                return self._whisper_fallback(youtube_url, preferred_languages)
+                return self._whisper_fallback(youtube_url, preferred_languages, priority)
             return None, None, "transcripts_disabled", 0.0
 
         except VideoUnavailable:
@@ -248,7 +258,7 @@ class TranscriptExtractor:
             # Try Whisper fallback as last resort
             if self.enable_whisper_fallback and self.whisper_transcriber:
                 logger.info("Trying Whisper API fallback after error...")
-                return self._whisper_fallback(youtube_url, preferred_languages)
+                return self._whisper_fallback(youtube_url, preferred_languages, priority)
             return None, None, f"error: {str(e)}", 0.0
 
     def _ytdlp_subtitles(
@@ -292,6 +302,7 @@ class TranscriptExtractor:
         try:
             with tempfile.TemporaryDirectory(prefix="brieftube_vtt_") as tmp:
                 ydl_opts["outtmpl"] = os.path.join(tmp, "%(id)s")
+                rate_limiter.acquire("youtube")
                 with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                     ydl.download([youtube_url])
 
@@ -355,7 +366,8 @@ class TranscriptExtractor:
     def _whisper_fallback(
         self,
         youtube_url: str,
-        preferred_languages: list[str] = None
+        preferred_languages: list[str] = None,
+        priority: int = 0,
     ) -> Tuple[Optional[str], Optional[str], Optional[str], float]:
         """
         Fallback to Whisper API when YouTube transcripts are not available
@@ -368,7 +380,8 @@ class TranscriptExtractor:
 
             transcript, lang, error, cost = self.whisper_transcriber.transcribe(
                 youtube_url,
-                language=target_lang
+                language=target_lang,
+                priority=priority,
             )
 
             if transcript:
@@ -389,6 +402,10 @@ class TranscriptExtractor:
         Retry cases:
         - no_transcript_available: Video might be too recent, transcript being generated
         - rate_limited: Temporary issue
+        - groq_quota_deferred: Groq quota full or rate-limited — retry when it
+          admits jobs again
+        - groq_quota_exhausted: Groq refused on its daily limit — retry after
+          the reset
 
         Don't retry:
         - transcripts_disabled: Video has transcripts permanently disabled
@@ -402,12 +419,13 @@ class TranscriptExtractor:
             "no_transcript_available",  # Might be generated later
             "rate_limited",             # Temporary
             "video_unavailable",        # Premiere / scheduled — retry when live
+            "groq_quota_deferred",      # Groq quota full / rate-limited — retry later
         ]
         if error_message in retry_errors:
             return True
 
-        # Groq 429 rate limit — retry after midnight UTC when quota resets
-        if "429" in error_message or "rate_limit_exceeded" in error_message:
+        # Groq daily limit hit mid-video (carries Groq's message) — retry after the reset
+        if error_message.startswith("groq_quota_exhausted"):
             return True
 
         return False
@@ -5,46 +5,186 @@ import logging
 import time
 import uuid
 from pathlib import Path
+from typing import AsyncIterator
+from urllib.parse import urlparse
 import edge_tts
 
-from config import DEFAULT_TTS_VOICE, AUDIO_DIR
+from config import (
+    DEFAULT_TTS_VOICE,
+    AUDIO_DIR,
+    TTS_CONCURRENCY,
+    TTS_SEGMENT_CHARS,
+    TTS_SEGMENT_RETRIES,
+    TTS_AUDIO_FORMAT,
+    TTS_OPUS_BITRATE,
+)
+from text_cleaner import SentenceSplitter
 
 logger = logging.getLogger(__name__)
 
+# TTS_AUDIO_FORMAT → file extension, and extension → storage content type
+AUDIO_FORMATS = {"mp3": ".mp3", "opus": ".ogg"}
+AUDIO_CONTENT_TYPES = {".mp3": "audio/mpeg", ".ogg": "audio/ogg"}
+
+# edge-tts requests in flight, shared by every synthesis: the language
+# variants and voices of concurrent videos all draw from the same slots
+_tts_slots = asyncio.Semaphore(max(1, TTS_CONCURRENCY))
+
+
+def split_for_tts(text: str, min_chars: int = TTS_SEGMENT_CHARS) -> list[str]:
+    """Cut clean text into segments of whole sentences (at least `min_chars`
+    each, paragraphs never merged)."""
+    splitter = SentenceSplitter(min_chars)
+    return splitter.feed(text) + splitter.flush()
+
+
+async def _synthesize_segment(text: str, voice: str) -> bytes:
+    """MP3 bytes of one text segment, retried on its own if it fails."""
+    for attempt in range(TTS_SEGMENT_RETRIES + 1):
+        try:
+            communicate = edge_tts.Communicate(text, voice)
+            audio = bytearray()
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    audio += chunk["data"]
+            if not audio:
+                raise RuntimeError("no audio received")
+            return bytes(audio)
+        except Exception as e:
+            if attempt == TTS_SEGMENT_RETRIES:
+                raise
+            logger.warning(
+                f"TTS segment failed (attempt {attempt + 1}/{TTS_SEGMENT_RETRIES + 1}, "
+                f"{len(text)} chars): {e}"
+            )
+            await asyncio.sleep(2 ** attempt)
+
+
+async def _synthesize_segments(segments: AsyncIterator[str], voice: str) -> bytes:
+    """Synthesize segments as they arrive — at most TTS_CONCURRENCY at once
+    across all syntheses — and join the MP3 streams in order. edge-tts
+    returns raw MP3 frames (no header), so the joined stream plays as one
+    gapless track."""
+
+    async def synthesize(text: str) -> bytes:
+        async with _tts_slots:
+            return await _synthesize_segment(text, voice)
+
+    tasks: list[asyncio.Task] = []
+    try:
+        async for segment in segments:
+            if segment.strip():
+                tasks.append(asyncio.create_task(synthesize(segment)))
+        parts = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return b"".join(parts)
+
+
+def audio_suffix(url_or_path: str = "") -> str:
+    """File extension of an audio artifact: taken from its URL/path when it
+    has a known one (older artifacts are MP3), else the configured format."""
+    suffix = Path(urlparse(url_or_path).path).suffix.lower()
+    if suffix in AUDIO_CONTENT_TYPES:
+        return suffix
+    return AUDIO_FORMATS.get(TTS_AUDIO_FORMAT, AUDIO_FORMATS["mp3"])
+
+
+async def _to_opus(mp3: bytes, output_path: Path) -> bool:
+    """Transcode MP3 bytes to OGG/Opus (Telegram's native voice note format)
+    in one ffmpeg pass. False if ffmpeg failed."""
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "mp3", "-i", "pipe:0",
+        "-c:a", "libopus", "-b:a", f"{TTS_OPUS_BITRATE}k",
+        "-application", "voip", "-ac", "1",
+        str(output_path),
+        stdin=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, err = await proc.communicate(mp3)
+    if proc.returncode != 0:
+        logger.warning(f"Opus transcode failed, keeping MP3: {err.decode(errors='replace')[-200:]}")
+        output_path.unlink(missing_ok=True)
+        return False
+    return True
+
+
+async def _write_audio(mp3: bytes, output_filename: str | None) -> Path:
+    """Write the synthesized audio in TTS_AUDIO_FORMAT (MP3 if the Opus
+    transcode is unavailable)."""
+    if not output_filename:
+        output_filename = f"summary_{uuid.uuid4().hex[:8]}"
+    if TTS_AUDIO_FORMAT == "opus":
+        output_path = AUDIO_DIR / f"{output_filename}.ogg"
+        try:
+            if await _to_opus(mp3, output_path):
+                return output_path
+        except FileNotFoundError:
+            logger.warning("ffmpeg not found, keeping MP3")
+    output_path = AUDIO_DIR / f"{output_filename}.mp3"
+    await asyncio.to_thread(output_path.write_bytes, mp3)
+    return output_path
+
 
 async def text_to_audio(text: str, voice: str = None, output_filename: str = None) -> Path:
     """Convert text to audio using edge-tts.
 
+    The text is cut at sentence/paragraph boundaries (split_for_tts) and the
+    segments are synthesized concurrently, so a long summary takes about as
+    long as its slowest segment instead of the sum of all of them.
+
     Args:
         text: The text to convert
         voice: TTS voice ID (e.g. 'fr-FR-DeniseNeural'). Uses default if None.
         output_filename: Optional filename (without extension)
 
     Returns:
-        Path to the generated MP3 file
+        Path to the generated audio file (.ogg for Opus, .mp3)
     """
     voice = voice or DEFAULT_TTS_VOICE
-    if not output_filename:
-        output_filename = f"summary_{uuid.uuid4().hex[:8]}"
+    segments = split_for_tts(text)
 
-    output_path = AUDIO_DIR / f"{output_filename}.mp3"
+    async def segment_stream():
+        for segment in segments:
+            yield segment
 
-    communicate = edge_tts.Communicate(text, voice)
-    await communicate.save(str(output_path))
+    started = time.monotonic()
+    output_path = await _write_audio(
+        await _synthesize_segments(segment_stream(), voice), output_filename
+    )
 
-    logger.info(f"Audio generated: {output_path.name} ({voice})")
+    logger.info(
+        f"Audio generated: {output_path.name} ({voice}, {len(segments)} segments, "
+        f"{output_path.stat().st_size // 1024} KB, {time.monotonic() - started:.1f}s)"
+    )
     return output_path
 
 
-def cleanup_audio_files(max_age_hours: int = 1) -> int:
-    """Delete audio files older than max_age_hours."""
-    count = 0
-    now = time.time()
-    for f in AUDIO_DIR.glob("*.mp3"):
-        try:
-            if now - f.stat().st_mtime > max_age_hours * 3600:
-                f.unlink()
-                count += 1
-        except Exception as e:
-            logger.warning(f"Could not delete audio file {f.name}: {e}")
-    return count
+async def text_stream_to_audio(
+    segments: AsyncIterator[str],
+    voice: str = None,
+    output_filename: str = None,
+) -> Path:
+    """Synthesize text segments while later ones are still being produced.
+
+    Each segment (a few clean sentences) starts its own edge-tts request as
+    soon as it arrives, exactly like text_to_audio() once the text is known.
+
+    Returns:
+        Path to the generated audio file (.ogg for Opus, .mp3)
+    """
+    voice = voice or DEFAULT_TTS_VOICE
+
+    started = time.monotonic()
+    output_path = await _write_audio(
+        await _synthesize_segments(segments, voice), output_filename
+    )
+
+    logger.info(
+        f"Audio generated: {output_path.name} ({voice}, streamed, "
+        f"{output_path.stat().st_size // 1024} KB, {time.monotonic() - started:.1f}s)"
+    )
+    return output_path
@@ -0,0 +1,272 @@
+"""
+Whisper backends — what actually turns an audio chunk into text.
+
+WhisperTranscriber owns the audio pipeline (download, cuts, stitching) and
+hands each chunk to a backend:
+- GroqWhisperBackend: Groq Whisper Large V3 Turbo (remote, paid, fast)
+- LocalWhisperBackend: faster-whisper / CTranslate2 int8 on the worker's CPU
+  (free, slower) — used when the Groq daily quota is low or exhausted
+
+Every backend returns a ChunkResult whose segments are (start, end, text) in
+seconds from the start of the ORIGINAL chunk.
+"""
+
+import importlib.util
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+from audio_preprocess import TimeMap
+from config import (
+    GROQ_DAILY_QUOTA_SECONDS,
+    GROQ_MAX_CONCURRENCY,
+    LOCAL_WHISPER_MODEL,
+    LOCAL_WHISPER_PROCESSES,
+    LOCAL_WHISPER_THREADS,
+)
+from rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkResult(NamedTuple):
+    text: str
+    language: str
+    cost: float               # USD, 0.0 for local
+    segments: list            # (start, end, text) in original chunk time
+    billed_seconds: float     # audio seconds billed by the remote (0.0 for local)
+
+
+# faster-whisper is optional — only needed for the local fallback
+LOCAL_WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
+
+
+class GroqRateLimit(NamedTuple):
+    """Which Groq limit a refused (429) request hit."""
+    limit: str             # Groq's code for it: "ASPD", "ASH", "RPM", "RPD"… ("" if unnamed)
+    daily_quota: bool      # the daily audio-seconds quota (resets at midnight UTC)
+    retry_after: float     # seconds Groq asks to wait (0.0 when it doesn't say)
+
+
+# "Rate limit reached for model `whisper-large-v3-turbo` … on seconds of audio
+# per day (ASPD): Limit 28800, Used 28750, Requested 120. Please try again in 7m30s."
+_LIMIT_NAME = re.compile(r"\bon [a-z ]+ \(([A-Z]+)\)")
+_LIMIT_USAGE = re.compile(r"Used (\d+), Requested (\d+)")
+_RETRY_IN = re.compile(r"try again in (?:(\d+)h)?(?:(\d+)m)?(?:([\d.]+)s)?")
+
+
+def _retry_after(error: Exception) -> float:
+    """Retry-After header of the response, else Groq's "try again in" text."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        pass
+    m = _RETRY_IN.search(str(error))
+    if not m:
+        return 0.0
+    hours, minutes, seconds = (float(g) if g else 0.0 for g in m.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def groq_rate_limit(error: Exception) -> Optional[GroqRateLimit]:
+    """The Groq limit behind `error`, or None if it isn't a 429.
+
+    Decided by the SDK's status code (groq.RateLimitError), never by "429"
+    appearing somewhere in the message. Only the daily audio-seconds limit
+    counts as the quota running out: per-minute / per-hour limits clear
+    within the hour. An unnamed limit is judged by its Used / Requested
+    figures against GROQ_DAILY_QUOTA_SECONDS.
+    """
+    if getattr(error, "status_code", None) != 429:
+        return None
+    message = str(error)
+    name = _LIMIT_NAME.search(message)
+    limit = name.group(1) if name else ""
+    if limit:
+        daily = limit == "ASPD"
+    else:
+        usage = _LIMIT_USAGE.search(message)
+        daily = usage is not None and int(usage.group(1)) + int(usage.group(2)) > GROQ_DAILY_QUOTA_SECONDS
+    return GroqRateLimit(limit, daily, _retry_after(error))
+
+
+def _segment_tuples(raw_segments, time_map: Optional[TimeMap]) -> list[Tuple[float, float, str]]:
+    """Normalize backend segments (dicts or objects) to mapped (start, end, text)."""
+    segments: list[Tuple[float, float, str]] = []
+    for seg in raw_segments or []:
+        get = seg.get if isinstance(seg, dict) else lambda k, s=seg: getattr(s, k, None)
+        start, end = float(get("start") or 0.0), float(get("end") or 0.0)
+        if time_map is not None:
+            start, end = time_map.to_original(start), time_map.to_original(end)
+        segments.append((start, end, (get("text") or "").strip()))
+    return segments
+
+
+class WhisperBackend(ABC):
+    """Transcribes one audio chunk file. Subclasses set `name` and `remote`."""
+
+    name = "base"
+    remote = False
+
+    @abstractmethod
+    def transcribe_chunk(
+        self, chunk_path: Path, language: Optional[str], time_map: Optional[TimeMap] = None
+    ) -> ChunkResult:
+        """Transcribe `chunk_path`; segments mapped back through `time_map`."""
+
+
+# ── Groq (remote) ─────────────────────────────────────────────
+
+class _GroqLimiter:
+    """Process-wide cap on in-flight Groq requests. Request starts and audio
+    seconds are metered by the "groq" / "groq_audio" buckets (rate_limiter.py).
+
+    Shared by every WhisperTranscriber, so parallel chunks of concurrent
+    videos all draw from the same budget.
+    """
+
+    def __init__(self, max_concurrent: int):
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrent))
+
+    def acquire(self, audio_seconds: float) -> None:
+        self._slots.acquire()
+        try:
+            rate_limiter.acquire("groq")
+            rate_limiter.acquire("groq_audio", audio_seconds)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self) -> None:
+        self._slots.release()
+
+
+_groq_limiter = _GroqLimiter(GROQ_MAX_CONCURRENCY)
+
+
+class GroqWhisperBackend(WhisperBackend):
+    """Groq Whisper Large V3 Turbo ($0.00067/min, 228-383x real-time)."""
+
+    name = "groq"
+    remote = True
+
+    def __init__(self, api_key: str, bitrate: int):
+        from groq import Groq
+
+        self.client = Groq(api_key=api_key)
+        # Used to estimate duration when the response doesn't carry one
+        self._bitrate = bitrate
+
+    def transcribe_chunk(
+        self, chunk_path: Path, language: Optional[str], time_map: Optional[TimeMap] = None
+    ) -> ChunkResult:
+        chunk_bytes = chunk_path.stat().st_size
+        estimated_seconds = chunk_bytes * 8 / self._bitrate
+        _groq_limiter.acquire(max(10.0, estimated_seconds))
+        try:
+            with open(chunk_path, "rb") as f:
+                response = self.client.audio.transcriptions.create(
+                    model="whisper-large-v3-turbo",
+                    file=f,
+                    language=language,
+                    response_format="verbose_json",
+                )
+        finally:
+            _groq_limiter.release()
+        detected_lang = getattr(response, "language", None) or language or "unknown"
+        # Groq bills the duration it reports (minimum 10 s per request)
+        seconds = max(10.0, float(getattr(response, "duration", estimated_seconds)))
+        cost = seconds / 60 * 0.00067  # Groq pricing: $0.04/h = $0.00067/min
+        segments = _segment_tuples(getattr(response, "segments", None), time_map)
+        return ChunkResult(response.text, detected_lang, cost, segments, seconds)
+
+
+# ── faster-whisper (local CPU) ────────────────────────────────
+
+# Loaded once per pool process by _local_init, reused for every chunk
+_local_model = None
+
+
+def _local_init(model_name: str, cpu_threads: int) -> None:
+    global _local_model
+    from faster_whisper import WhisperModel
+
+    _local_model = WhisperModel(
+        model_name, device="cpu", compute_type="int8", cpu_threads=cpu_threads
+    )
+
+
+def _local_transcribe(chunk_path: str, language: Optional[str]) -> tuple:
+    """Runs in a pool process. Returns (text, language, audio_seconds, segments)."""
+    segments, info = _local_model.transcribe(
+        chunk_path, language=language, beam_size=1, vad_filter=False
+    )
+    raw = [{"start": s.start, "end": s.end, "text": s.text} for s in segments]
+    text = " ".join(s["text"].strip() for s in raw).strip()
+    return text, info.language, info.duration, raw
+
+
+class LocalWhisperBackend(WhisperBackend):
+    """faster-whisper (CTranslate2, int8) in a dedicated process pool.
+
+    Decoding is CPU-bound, so it runs in separate processes — never in the
+    event loop's thread pool — and each process loads the model once.
+    """
+
+    name = "local"
+    remote = False
+
+    def __init__(
+        self,
+        model_name: str = LOCAL_WHISPER_MODEL,
+        processes: int = LOCAL_WHISPER_PROCESSES,
+        threads_per_process: int = LOCAL_WHISPER_THREADS,
+    ):
+        if not LOCAL_WHISPER_AVAILABLE:
+            raise ImportError("faster-whisper is not installed")
+        self.model_name = model_name
+        self.processes = max(1, processes)
+        self.threads_per_process = threads_per_process or max(
+            1, (os.cpu_count() or 1) // self.processes
+        )
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        logger.info(
+            f"Local Whisper backend ready: {model_name} "
+            f"({self.processes} process(es) × {self.threads_per_process} threads)"
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Created lazily: most days the Groq quota is enough and the model
+        # (hundreds of MB per process) is never loaded.
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_local_init,
+                    initargs=(self.model_name, self.threads_per_process),
+                )
+            return self._pool
+
+    def transcribe_chunk(
+        self, chunk_path: Path, language: Optional[str], time_map: Optional[TimeMap] = None
+    ) -> ChunkResult:
+        future = self._get_pool().submit(_local_transcribe, str(chunk_path), language)
+        text, detected_lang, _, raw = future.result()
+        return ChunkResult(
+            text, detected_lang or language or "unknown", 0.0, _segment_tuples(raw, time_map), 0.0
+        )
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
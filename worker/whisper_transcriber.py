@@ -3,6 +3,11 @@ Whisper API transcriber for YouTube videos
 Uses Groq Whisper Large V3 Turbo to transcribe audio from YouTube videos
 Fallback solution when YouTube transcripts are not available
 
+Each video is admitted against the Groq daily quota before any audio is
+downloaded (groq_quota.py). Videos the quota can't take go to a local
+faster-whisper backend if LOCAL_WHISPER_MODEL is set (whisper_backends.py),
+otherwise they are deferred to the quota reset.
+
 Groq advantages:
 - 9x cheaper than OpenAI ($0.00067/min vs $0.006/min)
 - 228-383x faster than real-time
@@ -14,198 +19,507 @@ import os
 import logging
 import shutil
 import subprocess
+import sys
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, Tuple
-import yt_dlp
-from groq import Groq
+from typing import NamedTuple, Optional, Tuple
+
+from audio_preprocess import (
+    SILENCE_MIN_SECONDS,
+    SILENCE_NOISE_DB,
+    TimeMap,
+    parse_silencedetect,
+    preprocess_for_whisper,
+)
+from config import (
+    WHISPER_CHUNK_SECONDS,
+    WHISPER_PARALLEL_CHUNKS,
+    WHISPER_TRIM_SILENCE,
+    WHISPER_TEMPO,
+    LOCAL_WHISPER_MODEL,
+)
+from groq_quota import Reservation, groq_quota
+from rate_limiter import rate_limiter
+from whisper_backends import (
+    LOCAL_WHISPER_AVAILABLE,
+    ChunkResult,
+    GroqWhisperBackend,
+    LocalWhisperBackend,
+    WhisperBackend,
+    groq_rate_limit,
+)
 
 logger = logging.getLogger(__name__)
 
 
+class _ChunkCancelled(Exception):
+    """Raised inside a chunk task that was skipped after another chunk failed."""
+
+
+class _AudioChunk(NamedTuple):
+    """One slice of the video's audio sent to Whisper."""
+    path: Path
+    offset: float      # where the chunk file starts in the video (seconds)
+    duration: float    # chunk length, overlap included
+    own_start: float   # the part of the video this chunk's text is kept for —
+    own_end: float     # [own_start, own_end), overlap excluded
+    silences: list     # (start, end) silences in chunk time
+
+
 class WhisperTranscriber:
     """Transcribes YouTube videos using Groq Whisper Large V3 Turbo"""
 
     def __init__(self, api_key: Optional[str] = None):
         """
-        Initialize Whisper transcriber with Groq
+        Initialize Whisper transcriber with Groq and/or the local backend
 
         Args:
             api_key: Groq API key (if None, reads from GROQ_API_KEY env var)
         """
         self.api_key = api_key or os.environ.get("GROQ_API_KEY") or os.environ.get("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("GROQ_API_KEY must be provided or set in environment")
 
-        self.client = Groq(api_key=self.api_key)
-        logger.info("Groq Whisper transcriber initialized")
+        self.remote: Optional[WhisperBackend] = None
+        if self.api_key:
+            self.remote = GroqWhisperBackend(self.api_key, self._OPUS_BITRATE)
+            logger.info("Groq Whisper transcriber initialized")
 
-    def _download_audio(self, youtube_url: str, output_path: Path) -> bool:
-        """
-        Download audio from YouTube video
-
-        Args:
-            youtube_url: YouTube video URL
-            output_path: Path to save audio file
+        self.local: Optional[WhisperBackend] = None
+        if LOCAL_WHISPER_MODEL:
+            if LOCAL_WHISPER_AVAILABLE:
+                self.local = LocalWhisperBackend()
+            else:
+                logger.warning("LOCAL_WHISPER_MODEL set but faster-whisper is not installed")
 
-        Returns:
-            True if successful, False otherwise
-        """
-        try:
-            # 64kbps is more than sufficient for Whisper speech recognition and
-            # keeps file size well under Groq's 25 MB limit (~54 min max at 64kbps).
-            # 192kbps would exceed the limit for any video longer than ~15 min.
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': '64',
-                }],
-                'outtmpl': str(output_path.with_suffix('')),  # yt-dlp adds .mp3
-                'quiet': True,
-                'no_warnings': True,
-                'noprogress': True,
-            }
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([youtube_url])
+        if self.remote is None and self.local is None:
+            raise ValueError("GROQ_API_KEY must be provided or set in environment")
 
-            # Check if file was created
-            mp3_path = output_path.with_suffix('.mp3')
-            if mp3_path.exists():
-                return True
+    # Whisper resamples everything to 16 kHz mono internally, so encoding the
+    # download that way loses nothing. 32 kbps Opus keeps speech intelligible
+    # and is half the size of the old 64 kbps MP3.
+    _SAMPLE_RATE = 16000
+    _OPUS_BITRATE = 32_000  # bits per second
 
-            logger.error(f"Audio file not created: {mp3_path}")
-            return False
+    # Groq hard limit: 25 MB per request. Use 20 MB chunks to leave margin.
+    _MAX_CHUNK_BYTES = 20 * 1024 * 1024
 
+    # Chunk boundaries snap to a silence within this distance of the even cut
+    _CUT_SEARCH_SECONDS = 30
+    # Audio shared by neighbouring chunks so no word is cut at a boundary
+    _OVERLAP_SECONDS = 3.0
+
+    # Hard cap on the download + transcode pipeline so a stalled stream can't
+    # pin a worker thread forever (VIDEO_TIMEOUT only cancels the coroutine).
+    _STREAM_TIMEOUT = 900
+
+    # Budget reserved for a video whose metadata has no duration (live/VOD
+    # edge cases); the actual billed seconds are settled afterwards anyway
+    _UNKNOWN_DURATION_SECONDS = 3600
+
+    # A Groq 429 on a per-minute limit is waited out in place (at most this
+    # long, this many times per video); longer limits pause the quota instead
+    _RATE_LIMIT_MAX_WAIT = 60
+    _RATE_LIMIT_WAITS = 2
+    _RATE_LIMIT_DEFAULT_WAIT = 10
+
+    @classmethod
+    def _encode_args(cls) -> list[str]:
+        """ffmpeg output arguments for Whisper-bound audio (16 kHz mono Opus)."""
+        return [
+            "-vn", "-ac", "1", "-ar", str(cls._SAMPLE_RATE),
+            "-c:a", "libopus", "-b:a", str(cls._OPUS_BITRATE), "-application", "voip",
+        ]
+
+    def _chunk_seconds(self) -> int:
+        """Segment length: the configured target, capped so a chunk stays ≤20 MB."""
+        # 10% margin for Ogg container overhead and Opus VBR peaks
+        size_cap = int(self._MAX_CHUNK_BYTES * 8 / self._OPUS_BITRATE * 0.9)
+        return max(300, min(WHISPER_CHUNK_SECONDS, size_cap))
+
+    @staticmethod
+    def _probe_duration(youtube_url: str) -> Optional[float]:
+        """Video duration in seconds from YouTube metadata (no download)."""
+        import yt_dlp
+
+        opts = {"quiet": True, "no_warnings": True, "skip_download": True}
+        try:
+            rate_limiter.acquire("youtube")
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                info = ydl.extract_info(youtube_url, download=False)
+            return float(info["duration"]) if info and info.get("duration") else None
         except Exception as e:
-            logger.error(f"Error downloading audio: {e}")
-            return False
+            logger.warning(f"Could not read video duration: {str(e)[:120]}")
+            return None
 
-    # Groq hard limit: 25 MB per request. Use 20 MB chunks to leave margin.
-    _MAX_CHUNK_BYTES = 20 * 1024 * 1024
+    def _stream_audio(
+        self, youtube_url: str, temp_dir: Path
+    ) -> Tuple[Optional[Path], list[Tuple[float, float]], Optional[float]]:
+        """Download and transcode audio in a single streaming pass.
+
+        yt-dlp writes the best audio stream to stdout, which is piped straight
+        into one ffmpeg process that transcodes to 16 kHz mono Opus. The same
+        ffmpeg pass runs silencedetect, so cut points can be chosen without
+        decoding the audio a second time.
 
-    def _split_audio_chunks(self, audio_file: Path, temp_dir: Path) -> list[Path]:
-        """Split audio into ≤20 MB chunks so each fits within Groq's 25 MB limit.
+        Returns (audio_path, silences, duration) — audio_path is None on failure.
+        """
+        audio_path = temp_dir / "audio.ogg"
+        downloader_cmd = [
+            sys.executable, "-m", "yt_dlp",
+            "--format", "bestaudio/best",
+            "--output", "-",
+            "--quiet", "--no-warnings", "--no-progress",
+            youtube_url,
+        ]
+        # Default log level: silencedetect reports at "info", and the final
+        # progress line gives the duration (a piped input has none in its header)
+        encoder_cmd = [
+            "ffmpeg", "-hide_banner",
+            "-i", "pipe:0",
+            "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}",
+            *self._encode_args(),
+            str(audio_path),
+        ]
+
+        # yt-dlp's stderr goes to a file: a PIPE nobody drains could fill up
+        # and deadlock the downloader while ffmpeg waits on stdin.
+        downloader_log = temp_dir / "yt-dlp.log"
+        rate_limiter.acquire("youtube")
+        try:
+            with open(downloader_log, "wb") as log:
+                downloader = subprocess.Popen(
+                    downloader_cmd, stdout=subprocess.PIPE, stderr=log
+                )
+                encoder = subprocess.Popen(
+                    encoder_cmd, stdin=downloader.stdout, stderr=subprocess.PIPE
+                )
+                # Drop our copy so yt-dlp gets SIGPIPE if ffmpeg exits early
+                downloader.stdout.close()
+                try:
+                    _, encoder_err = encoder.communicate(timeout=self._STREAM_TIMEOUT)
+                    downloader.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    encoder.kill()
+                    downloader.kill()
+                    logger.error(f"Audio stream timed out after {self._STREAM_TIMEOUT}s")
+                    return None, [], None
+
+            if downloader.returncode != 0:
+                err = downloader_log.read_text(errors="replace").strip()
+                logger.error(f"Error downloading audio: {err[-300:] or downloader.returncode}")
+                return None, [], None
+            stderr = encoder_err.decode(errors="replace")
+            if encoder.returncode != 0:
+                logger.error(f"Error transcoding audio: {stderr.strip()[-300:] or encoder.returncode}")
+                return None, [], None
 
-        Uses ffprobe to get the total duration, then splits with ffmpeg into
-        equal-duration segments. Returns [audio_file] unchanged if already small enough.
+        except Exception as e:
+            logger.error(f"Error streaming audio: {e}")
+            return None, [], None
+
+        if not audio_path.exists():
+            logger.error("Audio stream produced no output")
+            return None, [], None
+        silences, duration = parse_silencedetect(stderr)
+        return audio_path, silences, duration
+
+    def _plan_cuts(
+        self, silences: list[Tuple[float, float]], duration: float
+    ) -> list[float]:
+        """Pick chunk boundaries, snapping each one to a nearby silence.
+
+        Targets are evenly spaced so chunks stay under the length cap; each one
+        moves to the midpoint of the closest silence within ±_CUT_SEARCH_SECONDS
+        Without a nearby silence the even cut is kept —
+        the overlap window still protects the words around it.
+
+        Returns the boundaries including 0 and `duration`.
         """
-        file_size = audio_file.stat().st_size
-        if file_size <= self._MAX_CHUNK_BYTES:
-            return [audio_file]
-
-        # Get total duration
-        probe = subprocess.run(
-            [
-                "ffprobe", "-v", "error",
-                "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1",
-                str(audio_file),
-            ],
-            capture_output=True,
-            text=True,
-        )
-        total_duration = float(probe.stdout.strip())
-
-        num_chunks = math.ceil(file_size / self._MAX_CHUNK_BYTES)
-        chunk_duration = total_duration / num_chunks
-
-        logger.info(
-            f"Audio too large ({file_size / 1024 / 1024:.1f} MB) — "
-            f"splitting into {num_chunks} chunks of ~{chunk_duration / 60:.1f} min"
-        )
-
-        chunks: list[Path] = []
-        for i in range(num_chunks):
-            start = i * chunk_duration
-            chunk_path = temp_dir / f"chunk_{i:03d}.mp3"
+        chunk_seconds = self._chunk_seconds()
+        if duration <= chunk_seconds:
+            return [0.0, duration]
+
+        # Leave room for a boundary moving by the search window on both sides,
+        # plus the overlap, without exceeding chunk_seconds
+        slack = 2 * (self._CUT_SEARCH_SECONDS + self._OVERLAP_SECONDS)
+        num_chunks = math.ceil(duration / (chunk_seconds - slack))
+        step = duration / num_chunks
+        midpoints = [(start + end) / 2 for start, end in silences]
+        cuts = [0.0]
+        for k in range(1, num_chunks):
+            target = k * step
+            nearby = [
+                m for m in midpoints
+                if abs(m - target) <= self._CUT_SEARCH_SECONDS and m > cuts[-1]
+            ]
+            cuts.append(min(nearby, key=lambda m: abs(m - target)) if nearby else target)
+        cuts.append(duration)
+        return cuts
+
+    def _cut_chunks(
+        self, audio_path: Path, cuts: list[float], silences: list[Tuple[float, float]]
+    ) -> list[_AudioChunk]:
+        """Cut the audio at `cuts` with stream copy, widening each chunk by the
+        overlap window on both sides. No re-encode: each cut is a packet copy."""
+        if len(cuts) == 2:
+            return [_AudioChunk(audio_path, 0.0, cuts[1], cuts[0], cuts[1], silences)]
+
+        chunks: list[_AudioChunk] = []
+        for i in range(len(cuts) - 1):
+            start = max(0.0, cuts[i] - self._OVERLAP_SECONDS)
+            end = min(cuts[-1], cuts[i + 1] + self._OVERLAP_SECONDS)
+            chunk_path = audio_path.with_name(f"chunk_{i:03d}.ogg")
             subprocess.run(
                 [
-                    "ffmpeg", "-y",
-                    "-ss", str(start),
-                    "-t", str(chunk_duration),
-                    "-i", str(audio_file),
-                    "-q:a", "0",
+                    "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+                    "-ss", f"{start:.3f}",
+                    "-i", str(audio_path),
+                    "-t", f"{end - start:.3f}",
+                    "-c", "copy",
                     str(chunk_path),
                 ],
                 capture_output=True,
                 check=True,
             )
-            chunks.append(chunk_path)
-
+            # Silences re-expressed in chunk time, for the preprocessing stage
+            local = [
+                (max(s, start) - start, min(e, end) - start)
+                for s, e in silences
+                if e > start and s < end
+            ]
+            chunks.append(
+                _AudioChunk(chunk_path, start, end - start, cuts[i], cuts[i + 1], local)
+            )
         return chunks
 
-    def _transcribe_chunk(
-        self, chunk_path: Path, language: Optional[str]
-    ) -> Tuple[str, str, float]:
-        """Send one audio chunk to Groq Whisper. Returns (text, lang, cost_usd)."""
-        chunk_size_mb = chunk_path.stat().st_size / (1024 * 1024)
-        with open(chunk_path, "rb") as f:
-            response = self.client.audio.transcriptions.create(
-                model="whisper-large-v3-turbo",
-                file=f,
-                language=language,
-                response_format="verbose_json",
+    @staticmethod
+    def _stitch(chunks: list[_AudioChunk], results: list) -> str:
+        """Join chunk transcripts, dropping the text duplicated by the overlap.
+
+        Each chunk owns [own_start, own_end) of the video; a segment is kept
+        only by the chunk that owns its midpoint. Chunks without segment
+        timestamps fall back to their full text.
+        """
+        if len(chunks) == 1:
+            return results[0].text
+
+        parts: list[str] = []
+        for chunk, result in zip(chunks, results):
+            if not result.segments:
+                parts.append(result.text.strip())
+                continue
+            kept = [
+                seg_text for seg_start, seg_end, seg_text in result.segments
+                if chunk.own_start <= chunk.offset + (seg_start + seg_end) / 2 < chunk.own_end
+            ]
+            parts.append(" ".join(t for t in kept if t))
+        return "\n".join(p for p in parts if p)
+
+    def _admit(
+        self, youtube_url: str, priority: int
+    ) -> Tuple[Optional[WhisperBackend], Optional[Reservation]]:
+        """Choose the backend for a video before any audio is downloaded.
+
+        Groq if the daily quota admits the video's estimated billed seconds
+        (duration / WHISPER_TEMPO) at this priority, else local Whisper, else
+        (None, None) — the caller defers the job to the quota reset.
+        """
+        if self.remote is None:
+            return self.local, None
+
+        duration = self._probe_duration(youtube_url) or self._UNKNOWN_DURATION_SECONDS
+        estimate = duration / max(1.0, WHISPER_TEMPO)
+        reservation = groq_quota.admit(estimate, priority)
+        if reservation is not None:
+            return self.remote, reservation
+        if self.local is not None:
+            logger.info(f"Groq quota can't take {estimate / 60:.0f} min — using local Whisper")
+        return self.local, None
+
+    def _preprocess_chunk(self, chunk: _AudioChunk) -> Tuple[Path, Optional[TimeMap]]:
+        """Apply optional silence trimming / tempo (WHISPER_TRIM_SILENCE, WHISPER_TEMPO).
+
+        Falls back to the untouched chunk if ffmpeg fails — preprocessing only
+        saves money, it must never cost a transcript.
+        """
+        if not WHISPER_TRIM_SILENCE and WHISPER_TEMPO <= 1.0:
+            return chunk.path, None
+        try:
+            return preprocess_for_whisper(
+                chunk.path,
+                chunk.path.with_name(f"{chunk.path.stem}_pre{chunk.path.suffix}"),
+                self._encode_args(),
+                tempo=WHISPER_TEMPO,
+                trim_silence=WHISPER_TRIM_SILENCE,
+                silences=chunk.silences,
+                duration=chunk.duration,
             )
-        detected_lang = getattr(response, "language", None) or language or "unknown"
-        duration_min = getattr(response, "duration", chunk_size_mb * 3 * 60) / 60
-        cost = duration_min * 0.00067  # Groq pricing: $0.04/h = $0.00067/min
-        return response.text, detected_lang, cost
+        except Exception as e:
+            logger.warning(f"Preprocessing failed for {chunk.path.name} (sending as-is): {e}")
+            return chunk.path, None
+
+    def _transcribe_chunks(
+        self,
+        chunks: list[_AudioChunk],
+        language: Optional[str],
+        backend: WhisperBackend,
+        results: list[Optional[ChunkResult]],
+    ) -> list[ChunkResult]:
+        """Transcribe chunks concurrently and return the results in chunk order.
+
+        At most WHISPER_PARALLEL_CHUNKS chunks of this video run at once (Groq
+        requests also go through the shared Groq limiter). Slots of `results`
+        that are already filled are skipped, so a call that failed half-way
+        can be resumed on another backend. The first failure (typically a
+        quota 429) cancels all chunks that haven't started yet and is
+        re-raised unchanged, so callers still see Groq's original error.
+        """
+        cancelled = threading.Event()
+        timings: list[float] = [0.0] * len(chunks)
+
+        def run(i: int, chunk: _AudioChunk):
+            if cancelled.is_set():
+                raise _ChunkCancelled(chunk.path.name)
+            audio, time_map = self._preprocess_chunk(chunk)
+            if cancelled.is_set():
+                raise _ChunkCancelled(chunk.path.name)
+            started = time.monotonic()
+            result = backend.transcribe_chunk(audio, language, time_map)
+            timings[i] = time.monotonic() - started
+            if len(chunks) > 1:
+                logger.info(
+                    f"Chunk {i + 1}/{len(chunks)} transcribed by {backend.name} "
+                    f"in {timings[i]:.1f}s"
+                )
+            return result
+
+        workers = max(1, min(WHISPER_PARALLEL_CHUNKS, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="whisper") as pool:
+            futures = {
+                pool.submit(run, i, chunk): i
+                for i, chunk in enumerate(chunks)
+                if results[i] is None
+            }
+            try:
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+            except Exception as e:
+                cancelled.set()
+                skipped = sum(future.cancel() for future in futures)
+                # Let in-flight chunks finish and keep every result that
+                # succeeded, so a resumed call only redoes what's missing
+                pool.shutdown(wait=True)
+                for future, i in futures.items():
+                    if not future.cancelled() and future.exception() is None:
+                        results[i] = future.result()
+                limit = groq_rate_limit(e)
+                if limit:
+                    logger.warning(
+                        f"Groq rate limit {limit.limit or '(unnamed)'} hit — "
+                        f"cancelled {skipped} pending chunk(s)"
+                    )
+                raise
+
+        if len(futures) > 1:
+            logger.info(
+                f"Chunk timings ({backend.name}): "
+                + ", ".join(f"{t:.1f}s" for t in timings if t)
+                + f" (slowest {max(timings):.1f}s, sum {sum(timings):.1f}s)"
+            )
+        return results
 
     def transcribe(
         self,
         youtube_url: str,
         language: Optional[str] = None,
+        priority: int = 0,
     ) -> Tuple[Optional[str], Optional[str], Optional[str], float]:
         """
-        Transcribe a YouTube video using Whisper API.
+        Transcribe a YouTube video using Whisper (Groq, or local on low quota).
+
+        Audio is streamed and transcoded in one pass, cut at silences into
+        slightly overlapping ≤20 MB chunks, transcribed in parallel, and the
+        chunk transcripts stitched back together without the overlap.
 
-        Large videos (>20 MB audio) are automatically split into chunks and
-        their transcripts joined before returning.
+        Args:
+            priority: processing_queue priority — decides how much of the
+                Groq daily quota this video may use (see groq_quota.py)
 
         Returns:
             (transcript_text, detected_language, error_message, cost_usd)
+            error_message is "groq_quota_deferred" when the quota can't admit
+            the video (or Groq refused on a per-minute / per-hour limit) and
+            there is no local backend, "groq_quota_exhausted: <Groq's message>"
+            when Groq refused on its daily limit.
         """
         temp_dir = None
-        audio_file = None
+        reservation: Optional[Reservation] = None
+        results: list[Optional[ChunkResult]] = []
 
         try:
+            # Step 1: Admit against the Groq quota before downloading anything
+            backend, reservation = self._admit(youtube_url, priority)
+            if backend is None:
+                return None, None, "groq_quota_deferred", 0.0
+
             temp_dir = tempfile.mkdtemp(prefix="brieftube_whisper_")
-            audio_path = Path(temp_dir) / "audio"
 
-            # Step 1: Download audio
-            logger.info(f"Downloading audio from YouTube: {youtube_url}")
-            if not self._download_audio(youtube_url, audio_path):
+            # Step 2: Stream + transcode audio, then cut it at silences
+            logger.info(f"Streaming audio from YouTube: {youtube_url}")
+            audio_file, silences, duration = self._stream_audio(youtube_url, Path(temp_dir))
+            if audio_file is None:
                 return None, None, "audio_download_failed", 0.0
+            if duration is None:
+                return None, None, "audio_duration_unknown", 0.0
 
-            audio_file = audio_path.with_suffix(".mp3")
-            file_size_mb = audio_file.stat().st_size / (1024 * 1024)
-            logger.info(f"Audio downloaded: {file_size_mb:.2f} MB")
-
-            # Step 2: Split into chunks if needed
-            chunks = self._split_audio_chunks(audio_file, Path(temp_dir))
+            chunks = self._cut_chunks(audio_file, self._plan_cuts(silences, duration), silences)
+            total_mb = audio_file.stat().st_size / (1024 * 1024)
+            logger.info(
+                f"Audio ready: {duration / 60:.1f} min, {total_mb:.2f} MB, "
+                f"{len(chunks)} chunk(s), {len(silences)} silences detected"
+            )
 
-            # Step 3: Transcribe each chunk
+            # Step 3: Transcribe chunks in parallel
             logger.info(
-                f"Transcribing {len(chunks)} chunk(s) with Groq Whisper "
+                f"Transcribing {len(chunks)} chunk(s) with {backend.name} Whisper "
                 f"(language: {language or 'auto-detect'})..."
             )
-            parts: list[str] = []
-            total_cost = 0.0
-            detected_lang = language
-
-            for i, chunk in enumerate(chunks):
-                if len(chunks) > 1:
-                    logger.info(f"Chunk {i + 1}/{len(chunks)}: {chunk.name}")
-                text, lang, cost = self._transcribe_chunk(chunk, language)
-                parts.append(text)
-                total_cost += cost
-                if i == 0:
-                    detected_lang = lang
-
-            transcript = "\n".join(parts)
+            results = [None] * len(chunks)
+            waits = 0
+            while True:
+                try:
+                    self._transcribe_chunks(chunks, language, backend, results)
+                    break
+                except Exception as e:
+                    limit = groq_rate_limit(e) if backend.remote else None
+                    if limit is None:
+                        raise
+                    wait = limit.retry_after or self._RATE_LIMIT_DEFAULT_WAIT
+                    short = not limit.daily_quota and wait <= self._RATE_LIMIT_MAX_WAIT
+                    if short and waits < self._RATE_LIMIT_WAITS:
+                        # Short window (requests per minute): resume on Groq
+                        waits += 1
+                        logger.info(f"Groq rate limit {limit.limit or '(unnamed)'} — resuming in {wait:.0f}s")
+                        time.sleep(wait)
+                        continue
+                    if limit.daily_quota:
+                        groq_quota.mark_exhausted()
+                    else:
+                        groq_quota.pause(wait, limit.limit)
+                    if self.local is None:
+                        error = f"groq_quota_exhausted: {e}" if limit.daily_quota else "groq_quota_deferred"
+                        return None, None, error, 0.0
+                    # Keep the chunks Groq already finished, redo the rest locally
+                    logger.warning(
+                        f"Groq rate limit {limit.limit or '(unnamed)'} mid-video — finishing on local Whisper"
+                    )
+                    backend = self.local
+            total_cost = sum(r.cost for r in results)
+            detected_lang = results[0].language
+
+            transcript = self._stitch(chunks, results)
             logger.info(
                 f"✅ Transcription complete: {len(transcript)} chars, "
                 f"language: {detected_lang}, chunks: {len(chunks)}, "
@@ -218,7 +532,16 @@ class WhisperTranscriber:
             return None, None, f"whisper_error: {str(e)}", 0.0
 
         finally:
-            # Cleanup temp files (audio + all chunks)
+            # Settle with what Groq actually billed, including the chunks of
+            # a video that failed half-way
+            if reservation is not None:
+                done = [r for r in results if r is not None]
+                groq_quota.settle(
+                    reservation,
+                    sum(r.billed_seconds for r in done),
+                    sum(r.cost for r in done),
+                )
+            # Cleanup temp files (all chunks + downloader log)
             if temp_dir:
                 try:
                     shutil.rmtree(temp_dir, ignore_errors=True)